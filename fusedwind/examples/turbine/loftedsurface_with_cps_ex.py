@@ -6,12 +6,12 @@ import unittest
 
 from openmdao.api import Problem, Group
 
-from PGL.main.distfunc import distfunc
 from fusedwind.turbine.geometry import read_blade_planform,\
                                        redistribute_planform,\
                                        PGLLoftedBladeSurface,\
                                        PGLRedistributedPlanform, \
                                        SplinedBladePlanform
+from fusedwind.lib.geom_tools import easy_distfunc
 
 
 
@@ -25,7 +25,7 @@ def configure_surface():
     nsec_ae = 30
     nsec_st = 20
     dist = np.array([[0., 1./nsec_ae, 1], [1., 1./nsec_ae/3., nsec_ae]])
-    s_ae = distfunc(dist)
+    s_ae = easy_distfunc(dist)
     s_st = np.linspace(0, 1, nsec_st)
     pf = redistribute_planform(pf, s=s_ae)
 
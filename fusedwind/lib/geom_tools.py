@@ -1,59 +1,203 @@
 
+import hashlib
 import numpy as np
-from scipy.interpolate import griddata
+from collections import OrderedDict
+from scipy.optimize import brentq
+from scipy.interpolate import LinearNDInterpolator
+from scipy.spatial import Delaunay, cKDTree
 from numpy.linalg import norm
 
 
+def _array_hash(x):
+
+    x = np.ascontiguousarray(x)
+    return (x.shape, x.dtype.str, hashlib.sha1(x).hexdigest())
+
+class SurfaceProjector(object):
+    """
+    Projects points onto a surface along the direction N_vect.
+
+    The surface is rotated to align N_vect with the z direction, and the
+    triangulation of the rotated surface is built once, so any number of
+    point batches can be projected against it. The triangulation is
+    rebuilt when a changed surface is passed to `set_surface`.
+    """
+
+    def __init__(self, x, N_vect):
+        """
+        \param    x       the surface points               <c> numpy.array((..., 3)) </c>
+        \param    N_vect  the projection direction         <c> numpy.array(3) </c>
+        """
+        self.N_vect = N_vect/norm(N_vect)
+        self.rot = calculate_rotation_matrix(self.N_vect)
+        self.inv_rot = np.linalg.inv(self.rot)
+        self._key = None
+        self.set_surface(x)
+
+    def set_surface(self, x):
+        """
+        rebuild the triangulation if the surface \e x has changed
+
+        \param    x       the surface points               <c> numpy.array((..., 3)) </c>
+        """
+        key = _array_hash(x)
+        if key == self._key:
+            return
+        x_rot = dotX(self.rot, x).reshape(-1, 3)
+        self._tri = Delaunay(x_rot[:, :2])
+        self._interp = LinearNDInterpolator(self._tri, x_rot[:, 2])
+        self._x_rot = x_rot
+        self._tree = None
+        self._key = key
+
+    def __call__(self, points, nearest=False):
+        """
+        \param    points  the points to project            <c> numpy.array((n, 3)) </c>
+        \param    nearest if True points outside the surface take the
+                          height of the nearest surface point, otherwise NaN
+        \retval   points_final  the projected points       <c> numpy.array((n, 3)) </c>
+        """
+        points_rot = dotX(self.rot, points)
+        z = self._interp(points_rot[:, :2])
+        if nearest:
+            outside = np.isnan(z)
+            if outside.any():
+                if self._tree is None:
+                    self._tree = cKDTree(self._x_rot[:, :2])
+                z[outside] = self._x_rot[self._tree.query(points_rot[outside, :2])[1], 2]
+        points_rot2 = np.array([points_rot[:,0], points_rot[:,1], z]).T
+        ### Rotate back
+        return dotX(self.inv_rot, points_rot2)
+
+# projector of the last call to project_points
+_projector = None
+
 def project_points(points,x,N_vect):
     """
     Rotate the surface and the points in order to align the vector N_vect in the z direction
+
+    The triangulation of the surface is reused as long as the
+    surface and N_vect are unchanged.
     """
+    global _projector
 
     N_vect = N_vect/norm(N_vect)
-    rot = calculate_rotation_matrix(N_vect)
-    points_rot = dotX(rot,points)
-    x_rot = dotX(rot,x)
-    points_rot2 = np.array([points_rot[:,0], points_rot[:,1],
-                 griddata((x_rot[:,:,0].flatten(),x_rot[:,:,1].flatten()),x_rot[:,:,2].flatten(),
-                      (points_rot[:,0],points_rot[:,1]), method = 'linear') ]).T
-    ### Rotate back
-    inv_rot = np.linalg.inv(rot)
-    points_final = dotX(inv_rot,points_rot2)
-    return points_final
+    if _projector is None or not np.array_equal(_projector.N_vect, N_vect):
+        _projector = SurfaceProjector(x, N_vect)
+    else:
+        _projector.set_surface(x)
+    return _projector(points)
 
 def normalize(v):
 
     return v / (np.dot(v,v)**2+1.e-16)
 
+def _curve_derivatives(points):
+    """
+    first and second finite differences along axis -2 at the interior points
+    """
+    d1 = np.diff(points, axis=-2)
+    d2 = np.diff(d1, axis=-2)
+    return d1[..., 1:, :], d2
+
+def _curvature(d1, d2):
+
+    if d1.shape[-1] == 2:
+        num = d1[..., 0]*d2[..., 1] - d1[..., 1]*d2[..., 0]
+        return num / (d1[..., 0]**2 + d1[..., 1]**2)**1.5
+    num = ((d2[..., 2]*d1[..., 1] - d2[..., 1]*d1[..., 2])**2 +
+           (d2[..., 0]*d1[..., 2] - d2[..., 2]*d1[..., 0])**2 +
+           (d2[..., 1]*d1[..., 0] - d2[..., 0]*d1[..., 1])**2)**0.5
+    return num / ((d1**2).sum(axis=-1) + 1.e-30)**1.5
+
+def batch_curvature(points, d1=None, d2=None):
+    """
+    Curvature of a stack of 2D or 3D curves, signed in 2D.
+
+    By default the curvature is computed with finite differences of the
+    points, with the end values copied from their neighbours.
+    Passing the first and second derivatives of the curves w.r.t. their
+    parameter, e.g. from a spline, evaluates the curvature exactly.
+
+    \param    points  the curves                           <c> numpy.array((k,n,dim)) or numpy.array((n,dim)) </c>
+    \param    d1      optional first derivatives           <c> numpy.array with the shape of points </c>
+    \param    d2      optional second derivatives          <c> numpy.array with the shape of points </c>
+    \retval   curv    the curvatures                       <c> numpy.array((k,n)) or numpy.array((n,)) </c>
+    """
+    points = np.asarray(points)
+    if points.ndim < 2 or points.shape[-1] not in (2, 3):
+        raise ValueError('curvature expects (..., n, 2) or (..., n, 3) points, '
+                         'got shape %s' % (points.shape,))
+    if d1 is not None and d2 is not None:
+        return _curvature(np.asarray(d1), np.asarray(d2))
+
+    curv = np.zeros(points.shape[:-1], dtype=points.dtype)
+    if points.shape[-2] < 3:
+        return curv
+    curv[..., 1:-1] = _curvature(*_curve_derivatives(points))
+    curv[..., 0] = curv[..., 1]
+    curv[..., -1] = curv[..., -2]
+    return curv
+
 def curvature(points):
+    """
+    Finite difference curvature of a single 2D or 3D curve,
+    see `batch_curvature`
 
+    \param    points  the curve                            <c> numpy.array((n,dim)) </c>
+    \retval   curv    the curvature                        <c> numpy.array((n,)) </c>
+    """
     if len(points.shape) < 2:
         return None
     if points.shape[1] == 1:
         return None
+    return batch_curvature(points)
 
-    if points.shape[1] == 2:
-        d1 = np.diff(points.T)
-        d2 = np.diff(d1)
-        x1 = d1[0,1:]; y1 = d1[1,1:]
-        x2 = d2[0,:];  y2 = d2[1,:]
-        curv = (x1*y2-y1*x2)/(x1**2+y1**2)**(3./2.)
-
-    elif points.shape[1] == 3:
-        d1 = np.diff(points.T)
-        d2 = np.diff(d1)
-        x1 = d1[0,1:]; y1 = d1[1,1:]; z1 = d1[2,1:]
-        x2 = d2[0,:]; y2 = d2[1,:]; z2 = d2[2,:]
-        curv = ((z2*y1 - y2*z1)**2.0 + (x2*z1 - z2*x1)**2.0 + (y2*x1 - x2*y1)**2.0)**0.5/(x1**2.0 + y1**2.0 + z1**2.0+1.e-30)**(3.0/2.0)
-
-    curvt = np.zeros(points.shape[0], dtype=points.dtype)
-    try:
-        curvt[1:-1] = curv
-        curvt[0] = curv[0]
-        curvt[-1] = curv[-1]
-    except:
-        pass
-    return curvt
+def curvature_jacobian(points):
+    """
+    Jacobian of the 2D finite difference curvature computed by `curvature`
+    w.r.t. the curve points, optionally for a stack of curves
+
+    \param    points  the array of 2d points                <c> numpy.array((n,2)) or numpy.array((k,n,2)) </c>
+    \retval   dcurv   derivatives of the curvature          <c> numpy.array((n,n,2)) or numpy.array((k,n,n,2)) </c>
+    """
+    n = points.shape[-2]
+    dcurv = np.zeros(points.shape[:-2] + (n, n, 2), dtype=points.dtype)
+    if n < 3:
+        return dcurv
+
+    d1, d2 = _curve_derivatives(points)
+    x1 = d1[..., 0]; y1 = d1[..., 1]
+    x2 = d2[..., 0]; y2 = d2[..., 1]
+    num = x1*y2-y1*x2
+    q = x1**2+y1**2
+    dx1 = y2/q**1.5 - 3.*num*x1/q**2.5
+    dy1 = -x2/q**1.5 - 3.*num*y1/q**2.5
+    dx2 = -y1/q**1.5
+    dy2 = x1/q**1.5
+
+    k = np.arange(1, n-1)
+    for j, (dd1, dd2) in enumerate([(dx1, dx2), (dy1, dy2)]):
+        dcurv[..., k, k-1, j] = dd2
+        dcurv[..., k, k, j] = -dd1 - 2.*dd2
+        dcurv[..., k, k+1, j] = dd1 + dd2
+    dcurv[..., 0, :, :] = dcurv[..., 1, :, :]
+    dcurv[..., -1, :, :] = dcurv[..., -2, :, :]
+    return dcurv
+
+def graph_curvature(dy, ddy):
+    """
+    Exact curvature of the graphs y(x) of a stack of functions
+    given their first and second derivatives
+
+    \param    dy      first derivatives dy/dx              <c> numpy.array((k,n)) </c>
+    \param    ddy     second derivatives d2y/dx2           <c> numpy.array((k,n)) </c>
+    \retval   curv    the signed curvatures                <c> numpy.array((k,n)) </c>
+    \retval   dcurv   derivatives of curv w.r.t. dy and ddy <c> tuple of two numpy.array((k,n)) </c>
+    """
+    q = 1. + dy**2
+    curv = ddy / q**1.5
+    return curv, (-3. * dy * ddy / q**2.5, 1. / q**1.5)
 
 def calculate_angle(v1,v2):
     """
@@ -80,29 +224,76 @@ def calculate_length(In):
         leng = np.insert(leng,0,0.)
         return leng
 
-    ni, nj = In.shape
-    if nj == 2:
-        # segment lengths
-        seglen  =np.zeros(In.shape[0], dtype=In.dtype)
-        curvelen=np.zeros(In.shape[0], dtype=In.dtype)
-
-        # calculate length and normals for each segment
-        for i in range(1,In.shape[0]):
-            seglen[i]=((In[i,0]-In[i-1,0])**2.0 \
-                      +(In[i,1]-In[i-1,1])**2.0)**0.5
-        # calculate accumulated curvelen
-        leng=np.cumsum(seglen)
-
-    elif nj ==3:
-        seglen  =np.zeros(In.shape[0], dtype=In.dtype)
-        curvelen=np.zeros(In.shape[0], dtype=In.dtype)
-        for i in range(1,In.shape[0]):
-            seglen[i]=((In[i,0]-In[i-1,0])**2.0 \
-                      +(In[i,1]-In[i-1,1])**2.0 \
-                      +(In[i,2]-In[i-1,2])**2.0)**0.5
-        leng=np.cumsum(seglen)
-
-    return leng
+    return arc_length(In)
+
+def arc_length(points, axis=-2):
+    """
+    Calculate the running length of any number of curves in one batch
+
+    \param    points  the array of 2d or 3d points        <c> numpy.array((..., n, dim)) </c>
+    \param    axis    the axis along the curves, e.g. 0 for the chordwise
+                      sections of a (ni_chord, nsec, 3) blade surface
+    \retval   s       the running distance of each curve  <c> numpy.array((..., n)) </c>
+    """
+    axis = axis % points.ndim
+    points = np.moveaxis(points, axis, -2)
+    seglen = np.sqrt(((points[..., 1:, :] - points[..., :-1, :])**2).sum(axis=-1))
+    s = np.zeros(points.shape[:-1], dtype=points.dtype)
+    s[..., 1:] = np.cumsum(seglen, axis=-1)
+    return np.moveaxis(s, -1, axis)
+
+def normalized_arc_length(points, axis=-2):
+    """
+    Calculate the running length of any number of curves normalized
+    by their total length
+
+    \param    points  the array of 2d or 3d points        <c> numpy.array((..., n, dim)) </c>
+    \param    axis    the axis along the curves
+    \retval   s       the normalized running distance     <c> numpy.array((..., n)) </c>
+    \retval   smax    the total length of each curve      <c> numpy.array((...)) </c>
+    """
+    axis = axis % points.ndim
+    s = np.moveaxis(arc_length(points, axis), axis, -1)
+    smax = s[..., -1].copy()
+    return np.moveaxis(s / smax[..., np.newaxis], -1, axis), smax
+
+def interp_arc_length(points, s, s_new, segments=False):
+    """
+    Calculate the points at the running lengths s_new of any number of curves
+    by linear interpolation along their segments
+
+    \param    points  the array of 2d or 3d points              <c> numpy.array((..., n, dim)) </c>
+    \param    s       the running distance of the points, e.g. from
+                      arc_length or normalized_arc_length       <c> numpy.array((..., n)) </c>
+    \param    s_new   the running distances to interpolate at   <c> numpy.array((..., m)) </c>
+    \param    segments  also return the segment indices and the relative
+                      positions on the segments                 <c> bool </c>
+    \retval   p_new   the interpolated points                   <c> numpy.array((..., m, dim)) </c>
+    \retval   j       the index of the first point of the segments  <c> numpy.array((..., m)) </c>
+    \retval   t       the relative positions on the segments    <c> numpy.array((..., m)) </c>
+    """
+    shape = s_new.shape
+    n, dim = points.shape[-2:]
+    points = points.reshape(-1, n, dim)
+    s = s.reshape(-1, n)
+    s_new = s_new.reshape(s.shape[0], -1)
+    ncurve = s.shape[0]
+
+    # locate all points in one search by offsetting each curve
+    # beyond the range of the previous one
+    span = (s[:, -1] - s[:, 0]).real.max() + 1.
+    offset = span * np.arange(ncurve)[:, np.newaxis] - s[:, :1].real
+    j = np.searchsorted((s.real + offset).flatten(), (s_new.real + offset).flatten(),
+                        side='right').reshape(s_new.shape) - 1
+    j -= n * np.arange(ncurve)[:, np.newaxis]
+    j = np.minimum(np.maximum(j, 0), n - 2)
+
+    icurve = np.arange(ncurve)[:, np.newaxis]
+    t = (s_new - s[icurve, j]) / (s[icurve, j + 1] - s[icurve, j])
+    p_new = points[icurve, j] + t[:, :, np.newaxis] * (points[icurve, j + 1] - points[icurve, j])
+    if segments:
+        return p_new.reshape(shape + (dim,)), j.reshape(shape), t.reshape(shape)
+    return p_new.reshape(shape + (dim,))
 
 def calculate_rotation_matrix(vect):
     """
@@ -142,45 +333,107 @@ def rotation_matrix_global(vect,direction):
     rot = RotMat(w_norm,q)
     return rot
 
-def dotX(rot, x, trans_vect=np.array([0.0,0.0,0.0])):
+def batch_dot(rot, x, out=None):
+    """
+    Multiply any number of points by their rotation matrices in one batch.
+
+    The leading dimensions of \e rot and \e x are broadcast, so a surface
+    of shape (ni, nsec, 3) can be rotated section by section with rot
+    of shape (nsec, 3, 3).
+
+    \param    rot     the rotation matrices         <c> numpy.array((..., 3, 3)) </c>
+    \param    x       the points                    <c> numpy.array((..., 3)) </c>
+    \param    out     optional output buffer        <c> numpy.array((..., 3)) </c>
+    \retval   x_rot   the rotated points            <c> numpy.array((..., 3)) </c>
+    """
+    if out is None:
+        return np.einsum('...ij,...j->...i', rot, x)
+    return np.einsum('...ij,...j->...i', rot, x, out=out)
+
+def dotX(rot, x, trans_vect=np.array([0.0,0.0,0.0]), out=None):
     """
     Transpose and Multiply the x array by a rotational matrix
+
+    \param    rot     the rotation matrix, or one per point or section    <c> numpy.array((..., 3, 3)) </c>
+    \param    x       the points, or a list of x, y and z arrays           <c> numpy.array((..., 3)) </c>
+    \param    trans_vect  translation applied before the rotation         <c> numpy.array(3) </c>
+    \param    out     optional output buffer for array input              <c> numpy.array((..., 3)) </c>
+    \retval   x_rot   the rotated points                                  <c> numpy.array((..., 3)) </c>
     """
     if isinstance(x,list):
         x_tmp = np.array([x[0].flatten(), x[1].flatten(), x[2].flatten()]).T
-        x_rot_tmp = np.zeros(x_tmp.shape, dtype=x.dtype)
-        for i in range(x_tmp.shape[0]):
-            x_rot_tmp[i,:] = dot(rot, x_tmp[i,:] - trans_vect)
+        x_rot_tmp = batch_dot(rot, x_tmp - trans_vect)
 
         x_rot = []
         for iX in range(3):
             x_rot.append(x_rot_tmp[:,iX].reshape(x[0].shape))
     elif isinstance(x,np.ndarray):
-        x_rot = np.zeros(x.shape, dtype=x.dtype)
-        if len(x.shape)==1:
-            x_rot = np.dot(rot, x - trans_vect)
-        elif len(x.shape)==2:
-            for i in range(x.shape[0]):
-                x_rot[i,:] = np.dot(rot, x[i,:] - trans_vect)
-        elif len(x.shape)==3:
-            for i in range(x.shape[0]):
-                for j in range(x.shape[1]):
-                    x_rot[i,j,:] = np.dot(rot, x[i,j,:] - trans_vect)
+        x_rot = batch_dot(rot, x - trans_vect, out=out)
 
     return x_rot
 
-# rotation matrix function for an x-rotation
-RotX = lambda a: np.array([[1,         0,        0     ],
-                        [0,       np.cos(a),   -np.sin(a)  ],
-                        [0,       np.sin(a),   np.cos(a)  ]])
-# rotation matrix function for a y-rotation
-RotY = lambda a: np.array([[np.cos(a),    0,      np.sin(a)  ],
-                        [0,         1,        0     ],
-                        [-np.sin(a),   0,      np.cos(a)  ]])
-# rotation matrix function for a z-rotation
-RotZ = lambda a: np.array([[np.cos(a),  -np.sin(a),    0     ],
-                        [np.sin(a),   np.cos(a),    0     ],
-                        [0,         0,        1     ]])
+def _rot_matrices(a, rows):
+    """
+    build rotation matrices of shape a.shape + (3, 3) from the
+    (row, column, function) entries that depend on the angles a
+    """
+    a = np.asarray(a)
+    rot = np.zeros(a.shape + (3, 3), dtype=np.result_type(a, float))
+    for i, j, func in rows:
+        rot[..., i, j] = func(a)
+    return rot
+
+def RotX(a):
+    """
+    rotation matrix for an x-rotation, or an array of matrices
+    for an array of angles
+
+    \param    a       angles in radians             <c> float or numpy.array(...) </c>
+    \retval   rot     the rotation matrices         <c> numpy.array((..., 3, 3)) </c>
+    """
+    return _rot_matrices(a, [(0, 0, np.ones_like),
+                             (1, 1, np.cos), (1, 2, lambda a: -np.sin(a)),
+                             (2, 1, np.sin), (2, 2, np.cos)])
+
+def RotY(a):
+    """
+    rotation matrix for a y-rotation, or an array of matrices
+    for an array of angles
+
+    \param    a       angles in radians             <c> float or numpy.array(...) </c>
+    \retval   rot     the rotation matrices         <c> numpy.array((..., 3, 3)) </c>
+    """
+    return _rot_matrices(a, [(0, 0, np.cos), (0, 2, np.sin),
+                             (1, 1, np.ones_like),
+                             (2, 0, lambda a: -np.sin(a)), (2, 2, np.cos)])
+
+def RotZ(a):
+    """
+    rotation matrix for a z-rotation, or an array of matrices
+    for an array of angles
+
+    \param    a       angles in radians             <c> float or numpy.array(...) </c>
+    \retval   rot     the rotation matrices         <c> numpy.array((..., 3, 3)) </c>
+    """
+    return _rot_matrices(a, [(0, 0, np.cos), (0, 1, lambda a: -np.sin(a)),
+                             (1, 0, np.sin), (1, 1, np.cos),
+                             (2, 2, np.ones_like)])
+
+def RotXYZ(rot_x, rot_y, rot_z, degrees=True):
+    """
+    rotation matrices of the sections of a blade defined by its
+    rot_x, rot_y and rot_z distributions, R = Rx Ry Rz, i.e. the
+    z-rotation is applied first
+
+    \param    rot_x   x-rotations                   <c> numpy.array(n) </c>
+    \param    rot_y   y-rotations                   <c> numpy.array(n) </c>
+    \param    rot_z   z-rotations                   <c> numpy.array(n) </c>
+    \param    degrees if True the angles are in degrees, otherwise radians
+    \retval   rot     the rotation matrices         <c> numpy.array((n, 3, 3)) </c>
+    """
+    if degrees:
+        rot_x, rot_y, rot_z = [np.asarray(a) * np.pi / 180. for a in [rot_x, rot_y, rot_z]]
+    return np.einsum('...ij,...jk,...kl->...il', RotX(rot_x), RotY(rot_y), RotZ(rot_z))
 
 def RotMat(u, theta):
     """
@@ -212,38 +465,122 @@ def RotMat(u, theta):
                   [u[2]*u[0]*(1-cos(theta)) - u[1]*sin(theta), u[2]*u[1]*(1-cos(theta)) + u[0]*sin(theta), cos(theta) + u[2]**2*(1-cos(theta))]])
     return rot
 
-def dotXC(rot, x, center):
+def dotXC(rot, x, center, out=None):
     """
     Transpose and Multiply the x array by a rotational matrix around a center
+
+    \param    rot     the rotation matrix, or one per point or section    <c> numpy.array((..., 3, 3)) </c>
+    \param    x       the points, or a list of x, y and z arrays           <c> numpy.array((..., 3)) </c>
+    \param    center  the center of rotation, or one per point or section  <c> numpy.array((..., 3)) </c>
+    \param    out     optional output buffer for array input              <c> numpy.array((..., 3)) </c>
+    \retval   x_rot   the rotated points                                  <c> numpy.array((..., 3)) </c>
     """
-    from numpy import zeros,array,dot
     if isinstance(x,list):
-        x_tmp = array([x[0].flatten(), x[1].flatten(), x[2].flatten()]).T
-        x_rot_tmp = zeros(x_tmp.shape)
-        for i in range(x_tmp.shape[0]):
-            x_rot_tmp[i,:] = dot(rot, x_tmp[i,:] - center) + center
+        x_tmp = np.array([x[0].flatten(), x[1].flatten(), x[2].flatten()]).T
+        x_rot_tmp = batch_dot(rot, x_tmp - center) + center
 
         x_rot = []
         for iX in range(3):
             x_rot.append(x_rot_tmp[:,iX].reshape(x[0].shape))
     elif isinstance(x,np.ndarray):
-        x_rot = zeros(x.shape)
-        if len(x.shape)==1:
-            x_rot[:] = dot(rot, x - center) + center
-
-        if len(x.shape)==2:
-            for i in range(x.shape[0]):
-                x_rot[i,:] = dot(rot, x[i,:] - center) + center
-        elif len(x.shape)==3:
-            for i in range(x.shape[0]):
-                for j in range(x.shape[1]):
-                    x_rot[i,j,:] = dot(rot, x[i,j,:] - center) + center
+        x_rot = batch_dot(rot, x - center, out=out)
+        x_rot += center
     return x_rot
 
-def easy_distfunc(nn):
+def _solve_stretching(B):
+    """
+    solve sinh(delta)/delta = B for B > 1 or sin(delta)/delta = B
+    for B < 1, see Vinokur (1983)
+    """
+    if B > 1.:
+        f = lambda d: np.sinh(d) / d - B
+        upper = 1.
+        while f(upper) < 0.:
+            upper *= 2.
+        return brentq(f, 1.e-12, upper, xtol=1.e-14)
+    return brentq(lambda d: np.sin(d) / d - B, 1.e-12, np.pi - 1.e-12, xtol=1.e-14)
+
+def _two_sided(xi, n, ds0, ds1):
+
+    A = np.sqrt(ds1 / ds0)
+    B = 1. / (n * np.sqrt(ds0 * ds1))
+    if abs(B - 1.) < 1.e-6:
+        u = xi * (1. + 2. * (B - 1.) * (xi - 0.5) * (1. - xi))
+    else:
+        delta = _solve_stretching(B)
+        if B > 1.:
+            u = 0.5 * (1. + np.tanh(delta * (xi - 0.5)) / np.tanh(delta / 2.))
+        else:
+            u = 0.5 * (1. + np.tan(delta * (xi - 0.5)) / np.tan(delta / 2.))
+    return u / (A + (1. - A) * u)
+
+def _one_sided(xi, n, ds, stretch):
+
+    B = 1. / (n * ds)
+    if abs(B - 1.) < 1.e-6:
+        return xi.copy()
+    delta = _solve_stretching(B)
+    if B < 1.:
+        return 1. + np.tan(delta / 2. * (xi - 1.)) / np.tan(delta / 2.)
+    if stretch == 'sinh':
+        return np.sinh(delta * xi) / np.sinh(delta)
+    return 1. + np.tanh(delta / 2. * (xi - 1.)) / np.tanh(delta / 2.)
+
+def stretching(n, ds0=-1, ds1=-1, stretch='tanh'):
+    """
+    Distribution of n + 1 points on [0, 1] with the first and last cell
+    sizes ds0 and ds1, using the stretching functions of Vinokur (1983).
+
+    \param    n       the number of cells                              <c> int </c>
+    \param    ds0     size of the first cell, -1 if free               <c> float </c>
+    \param    ds1     size of the last cell, -1 if free                <c> float </c>
+    \param    stretch one-sided stretching function, tanh or sinh.
+                      Two-sided stretching always uses tanh.
+    \retval   s       the distribution                                 <c> numpy.array(n+1) </c>
+    """
+    xi = np.linspace(0., 1., n + 1)
+    if ds0 <= 0. and ds1 <= 0.:
+        return xi
+
+    # the end cell sizes of Vinokur's functions are only approximate,
+    # so correct the requested sizes by fixed point iteration
+    if ds0 > 0. and ds1 > 0.:
+        e0, e1 = ds0, ds1
+        for it in range(100):
+            s = _two_sided(xi, n, e0, e1)
+            r0 = ds0 / (s[1] - s[0])
+            r1 = ds1 / (s[-1] - s[-2])
+            if abs(r0 - 1.) < 1.e-10 and abs(r1 - 1.) < 1.e-10:
+                break
+            e0 *= r0
+            e1 *= r1
+    else:
+        # one-sided stretching clustering points at the specified end
+        ds = ds0 if ds0 > 0. else ds1
+        e = ds
+        for it in range(100):
+            s = _one_sided(xi, n, e, stretch)
+            r = ds / (s[1] - s[0])
+            if abs(r - 1.) < 1.e-10:
+                break
+            e *= r
+        if ds0 <= 0.:
+            s = 1. - s[::-1]
+    s[0] = 0.
+    s[-1] = 1.
+    return s
+
+# memoised distributions
+_distfunc_cache = OrderedDict()
+distfunc_cache_size = 64
+
+def easy_distfunc(nn, stretch='tanh'):
     """
     The function returns a distribution of point according to control points.
-    The function is calling the f2py original fortran file of Niels.
+
+    Between two control points the cells are distributed using the
+    stretching functions of Vinokur (1983) for the given end cell sizes.
+    Results for repeated control points are memoised.
 
     Parameters:
     -------------
@@ -253,6 +590,10 @@ def easy_distfunc(nn):
                       - the position of the control point
                       - the size of the cell
                       - the index of the cell
+    stretch : str
+        stretching function used for segments with one specified
+        cell size, tanh or sinh
+
     Returns
     --------
     dist: <array-like>
@@ -266,8 +607,20 @@ def easy_distfunc(nn):
     dist = easy_distfunc([ [2000,  -1, 1],
                            [38799, 50, 128] ])
     """
-    if LDISTFUNC:
-        nn = np.asarray(nn)
-        return np.asarray(distfunc(nn, nn[-1, -1]) + nn[0, 0], dtype=_float)
-    else:
-        return np.array([])
+    nn = np.asarray(nn, dtype=float)
+    key = (stretch, nn.tostring())
+    try:
+        dist = _distfunc_cache.pop(key)
+    except KeyError:
+        dist = np.zeros(int(nn[-1, 2]))
+        for i in range(nn.shape[0] - 1):
+            s0, ds0, n0 = nn[i]
+            s1, ds1, n1 = nn[i + 1]
+            L = s1 - s0
+            s = stretching(int(n1 - n0), ds0 / L if ds0 > 0. else -1,
+                                         ds1 / L if ds1 > 0. else -1, stretch)
+            dist[int(n0) - 1:int(n1)] = s0 + L * s
+    _distfunc_cache[key] = dist
+    while len(_distfunc_cache) > distfunc_cache_size:
+        _distfunc_cache.popitem(last=False)
+    return dist.copy()
@@ -37,49 +37,150 @@ class NaturalCubicSpline(object):
         l = (xk - xkm)/6.0
         d = (xkp - xkm)/3.0
         u = (xkp - xk)/6.0
-        # u[0] = 0.0  # non-existent entries
-        # l[-1] = 0.0
 
-        # solve for second derivatives
-        fpp = solve_banded((1, 1), np.matrix([u, d, l]), b)
+        # solve for second derivatives, row k of the system reads
+        # l[k]*fpp[k-1] + d[k]*fpp[k] + u[k]*fpp[k+1] = b[k],
+        # so the diagonals are shifted into solve_banded's layout
+        self._ab = np.zeros((3, d.shape[0]), dtype=np.result_type(xp, d))
+        self._ab[0, 1:] = u[:-1]
+        self._ab[1] = d
+        self._ab[2, :-1] = l[1:]
+        fpp = solve_banded((1, 1), self._ab, b)
         self.fpp = np.concatenate([[0.0], fpp, [0.0]])  # natural spline
         self.xp = xp
         self.yp = yp
+        self._dfpp = None
+
+    def _locate(self, x):
+        """
+        find the segment index of all points in x in one batch,
+        clipped to the end segments for extrapolation
+        """
+
+        j = np.searchsorted(self.xp.real, x.real, side='right') - 1
+        return np.minimum(np.maximum(j, 0), self.m - 2)
+
+    def _weights(self, x):
+        """
+        compute the segment indices and the cubic weights of y and fpp
+        at the end points of the segments containing x
+        """
+
+        j = self._locate(x)
+        x1 = self.xp[j]
+        x2 = self.xp[j+1]
+        h = x2 - x1
+
+        A = (x2 - x)/h
+        B = 1 - A
+        C = 1.0/6*(A**3 - A)*h**2
+        D = 1.0/6*(B**3 - B)*h**2
+        dAdx = -1.0/h
+        dBdx = -dAdx
+        dCdx = 1.0/6 * (3 * A**2 - 1) * dAdx * h**2
+        dDdx = 1.0/6 * (3 * B**2 - 1) * dBdx * h**2
+
+        return j, (A, B, C, D), (dAdx, dBdx, dCdx, dDdx)
+
+    def evaluate(self, x):
+        """
+        vectorized evaluation of the spline and its derivatives
+
+        parameters
+        ----------
+        x: array
+            points at which to evaluate the spline
+
+        returns
+        -------
+        y: array
+            spline values
+        dydx: array
+            first derivatives
+        d2ydx2: array
+            second derivatives
+        """
+
+        x = np.asarray(x)
+        j, (A, B, C, D), (dAdx, dBdx, dCdx, dDdx) = self._weights(x)
+        y1 = self.yp[j]
+        y2 = self.yp[j+1]
+        f1 = self.fpp[j]
+        f2 = self.fpp[j+1]
+
+        y = A * y1 + B * y2 + C * f1 + D * f2
+        dydx = dAdx * y1 + dBdx * y2 + dCdx * f1 + dDdx * f2
+        d2ydx2 = A * f1 + B * f2
+
+        return y, dydx, d2ydx2
+
+    def _fpp_jacobian(self):
+        """
+        derivatives of the second derivatives fpp w.r.t. yp, (m, m),
+        computed once and cached since they only depend on xp
+        """
+
+        if self._dfpp is None:
+            xp = self.xp
+            m = self.m
+            dfpp = np.zeros((m, m), dtype=self._ab.dtype)
+            if m > 2:
+                hm = xp[1:-1] - xp[:-2]
+                hp = xp[2:] - xp[1:-1]
+                k = np.arange(m - 2)
+                dbdyp = np.zeros((m - 2, m), dtype=self._ab.dtype)
+                dbdyp[k, k] = 1. / hm
+                dbdyp[k, k + 1] = -1. / hp - 1. / hm
+                dbdyp[k, k + 2] = 1. / hp
+                dfpp[1:-1, :] = solve_banded((1, 1), self._ab, dbdyp)
+            self._dfpp = dfpp
+
+        return self._dfpp
+
+    def jacobian(self, x, deriv=0):
+        """
+        Jacobian of the spline (or its derivatives) w.r.t. the
+        control point ordinates yp
+
+        parameters
+        ----------
+        x: array
+            points at which to evaluate the spline
+        deriv: int
+            order of the derivative (0, 1 or 2) to differentiate
+
+        returns
+        -------
+        J: array
+            (n, m) array with the derivatives w.r.t. yp
+        """
+
+        x, n = _checkIfFloat(x)
+        x = np.asarray(x)
+        j, (A, B, C, D), (dAdx, dBdx, dCdx, dDdx) = self._weights(x)
+        dfpp = self._fpp_jacobian()
+        i = np.arange(n)
+        J = np.zeros((n, self.m), dtype=np.result_type(dfpp, x))
+
+        if deriv == 0:
+            J[i, j] += A
+            J[i, j+1] += B
+            J += C[:, np.newaxis] * dfpp[j] + D[:, np.newaxis] * dfpp[j+1]
+        elif deriv == 1:
+            J[i, j] += dAdx
+            J[i, j+1] += dBdx
+            J += dCdx[:, np.newaxis] * dfpp[j] + dDdx[:, np.newaxis] * dfpp[j+1]
+        elif deriv == 2:
+            J += A[:, np.newaxis] * dfpp[j] + B[:, np.newaxis] * dfpp[j+1]
+        else:
+            raise ValueError('deriv must be 0, 1 or 2, got %s' % deriv)
+
+        return J
 
     def __call__(self, x, deriv=False):
 
         x, n = _checkIfFloat(x)
-        y = np.zeros(n, dtype=self.xp.dtype)
-        dydx = np.zeros(n, dtype=self.xp.dtype)
-        dydxp = np.zeros((n, self.m), dtype=self.xp.dtype)
-        dydyp = np.zeros((n, self.m), dtype=self.xp.dtype)
-
-        # find location in vector
-        for i in range(n):
-            if x[i].real < self.xp[0].real:
-                j = 0
-            elif x[i].real > self.xp[-1].real:
-                j = self.m-2
-            else:
-                for j in range(self.m-1):
-                    if self.xp[j+1].real > x[i].real:
-                        break
-            x1 = self.xp[j]
-            y1 = self.yp[j]
-            x2 = self.xp[j+1]
-            y2 = self.yp[j+1]
-
-            A = (x2 - x[i])/(x2 - x1)
-            B = 1 - A
-            C = 1.0/6*(A**3 - A)*(x2 - x1)**2
-            D = 1.0/6*(B**3 - B)*(x2 - x1)**2
-
-            y[i] = A * y1 + B * y2 + C * self.fpp[j] + D * self.fpp[j+1]
-            dAdx = -1.0/(x2 - x1)
-            dBdx = -dAdx
-            dCdx = 1.0/6 * (3 * A**2 - 1) * dAdx * (x2 - x1)**2
-            dDdx = 1.0/6 * (3 * B**2 - 1) * dBdx * (x2 - x1)**2
-            dydx[i] = dAdx * y1 + dBdx * y2 + dCdx * self.fpp[j] + dDdx * self.fpp[j+1]
+        y, dydx, d2ydx2 = self.evaluate(x)
 
         if n == 1:
             y = y[0]
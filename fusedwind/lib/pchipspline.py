@@ -0,0 +1,279 @@
+
+import numpy as np
+from collections import OrderedDict
+
+
+def _edge_case(h0, h1, m0, m1):
+    """
+    one-sided three-point estimate of the end slopes and
+    their derivatives w.r.t. m0 and m1
+    """
+
+    d = ((2*h0 + h1)*m0 - h0*m1) / (h0 + h1)
+    dd0 = (2*h0 + h1) / (h0 + h1) * np.ones_like(d)
+    dd1 = -h0 / (h0 + h1) * np.ones_like(d)
+
+    # try to preserve shape
+    mask = np.sign(d.real) != np.sign(m0.real)
+    mask2 = (np.sign(m0.real) != np.sign(m1.real)) & (np.abs(d.real) > 3.*np.abs(m0.real))
+    mmm = (~mask) & mask2
+
+    d[mask] = 0.
+    dd0[mask] = 0.
+    dd1[mask] = 0.
+    d[mmm] = 3.*m0[mmm]
+    dd0[mmm] = 3.
+    dd1[mmm] = 0.
+
+    return d, dd0, dd1
+
+
+def pchip_slopes(xp, yp, jacobian=False):
+    """
+    slopes at xp of the piecewise cubic Hermite interpolating polynomial,
+    identical to those computed by scipy.interpolate.pchip
+
+    parameters
+    ----------
+    xp: array
+        (m,) array with ascending x-coordinates
+    yp: array
+        (m,) or (m, k) array, all k columns are handled in one batch
+    jacobian: bool
+        also return the (m, m) derivatives of the slopes w.r.t. yp,
+        only for 1-D yp
+
+    returns
+    -------
+    dp: array
+        slopes with the shape of yp
+    ddp: array
+        (m, m) derivatives of the slopes w.r.t. yp, if jacobian=True
+    """
+
+    y_shape = yp.shape
+    m = xp.shape[0]
+    if yp.ndim == 1:
+        yp = yp[:, np.newaxis]
+    h = (xp[1:] - xp[:-1]).reshape((m - 1,) + (1,) * (yp.ndim - 1))
+    mk = (yp[1:] - yp[:-1]) / h
+
+    # derivatives of the secant slopes w.r.t. yp
+    if jacobian:
+        dmk = np.zeros((m - 1, m), dtype=xp.dtype)
+        k = np.arange(m - 1)
+        dmk[k, k] = -1. / h[:, 0]
+        dmk[k, k + 1] = 1. / h[:, 0]
+
+    dp = np.zeros(yp.shape, dtype=np.result_type(xp, yp))
+    if m == 2:
+        # only two points, use linear interpolation
+        dp[0] = mk[0]
+        dp[1] = mk[0]
+        if jacobian:
+            return dp.reshape(y_shape), np.array([dmk[0], dmk[0]])
+        return dp.reshape(y_shape)
+
+    smk = np.sign(mk.real)
+    condition = (smk[1:] != smk[:-1]) | (mk[1:].real == 0) | (mk[:-1].real == 0)
+
+    w1 = 2*h[1:] + h[:-1]
+    w2 = h[1:] + 2*h[:-1]
+
+    # values where division by zero occurs will be excluded
+    # by 'condition' afterwards
+    with np.errstate(divide='ignore', invalid='ignore'):
+        whmean = (w1/mk[:-1] + w2/mk[1:]) / (w1 + w2)
+        dint = np.where(condition, 0., 1. / whmean)
+    dp[1:-1] = dint
+
+    d0, dd00, dd01 = _edge_case(h[0], h[1], mk[0], mk[1])
+    d1, dd10, dd11 = _edge_case(h[-1], h[-2], mk[-1], mk[-2])
+    dp[0] = d0
+    dp[-1] = d1
+
+    if not jacobian:
+        return dp.reshape(y_shape)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ddm0 = np.where(condition, 0., dint**2 * w1 / (mk[:-1]**2 * (w1 + w2)))[:, 0]
+        ddm1 = np.where(condition, 0., dint**2 * w2 / (mk[1:]**2 * (w1 + w2)))[:, 0]
+    ddp = np.zeros((m, m), dtype=dp.dtype)
+    ddp[1:-1] = ddm0[:, np.newaxis] * dmk[:-1] + ddm1[:, np.newaxis] * dmk[1:]
+    ddp[0] = dd00[0] * dmk[0] + dd01[0] * dmk[1]
+    ddp[-1] = dd10[0] * dmk[-1] + dd11[0] * dmk[-2]
+
+    return dp.reshape(y_shape), ddp
+
+
+class HermiteWeights(object):
+    """
+    cubic Hermite weights for resampling data defined at xp onto x.
+
+    The weights only depend on xp and x, so they can be computed once
+    and applied to any number of data and slope arrays.
+    With deriv = 1 or 2 the weights evaluate the first or second
+    derivative of the interpolant.
+    """
+
+    def __init__(self, xp, x, deriv=0):
+
+        self.m = xp.shape[0]
+        self.n = x.shape[0]
+
+        # find location of all points in one batch
+        j = np.searchsorted(xp.real, x.real, side='right') - 1
+        self.j = np.minimum(np.maximum(j, 0), self.m - 2)
+        h = xp[self.j + 1] - xp[self.j]
+        t = (x - xp[self.j]) / h
+
+        if deriv == 0:
+            self.w00 = 2*t**3 - 3*t**2 + 1
+            self.w10 = (t**3 - 2*t**2 + t) * h
+            self.w01 = -2*t**3 + 3*t**2
+            self.w11 = (t**3 - t**2) * h
+        elif deriv == 1:
+            self.w00 = (6*t**2 - 6*t) / h
+            self.w10 = 3*t**2 - 4*t + 1
+            self.w01 = (-6*t**2 + 6*t) / h
+            self.w11 = 3*t**2 - 2*t
+        elif deriv == 2:
+            self.w00 = (12*t - 6) / h**2
+            self.w10 = (6*t - 4) / h
+            self.w01 = (-12*t + 6) / h**2
+            self.w11 = (6*t - 2) / h
+        else:
+            raise ValueError('deriv must be 0, 1 or 2, got %s' % deriv)
+
+    def __call__(self, yp, dp):
+        """
+        parameters
+        ----------
+        yp: array
+            (m,) or (m, k) data at xp
+        dp: array
+            slopes at xp with the shape of yp
+
+        returns
+        -------
+        y: array
+            (n,) or (n, k) data resampled onto x
+        """
+
+        shape = (self.n,) + (1,) * (yp.ndim - 1)
+        j = self.j
+        return self.w00.reshape(shape) * yp[j] + self.w10.reshape(shape) * dp[j] + \
+               self.w01.reshape(shape) * yp[j+1] + self.w11.reshape(shape) * dp[j+1]
+
+    def matrices(self):
+        """
+        returns
+        -------
+        Wy: array
+            (n, m) weights of the data
+        Wd: array
+            (n, m) weights of the slopes
+        """
+
+        i = np.arange(self.n)
+        Wy = np.zeros((self.n, self.m), dtype=self.w00.dtype)
+        Wd = np.zeros((self.n, self.m), dtype=self.w00.dtype)
+        Wy[i, self.j] += self.w00
+        Wy[i, self.j + 1] += self.w01
+        Wd[i, self.j] += self.w10
+        Wd[i, self.j + 1] += self.w11
+        return Wy, Wd
+
+
+class PchipSpline(object):
+    """
+    native implementation of scipy.interpolate.pchip that also
+    provides the exact Jacobian w.r.t. the data
+    """
+
+    def __init__(self, xp, yp):
+
+        if np.any(np.diff(xp.real) <= 0):
+            raise TypeError('xp must be in strictly ascending order')
+
+        self.xp = xp
+        self.yp = yp
+        self.dp = pchip_slopes(xp, yp)
+
+    def __call__(self, x):
+
+        return HermiteWeights(self.xp, np.asarray(x))(self.yp, self.dp)
+
+    def jacobian(self, x):
+        """
+        parameters
+        ----------
+        x: array
+            points at which to evaluate the spline
+
+        returns
+        -------
+        J: array
+            (n, m) array with the derivatives w.r.t. yp
+        """
+
+        dp, ddp = pchip_slopes(self.xp, self.yp, jacobian=True)
+        Wy, Wd = HermiteWeights(self.xp, np.asarray(x)).matrices()
+        return Wy + np.dot(Wd, ddp)
+
+
+# weights for recently used (xp, x) pairs
+_weights_cache = OrderedDict()
+weights_cache_size = 32
+
+
+def cached_hermite_weights(xp, x):
+    """
+    returns HermiteWeights(xp, x), reusing the weights of
+    previous calls with identical xp and x.
+
+    The cache holds the `weights_cache_size` most recently used pairs.
+    """
+
+    key = (xp.dtype.str, xp.tostring(), x.dtype.str, x.tostring())
+    try:
+        w = _weights_cache.pop(key)
+    except KeyError:
+        w = HermiteWeights(xp, x)
+        while len(_weights_cache) >= weights_cache_size:
+            _weights_cache.popitem(last=False)
+    _weights_cache[key] = w
+    return w
+
+
+def clear_weights_cache():
+    """
+    empty the cache of Hermite weights
+    """
+
+    _weights_cache.clear()
+
+
+def pchip_interpolate(xp, yp, x):
+    """
+    batched equivalent of scipy.interpolate.pchip(xp, yp, axis=0)(x)
+
+    parameters
+    ----------
+    xp: array
+        (m,) array with ascending x-coordinates
+    yp: array
+        (m,) or (m, k) array, all k columns are interpolated in one batch
+    x: array
+        (n,) points at which to interpolate
+
+    returns
+    -------
+    y: array
+        (n,) or (n, k) interpolated data
+    """
+
+    xp = np.asarray(xp)
+    x = np.asarray(x)
+    yp = np.asarray(yp)
+    return cached_hermite_weights(xp, x)(yp, pchip_slopes(xp, yp))
@@ -0,0 +1,193 @@
+
+import unittest
+import numpy as np
+from scipy.interpolate import griddata
+
+from fusedwind.lib.geom_tools import calculate_length, arc_length, \
+                                     normalized_arc_length, interp_arc_length, \
+                                     curvature, curvature_jacobian, batch_curvature, \
+                                     graph_curvature, \
+                                     dotX, dotXC, RotMat, RotX, RotY, RotZ, RotXYZ, \
+                                     SurfaceProjector, project_points, \
+                                     stretching, easy_distfunc
+
+
+def configure():
+
+    t = np.linspace(0, 1, 21)
+    sec = np.array([np.cos(t * np.pi), np.sin(t * np.pi), t**2]).T
+    # (ni, nsec, 3) surface with scaled sections
+    surf = np.array([sec * [c, c, 1.] for c in [1., 0.5, 2.]]).swapaxes(0, 1)
+    return sec, surf
+
+class TestGeomTools(unittest.TestCase):
+
+    def test_calculate_length(self):
+
+        sec, surf = configure()
+        s = calculate_length(sec)
+        seglen = [np.sqrt(((sec[i] - sec[i-1])**2).sum()) for i in range(1, 21)]
+
+        self.assertEqual(np.testing.assert_array_almost_equal(s[1:], np.cumsum(seglen), decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(calculate_length(sec[:, :2])[-1],
+                                                              20 * 2 * np.sin(np.pi / 40.), decimal=12), None)
+
+    def test_arc_length_batch(self):
+
+        sec, surf = configure()
+        s = arc_length(surf, axis=0)
+        sn, smax = normalized_arc_length(surf, axis=0)
+
+        self.assertEqual(s.shape, (21, 3))
+        self.assertEqual(sn.shape, (21, 3))
+        for i in range(3):
+            self.assertEqual(np.testing.assert_array_almost_equal(s[:, i], calculate_length(surf[:, i]), decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(sn[:, i], s[:, i] / smax[i], decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(arc_length(surf.swapaxes(0, 1)), s.T, decimal=12), None)
+
+    def test_interp_arc_length(self):
+
+        sec, surf = configure()
+        x = surf.swapaxes(0, 1)
+        s, smax = normalized_arc_length(x)
+        s_new = np.array([[0., 0.3, 1.], [0.5, 0.25, 0.75], [1., 0.6, 0.]])
+        p_new = interp_arc_length(x, s, s_new)
+
+        self.assertEqual(p_new.shape, (3, 3, 3))
+        self.assertEqual(np.testing.assert_array_almost_equal(interp_arc_length(x, s, s), x, decimal=12), None)
+        for i in range(3):
+            for k in range(3):
+                pi = [np.interp(s_new[i], s[i], x[i, :, k])]
+                self.assertEqual(np.testing.assert_array_almost_equal(p_new[i, :, k], pi[0], decimal=12), None)
+
+    def test_curvature_jacobian(self):
+
+        sec, surf = configure()
+        points = sec[:, :2] * [1., 0.7]
+        dcurv = curvature_jacobian(points)
+        for i in range(points.shape[0]):
+            for j in range(2):
+                pc = points.astype(complex)
+                pc[i, j] += 1.e-20j
+                self.assertEqual(np.testing.assert_array_almost_equal(dcurv[:, i, j], curvature(pc).imag / 1.e-20,
+                                                                      decimal=10), None)
+
+    def test_batch_curvature(self):
+
+        sec, surf = configure()
+        stack = np.array([sec, 2 * sec, sec * [1., 0.5, 0.2]])
+        curv = batch_curvature(stack)
+        dcurv = curvature_jacobian(stack[:, :, :2])
+        for i in range(3):
+            self.assertEqual(np.testing.assert_array_almost_equal(curv[i], curvature(stack[i]), decimal=14), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(dcurv[i], curvature_jacobian(stack[i, :, :2]), decimal=14), None)
+        self.assertRaises(ValueError, batch_curvature, np.zeros((3, 10, 4)))
+        self.assertEqual(np.testing.assert_array_almost_equal(batch_curvature(sec[:2]), np.zeros(2), decimal=14), None)
+
+        # exact curvature of a circle of radius 2 and of the graph of y = x**2
+        t = np.linspace(0, np.pi, 11)
+        circ = 2 * np.array([np.cos(t), np.sin(t)]).T
+        d1 = 2 * np.array([-np.sin(t), np.cos(t)]).T
+        self.assertEqual(np.testing.assert_array_almost_equal(batch_curvature(circ, d1, -circ), 0.5 * np.ones(11), decimal=14), None)
+        x = np.linspace(-1, 1, 11)
+        self.assertEqual(np.testing.assert_array_almost_equal(graph_curvature(2 * x, 2 * np.ones(11))[0],
+                                                              2. / (1. + 4 * x**2)**1.5, decimal=14), None)
+
+    def test_dotX(self):
+
+        sec, surf = configure()
+        rot = RotMat(np.array([1., 2., 2.]) / 3., 0.3)
+        trans = np.array([0.1, -0.2, 0.3])
+        x_rot = np.array([[np.dot(rot, surf[i, j] - trans) for j in range(3)] for i in range(21)])
+
+        self.assertEqual(np.testing.assert_array_almost_equal(dotX(rot, surf, trans), x_rot, decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(dotX(rot, surf[0, 0], trans), x_rot[0, 0], decimal=12), None)
+        x_list = dotX(rot, [surf[:, :, 0], surf[:, :, 1], surf[:, :, 2]], trans)
+        for k in range(3):
+            self.assertEqual(np.testing.assert_array_almost_equal(x_list[k], x_rot[:, :, k], decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(dotXC(rot, surf, trans), x_rot + trans, decimal=12), None)
+
+    def test_dotX_sections(self):
+
+        sec, surf = configure()
+        rot = RotXYZ([0., 10., 20.], [5., 0., -5.], [-30., 0., 45.])
+        out = np.zeros(surf.shape)
+        x_rot = dotX(rot, surf, out=out)
+
+        self.assertTrue(x_rot is out)
+        for j in range(3):
+            self.assertEqual(np.testing.assert_array_almost_equal(out[:, j], dotX(rot[j], surf[:, j]), decimal=12), None)
+
+    def test_rot(self):
+
+        a = np.array([0.1, -0.4, 2.])
+        for i, Rot in enumerate([RotX, RotY, RotZ]):
+            u = np.zeros(3)
+            u[i] = 1.
+            rot = Rot(a)
+            self.assertEqual(rot.shape, (3, 3, 3))
+            for j in range(3):
+                self.assertEqual(np.testing.assert_array_almost_equal(rot[j], RotMat(u, a[j]), decimal=12), None)
+                self.assertEqual(np.testing.assert_array_almost_equal(Rot(a[j]), rot[j], decimal=12), None)
+
+        rot = RotXYZ(a, 2 * a, 3 * a, degrees=False)
+        self.assertEqual(np.testing.assert_array_almost_equal(rot[1], np.dot(RotX(a[1]), np.dot(RotY(2 * a[1]), RotZ(3 * a[1]))), decimal=12), None)
+
+    def test_project_points(self):
+
+        x, y = np.meshgrid(np.linspace(0, 1, 11), np.linspace(0, 2, 21))
+        surf = np.array([x, y, 0.1 * np.sin(3 * x) + 0.2 * y**2]).T
+        points = np.array([[0.25, 0.5, 1.], [0.8, 1.3, -1.], [0.5, 1.9, 0.], [1.5, 1., 0.]])
+        N_vect = np.array([0., 0., 1.])
+        z = griddata((x.flatten(), y.flatten()), surf[:, :, 2].T.flatten(), points[:, :2])
+
+        p = SurfaceProjector(surf, N_vect)
+        tri = p._tri
+        self.assertEqual(np.testing.assert_array_almost_equal(p(points)[:, 2], z, decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(project_points(points, surf, N_vect)[:, 2], z, decimal=12), None)
+        self.assertTrue(np.isnan(z[-1]))
+
+        # unchanged surfaces reuse the triangulation
+        p.set_surface(surf.copy())
+        self.assertTrue(p._tri is tri)
+        p.set_surface(surf * [1, 1, 2])
+        self.assertFalse(p._tri is tri)
+        self.assertEqual(np.testing.assert_array_almost_equal(p(points[:3])[:, 2], 2 * z[:3], decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p(points, nearest=True)[-1, 2],
+                                                              2 * surf[-1, 10, 2], decimal=12), None)
+
+    def test_stretching(self):
+
+        for ds0, ds1 in [(0.01, 0.05), (0.001, 0.001), (0.2, 0.3), (0.02, -1), (-1, 0.002)]:
+            for stretch in ['tanh', 'sinh']:
+                s = stretching(20, ds0, ds1, stretch)
+                ds = np.diff(s)
+                self.assertEqual(s.shape[0], 21)
+                self.assertEqual(np.testing.assert_array_almost_equal(s[[0, -1]], [0., 1.], decimal=14), None)
+                self.assertTrue(np.all(ds > 0.))
+                if ds0 > 0.:
+                    self.assertAlmostEqual(ds[0], ds0, places=8)
+                if ds1 > 0.:
+                    self.assertAlmostEqual(ds[-1], ds1, places=8)
+
+        self.assertEqual(np.testing.assert_array_almost_equal(stretching(10), np.linspace(0, 1, 11), decimal=14), None)
+
+    def test_easy_distfunc(self):
+
+        nn = np.array([[0.1, 0.01, 1], [0.3, 0.05, 20], [1., 0.005, 60]])
+        dist = easy_distfunc(nn)
+        ds = np.diff(dist)
+        self.assertEqual(dist.shape[0], 60)
+        self.assertEqual(np.testing.assert_array_almost_equal(dist[[0, 19, -1]], nn[:, 0], decimal=14), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(ds[[0, 18, 19, -1]], [0.01, 0.05, 0.05, 0.005], decimal=8), None)
+        self.assertTrue(np.all(ds > 0.))
+
+        # repeated specs return copies of the memoised distribution
+        dist[:] = 0.
+        self.assertEqual(np.testing.assert_array_almost_equal(easy_distfunc(nn), easy_distfunc(nn.tolist()), decimal=14), None)
+        self.assertEqual(easy_distfunc(nn)[-1], 1.)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -0,0 +1,55 @@
+
+import unittest
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+from fusedwind.lib.naturalcubicspline import NaturalCubicSpline
+
+
+def configure():
+
+    xp = np.array([0., 0.1, 0.25, 0.4, 0.6, 0.75, 0.9, 1.])
+    yp = np.sin(xp * np.pi) + xp**2
+    return xp, yp
+
+class TestNaturalCubicSpline(unittest.TestCase):
+
+    def test_interpolates(self):
+
+        xp, yp = configure()
+        spl = NaturalCubicSpline(xp, yp)
+        y, dydx, d2ydx2 = spl.evaluate(xp)
+
+        self.assertEqual(np.testing.assert_array_almost_equal(y, yp, decimal=12), None)
+        self.assertAlmostEqual(d2ydx2[0], 0., places=12)
+        self.assertAlmostEqual(d2ydx2[-1], 0., places=12)
+        self.assertAlmostEqual(spl(0.25), yp[2], places=12)
+
+    def test_scipy(self):
+
+        xp, yp = configure()
+        x = np.linspace(-0.1, 1.1, 31)
+        spl = NaturalCubicSpline(xp, yp)
+        cs = CubicSpline(xp, yp, bc_type='natural')
+        for deriv in range(3):
+            self.assertEqual(np.testing.assert_array_almost_equal(spl.evaluate(x)[deriv], cs(x, deriv), decimal=12), None)
+
+    def test_jacobian(self):
+
+        xp, yp = configure()
+        x = np.linspace(-0.1, 1.1, 31)
+        spl = NaturalCubicSpline(xp, yp)
+        for deriv in range(3):
+            J = spl.jacobian(x, deriv=deriv)
+            Jcs = np.zeros(J.shape)
+            for k in range(xp.shape[0]):
+                ypc = np.array(yp, dtype=np.complex128)
+                ypc[k] += 1.e-20j
+                Jcs[:, k] = NaturalCubicSpline(xp, ypc).evaluate(x)[deriv].imag / 1.e-20
+
+            self.assertEqual(np.testing.assert_array_almost_equal(J, Jcs, decimal=8), None)
+
+
+if __name__ == '__main__':
+
+    unittest.main()
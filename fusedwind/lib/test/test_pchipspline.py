@@ -0,0 +1,62 @@
+
+import unittest
+import numpy as np
+from scipy.interpolate import pchip
+
+from fusedwind.lib import pchipspline
+from fusedwind.lib.pchipspline import PchipSpline, pchip_interpolate, \
+                                      cached_hermite_weights, clear_weights_cache
+
+
+def configure():
+
+    xp = np.array([0., 0.1, 0.25, 0.4, 0.6, 0.75, 0.9, 1.])
+    yp = np.array([np.sin(xp * np.pi) + xp**2,
+                   np.cos(xp * 3.) - xp,
+                   np.where(xp < 0.5, 0., xp)]).T
+    return xp, yp
+
+class TestPchipSpline(unittest.TestCase):
+
+    def test_scipy(self):
+
+        xp, yp = configure()
+        x = np.linspace(-0.1, 1.1, 31)
+        y = pchip_interpolate(xp, yp, x)
+
+        self.assertEqual(y.shape, (31, 3))
+        for i in range(3):
+            self.assertEqual(np.testing.assert_array_almost_equal(y[:, i], pchip(xp, yp[:, i])(x), decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(PchipSpline(xp, yp[:, i])(x), y[:, i], decimal=12), None)
+
+    def test_jacobian(self):
+
+        xp, yp = configure()
+        x = np.linspace(0., 1., 15)
+        yp = yp[:, 0]
+        J = PchipSpline(xp, yp).jacobian(x)
+        for i in range(xp.shape[0]):
+            ypc = yp.astype(complex)
+            ypc[i] += 1.e-20j
+            dy = PchipSpline(xp, ypc)(x).imag / 1.e-20
+            self.assertEqual(np.testing.assert_array_almost_equal(J[:, i], dy, decimal=12), None)
+
+    def test_cache(self):
+
+        xp, yp = configure()
+        x = np.linspace(0., 1., 15)
+        clear_weights_cache()
+        w = cached_hermite_weights(xp, x)
+
+        self.assertTrue(cached_hermite_weights(xp.copy(), x.copy()) is w)
+        self.assertFalse(cached_hermite_weights(xp, x[:-1]) is w)
+        for i in range(pchipspline.weights_cache_size):
+            cached_hermite_weights(xp, x + i + 1.)
+        self.assertEqual(len(pchipspline._weights_cache), pchipspline.weights_cache_size)
+        self.assertFalse(cached_hermite_weights(xp, x) is w)
+        clear_weights_cache()
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -1,13 +1,25 @@
 
+import os
+import json
+import struct
+import hashlib
 import numpy as np
+from collections import OrderedDict
 from scipy.interpolate import pchip, Akima1DInterpolator
 from scipy.linalg import norm
+from scipy.special import comb
+from scipy.sparse import diags, csr_matrix
 
 from openmdao.api import Component, Group, IndepVarComp
 from openmdao.util.options import OptionsDictionary
 
-from fusedwind.lib.geom_tools import calculate_length, curvature
+from fusedwind.lib.geom_tools import calculate_length, batch_curvature, curvature_jacobian, \
+                                     graph_curvature
 from fusedwind.lib.naturalcubicspline import NaturalCubicSpline
+from fusedwind.lib.pchipspline import PchipSpline, HermiteWeights, pchip_slopes, \
+                                      pchip_interpolate
+from fusedwind.turbine.loftedblade import LoftedBladeSurface as NativeLoftedBladeSurface, \
+                                        LoftingPool
 
 try:
     from PGL.main.planform import redistribute_planform
@@ -26,12 +38,81 @@ class SplineBase(object):
     if the spline requires it, implement a fitting procedure in __init__
 
     place the main call to the spline in __call__
+
+    splines that are linear in the control point ordinates
+    set `linear = True` and implement `basis`
     """
 
+    linear = False
+
     def initialize(self, Cx, xp, yp):
 
         pass
 
+    def basis(self, x, Cx, deriv=0):
+        """
+        params:
+        ----------
+        x: array
+            array with new x-distribution
+        Cx: array
+            array with x-coordinates of spline control points
+        deriv: int
+            order of the derivative w.r.t. x (0, 1 or 2)
+
+        returns
+        ---------
+        B: array
+            (len(x), len(Cx)) array mapping the control point
+            ordinates onto x
+        """
+
+        raise NotImplementedError('%s is not linear in its control points' % self.__class__.__name__)
+
+    def jacobian(self, x, Cx, C):
+        """
+        params:
+        ----------
+        x: array
+            array with new x-distribution
+        Cx: array
+            array with x-coordinates of spline control points
+        C: array
+            array with y-coordinates of spline control points
+
+        returns
+        ---------
+        J: array
+            (len(x), len(Cx)) array with the derivatives of the
+            resampled points w.r.t. C
+        """
+
+        return self.basis(x, Cx)
+
+    def derivative(self, x, Cx, C, deriv=1):
+        """
+        params:
+        ----------
+        x: array
+            array with new x-distribution
+        Cx: array
+            array with x-coordinates of spline control points
+        C: array
+            array with y-coordinates of spline control points
+        deriv: int
+            order of the derivative w.r.t. x (1 or 2)
+
+        returns
+        ---------
+        dy: array
+            derivative of the spline at x
+        J: array
+            (len(x), len(Cx)) array with the derivatives of dy w.r.t. C
+        """
+
+        B = self.basis(x, Cx, deriv)
+        return np.dot(B, C), B
+
     def normdist(self, xp):
         """normalize x distribution"""
 
@@ -98,9 +179,41 @@ class pchipSpline(SplineBase):
         spl = pchip(Cx, C)
         return spl(x)
 
+    def jacobian(self, x, Cx, C):
+        """
+        params:
+        ----------
+        x: array
+            array with new x-distribution
+        Cx: array
+            array with x-coordinates of spline control points
+        C: array
+            array with y-coordinates of spline control points
+
+        returns
+        ---------
+        J: array
+            (len(x), len(Cx)) array with the derivatives of the
+            resampled points w.r.t. C
+        """
+
+        return PchipSpline(Cx, C).jacobian(x)
+
+    def derivative(self, x, Cx, C, deriv=1):
+
+        dp, ddp = pchip_slopes(Cx, C, jacobian=True)
+        W = HermiteWeights(Cx, x, deriv)
+        Wy, Wd = W.matrices()
+        return W(C, dp), Wy + np.dot(Wd, ddp)
+
 
 class BezierSpline(SplineBase):
 
+    linear = True
+
+    # number of points on the Bezier curve, as in PGL's BezierCurve
+    ni = 100
+
     def initialize(self, x, xp, yp):
         """
         params:
@@ -142,6 +255,34 @@ class BezierSpline(SplineBase):
         spl = NaturalCubicSpline(self.B.points[:, 0], self.B.points[:, 1])
         return spl(x)
 
+    def basis(self, x, Cx, deriv=0):
+        """
+        params:
+        ----------
+        x: array
+            array with new x-distribution
+        Cx: array
+            array with x-coordinates of spline control points
+        deriv: int
+            order of the derivative w.r.t. x (0, 1 or 2)
+
+        returns
+        ---------
+        B: array
+            (len(x), len(Cx)) array mapping the control point
+            ordinates onto x
+
+        The Bezier curve is evaluated natively with Bernstein polynomials
+        and resampled onto x with a natural cubic spline,
+        which for fixed Cx is a linear map of the ordinates.
+        """
+
+        n = Cx.shape[0] - 1
+        t = np.linspace(0., 1., self.ni)
+        bern = np.array([comb(n, m) * t**m * (1. - t)**(n - m) for m in range(n + 1)]).T
+        spl = NaturalCubicSpline(np.dot(bern, Cx), np.zeros(self.ni))
+        return np.dot(spl.jacobian(x, deriv=deriv), bern)
+
 
 spline_dict = {'pchip': pchipSpline,
                'bezier': BezierSpline}
@@ -236,13 +377,207 @@ def write_blade_planform(pf, filename):
     fid.write(header_full)
     np.savetxt(fid, data)
 
+# planform history format:
+# magic, header length as uint64, JSON header, followed by chunks of
+# chunk_size iterations, each holding the iteration numbers as int64
+# and one (chunk_size, size) little-endian float64 block per column,
+# all aligned to PF_HIST_ALIGN bytes. Unused slots have iteration -1.
+PF_HIST_MAGIC = b'FWPFH001'
+PF_HIST_EXT = '.pfh'
+PF_HIST_ALIGN = 64
+
+PF_HIST_NAMES = ['x', 'y', 'z', 'rot_x', 'rot_y', 'rot_z',
+                 'chord', 'rthick', 'p_le']
+
+
+def _pf_hist_align(offset):
+    """
+    returns offset rounded up to the next multiple of PF_HIST_ALIGN
+    """
+
+    return -(-offset // PF_HIST_ALIGN) * PF_HIST_ALIGN
+
+
+class PlanformHistory(object):
+    """
+    appendable single-file history of blade planforms
+
+    The planforms are stored column-wise in chunks of `chunk_size`
+    iterations, so that a single iteration or a single column
+    across all iterations is read through a memory map
+    without reading the rest of the history.
+
+    parameters
+    ----------
+    filename: str
+        name of the file, the extension `.pfh` is added if missing
+    size: int
+        number of points of the planforms, required to create a new file,
+        if None an existing file is opened for appending and reading
+    names: list
+        names of the columns, defaults to the planform file columns
+    chunk_size: int
+        number of iterations per chunk
+    """
+
+    def __init__(self, filename, size=None, names=None, chunk_size=64):
+
+        if not filename.endswith(PF_HIST_EXT):
+            filename += PF_HIST_EXT
+        self.filename = filename
+
+        if size is None:
+            with open(filename, 'rb') as fid:
+                magic = fid.read(len(PF_HIST_MAGIC))
+                if magic != PF_HIST_MAGIC:
+                    raise RuntimeError('%s is not a planform history file' % filename)
+                nh = struct.unpack('<Q', fid.read(8))[0]
+                header = json.loads(fid.read(nh).decode('utf-8'))
+            self.names = [str(name) for name in header['names']]
+            self.size = header['size']
+            self.chunk_size = header['chunk_size']
+            self._start = _pf_hist_align(len(PF_HIST_MAGIC) + 8 + nh)
+        else:
+            self.names = list(PF_HIST_NAMES if names is None else names)
+            self.size = size
+            self.chunk_size = chunk_size
+            header = {'names': self.names, 'size': size, 'chunk_size': chunk_size}
+            hdata = json.dumps(header).encode('utf-8')
+            self._start = _pf_hist_align(len(PF_HIST_MAGIC) + 8 + len(hdata))
+            with open(filename, 'wb') as fid:
+                fid.write(PF_HIST_MAGIC)
+                fid.write(struct.pack('<Q', len(hdata)))
+                fid.write(hdata)
+                fid.write(b'\0' * (self._start - fid.tell()))
+
+        # layout of a chunk
+        n = self.chunk_size
+        offsets = [0]
+        offset = _pf_hist_align(8 * n)
+        for name in self.names:
+            offsets.append(offset)
+            offset = _pf_hist_align(offset + 8 * n * self.size)
+        self.dtype = np.dtype({'names': ['iteration'] + self.names,
+                               'formats': [('<i8', (n,))] + [('<f8', (n, self.size))] * len(self.names),
+                               'offsets': offsets,
+                               'itemsize': offset})
+
+        self._records = None
+        self._nchunks = (os.path.getsize(filename) - self._start) // self.dtype.itemsize
+        self._count = int(np.sum(self._chunk_iterations() >= 0))
+
+    def _chunk_iterations(self):
+        """
+        (nchunks, chunk_size) iteration numbers, -1 for unused slots
+        """
+
+        return self._map()['iteration']
+
+    def _map(self):
+
+        if self._records is None or self._records.shape[0] != self._nchunks:
+            if self._nchunks == 0:
+                self._records = np.zeros(0, dtype=self.dtype)
+            else:
+                self._records = np.memmap(self.filename, dtype=self.dtype, mode='r',
+                                          offset=self._start, shape=(self._nchunks,))
+        return self._records
+
+    def __len__(self):
+
+        return self._count
+
+    def append(self, iteration, pf):
+        """
+        appends a planform to the history
+
+        The columns are written before the iteration number,
+        so an interrupted write leaves no partial iteration
+        in the history.
+
+        parameters
+        ----------
+        iteration: int
+            iteration number
+        pf: dict
+            planform dictionary containing at least the columns of the history
+        """
+
+        cols = [np.ascontiguousarray(pf[name], dtype='<f8') for name in self.names]
+        for name, val in zip(self.names, cols):
+            if val.shape != (self.size,):
+                raise ValueError('%s has shape %s, expected (%i,)' % (name, val.shape, self.size))
+
+        ichunk, islot = divmod(self._count, self.chunk_size)
+        base = self._start + ichunk * self.dtype.itemsize
+        with open(self.filename, 'r+b') as fid:
+            if ichunk == self._nchunks:
+                # new chunk with unused slots
+                chunk = np.zeros(1, dtype=self.dtype)
+                chunk['iteration'] = -1
+                fid.seek(base)
+                fid.write(chunk.tostring())
+                self._nchunks += 1
+            for name, val in zip(self.names, cols):
+                fid.seek(base + self.dtype.fields[name][1] + islot * 8 * self.size)
+                fid.write(val.tostring())
+            fid.seek(base + islot * 8)
+            fid.write(struct.pack('<q', iteration))
+        self._count += 1
+
+    @property
+    def iterations(self):
+        """
+        iteration numbers of all stored planforms
+        """
+
+        return np.array(self._chunk_iterations().ravel()[:self._count])
+
+    def column(self, name):
+        """
+        returns
+        -------
+        val: array
+            (n, size) column `name` of all n stored iterations
+        """
+
+        return np.array(self._map()[name].reshape(-1, self.size)[:self._count])
+
+    def read(self, iteration):
+        """
+        parameters
+        ----------
+        iteration: int
+            iteration number, the last stored if it occurs more than once
+
+        returns
+        -------
+        pf: dict
+            planform dictionary of the iteration
+        """
+
+        k = np.where(self.iterations == iteration)[0]
+        if k.shape[0] == 0:
+            raise KeyError('iteration %i is not in %s' % (iteration, self.filename))
+        ichunk, islot = divmod(k[-1], self.chunk_size)
+        records = self._map()
+        return dict((name, np.array(records[name][ichunk, islot])) for name in self.names)
+
 
 class BladePlanformWriter(Component):
+    """
+    writes the planform of each iteration, either to the text file
+    `<filebase>_it<N>.pfd` or, with history=True, appended to
+    the single PlanformHistory file `<filebase>.pfh`
+    """
 
-    def __init__(self, size_in, filebase='blade'):
+    def __init__(self, size_in, filebase='blade', history=False, chunk_size=64):
         super(BladePlanformWriter, self).__init__()
 
         self.filebase = filebase + '%i' % self.__hash__()
+        self.history = None
+        self._history = history
+        self._chunk_size = chunk_size
 
         self.add_param('x', np.zeros(size_in))
         self.add_param('y', np.zeros(size_in))
@@ -254,6 +589,7 @@ class BladePlanformWriter(Component):
         self.add_param('rot_z', np.zeros(size_in))
         self.add_param('p_le', np.zeros(size_in))
 
+        self._size = size_in
         self._exec_count = 0
 
     def solve_nonlinear(self, params, unknowns, resids):
@@ -271,7 +607,50 @@ class BladePlanformWriter(Component):
         pf['rthick'] = params['rthick']
         pf['p_le'] = params['p_le']
 
-        write_blade_planform(pf, self.filebase + '_it%i.pfd'%self._exec_count)
+        if self._history:
+            if self.history is None:
+                self.history = PlanformHistory(self.filebase, self._size,
+                                               chunk_size=self._chunk_size)
+            self.history.append(self._exec_count, pf)
+        else:
+            write_blade_planform(pf, self.filebase + '_it%i.pfd'%self._exec_count)
+
+
+def resampling_operator(s, s_new, spline_type='linear'):
+    """
+    matrix resampling data defined at s onto s_new, which for linear
+    and natural cubic splines is independent of the data
+
+    parameters
+    ----------
+    s: array
+        (n,) ascending distribution of the data, can be complex
+    s_new: array
+        (m,) distribution to resample onto
+    spline_type: str
+        | linear: linear interpolation, constant beyond the end points
+        | ncubic: natural cubic spline
+
+    returns
+    -------
+    W: array
+        (m, n) sparse matrix for linear and dense array for ncubic splines
+    """
+
+    if spline_type == 'ncubic':
+        return NaturalCubicSpline(s, np.zeros_like(s)).jacobian(s_new)
+    if spline_type != 'linear':
+        raise ValueError('spline_type must be linear or ncubic, got %s' % spline_type)
+
+    n = s.shape[0]
+    m = s_new.shape[0]
+    j = np.searchsorted(s.real, s_new.real, side='right') - 1
+    j = np.minimum(np.maximum(j, 0), n - 2)
+    t = (s_new - s[j]) / (s[j + 1] - s[j])
+    t = np.where(t.real < 0., 0., np.where(t.real > 1., 1., t))
+    i = np.arange(m)
+    return csr_matrix((np.append(1. - t, t), (np.append(i, i), np.append(j, j + 1))),
+                      shape=(m, n))
 
 
 def redistribute_planform(pf, dist=[], s=None, spline_type='akima'):
@@ -340,8 +719,19 @@ class PGLRedistributedPlanform(Component):
         relative thickness distribution
     p_le: array
         pitch axis aft leading edge distribution
+
+    For linear and natural cubic (ncubic) splines the planform is always
+    resampled natively, also if PGL is installed, by a matrix which is
+    only recomputed when s changes, and which provides the exact partials.
+    The other spline types use PGL if installed,
+    otherwise a pchip spline, and their partials are computed
+    by finite differences.
     """
 
+    # planform variables that are redistributed
+    _pf_names = ['s', 'x', 'y', 'z', 'rot_x', 'rot_y', 'rot_z',
+                 'chord', 'rthick', 'p_le']
+
     def __init__(self, name, size_in, s_new):
         """
         parameters
@@ -384,9 +774,48 @@ class PGLRedistributedPlanform(Component):
         self.add_output('p_le'+name, np.zeros(size_out))
         self.add_output('athick'+name, np.zeros(size_out))
 
+        self._s = None
+        self._W = None
+
+    @property
+    def spline_type(self):
+
+        return self._spline_type
+
+    @spline_type.setter
+    def spline_type(self, spline_type):
+
+        self._spline_type = spline_type
+        # analytic partials are only available for the linear and ncubic splines,
+        # the derivative type can only be changed before setup
+        deriv_type = 'user' if spline_type in ['linear', 'ncubic'] else 'fd'
+        if self.deriv_options['type'] != deriv_type:
+            self.deriv_options['type'] = deriv_type
+
+    def _operator(self, s):
+        """
+        resampling operator of the current spline type, cached
+        for the last input distribution
+        """
+
+        if self._W is None or self._W[0] != self.spline_type or \
+           not np.array_equal(self._s, s):
+            self._s = s.copy()
+            self._W = (self.spline_type, resampling_operator(s, self.s_new, self.spline_type))
+        return self._W[1]
 
     def solve_nonlinear(self, params, unknowns, resids):
 
+        if self.spline_type in ['linear', 'ncubic']:
+            # all variables in one product with the cached operator
+            P = np.array([params[name] for name in self._pf_names])
+            Pnew = self._operator(params['s']).dot(P.T).T
+            for i, name in enumerate(self._pf_names):
+                unknowns[name + self._suffix] = Pnew[i]
+            unknowns['athick'+self._suffix] = unknowns['chord' + self._suffix] * \
+                                              unknowns['rthick' + self._suffix]
+            return
+
         # we need to dig into the _ByObjWrapper val to get the array
         # values out
         # pf_in = {name: val['val'].val for name, val in params.iteritems()}
@@ -405,15 +834,59 @@ class PGLRedistributedPlanform(Component):
         if _PGL_installed:
             pf = redistribute_planform(pf_in, s=self.s_new, spline_type=self.spline_type)
         else:
-            pf = {}
-            for k, v in pf_in.iteritems():
-                spl = pchip(pf_in['s'], v)
-                pf[k] = spl(self.s_new)
+            names = pf_in.keys()
+            Pnew = pchip_interpolate(pf_in['s'], np.array([pf_in[k] for k in names]).T, self.s_new)
+            pf = dict((k, Pnew[:, i]) for i, k in enumerate(names))
 
         for k, v in pf.iteritems():
             unknowns[k+self._suffix] = v
         unknowns['athick'+self._suffix] = pf['chord'] * pf['rthick']
 
+    def linearize(self, params, unknowns, resids):
+        """
+        exact partials of the linear and ncubic splines, the partials
+        w.r.t. s are computed by complex step of the operator.
+        Not used for the other spline types, which are finite differenced.
+        """
+
+        J = {}
+        sfx = self._suffix
+        s = params['s']
+        W = self._operator(s)
+        for name in self._pf_names[1:]:
+            J[name + sfx, name] = W
+        rthick = unknowns['rthick' + sfx]
+        chord = unknowns['chord' + sfx]
+        J['athick' + sfx, 'chord'] = diags(rthick).dot(W)
+        J['athick' + sfx, 'rthick'] = diags(chord).dot(W)
+
+        P = np.array([params[name] for name in self._pf_names])
+        dPds = np.zeros((P.shape[0], self.s_new.shape[0], s.shape[0]))
+        h = 1.e-30
+        for i in range(s.shape[0]):
+            sc = s.astype(complex)
+            sc[i] += h * 1j
+            dPds[:, :, i] = resampling_operator(sc, self.s_new, self.spline_type).dot(P.T).T.imag / h
+        for i, name in enumerate(self._pf_names):
+            J[name + sfx, 's'] = dPds[i]
+        if self.spline_type == 'linear':
+            J['s' + sfx, 's'] = J['s' + sfx, 's'] + W.toarray()
+        else:
+            J['s' + sfx, 's'] = J['s' + sfx, 's'] + W
+        J['athick' + sfx, 's'] = rthick[:, np.newaxis] * dPds[self._pf_names.index('chord')] + \
+                                 chord[:, np.newaxis] * dPds[self._pf_names.index('rthick')]
+        return J
+
+
+def _base_derivatives(s, P):
+    """
+    first and second derivatives w.r.t. s of the base shapes P, (k, len(s)),
+    from natural cubic splines through the discrete points
+    """
+
+    spl = NaturalCubicSpline(s, np.zeros_like(s))
+    return [np.dot(P, spl.jacobian(s, deriv=deriv).T) for deriv in [1, 2]]
+
 
 class FFDSpline(Component):
     """
@@ -429,6 +902,11 @@ class FFDSpline(Component):
         opt = self.spline_options = OptionsDictionary()
         opt.add_option('spline_type', 'bezier', values=['pchip', 'bezier'],\
                        desc='spline type used in FFD')
+        opt.add_option('linear_basis', True, desc='evaluate splines that are linear in C '
+                       'as a precomputed (len(s), nC) basis matrix')
+        opt.add_option('curvature', 'fd', values=['fd', 'exact'],
+                       desc='finite difference curvature of the points or exact curvature '
+                       'from the first and second derivatives of the splines')
         self.nC = Cx.shape[0]
         self.Cx = Cx
         self.s = s
@@ -442,6 +920,9 @@ class FFDSpline(Component):
 
         self._init_called = False
         self.spline = None
+        self._basis = None
+        self._dbasis = None
+        self._dPinit = None
 
         self.set_spline(self.spline_options['spline_type'])
 
@@ -449,6 +930,7 @@ class FFDSpline(Component):
 
         self.spline = spline_dict[spline_type]()
         self.spline_options['spline_type'] = spline_type
+        self._init_called = False
 
     def solve_nonlinear(self, params, unknowns, resids):
         """
@@ -459,12 +941,305 @@ class FFDSpline(Component):
         if not self._init_called:
             self.set_spline(self.spline_options['spline_type'])
             # self.Pbase = self.base_spline(self.s, self.xinit, self.Pinit)
-            self.spline.initialize(self.s, self.Cx, C)
-        self._P = self.spline(self.s, self.Cx, C)
+            if self.spline_options['linear_basis'] and self.spline.linear:
+                self._basis = self.spline.basis(self.s, self.Cx)
+            else:
+                self._basis = None
+                self.spline.initialize(self.s, self.Cx, C)
+            self._dbasis = None
+            self._dPinit = None
+            if self.spline_options['curvature'] == 'exact':
+                self._dPinit = [d[0] for d in _base_derivatives(self.s, self.Pinit[np.newaxis])]
+                if self.spline.linear:
+                    self._dbasis = [self.spline.basis(self.s, self.Cx, deriv) for deriv in [1, 2]]
+            self._init_called = True
+        if self._basis is not None:
+            self._P = np.dot(self._basis, C)
+        else:
+            self._P = self.spline(self.s, self.Cx, C)
         P = self.Pinit + self._P * self.scaler
-        curv = curvature(np.array([self.s, P]).T)
         unknowns[self._name] = P
-        unknowns[self._name + '_curv'] = curv
+        if self._dPinit is not None:
+            dP, ddP = [d[0] for d in self._derivatives(C)]
+            unknowns[self._name + '_curv'] = graph_curvature(dP, ddP)[0]
+        else:
+            unknowns[self._name + '_curv'] = batch_curvature(np.array([self.s, P]).T)
+
+    def _derivatives(self, C):
+        """
+        first and second derivatives of the deformed shape w.r.t. s
+        and their partials w.r.t. C
+        """
+
+        d = []
+        for i, deriv in enumerate([1, 2]):
+            if self._dbasis is not None:
+                dS, dSdC = np.dot(self._dbasis[i], C), self._dbasis[i]
+            else:
+                dS, dSdC = self.spline.derivative(self.s, self.Cx, C, deriv)
+            d.append((self._dPinit[i] + dS * self.scaler, dSdC * self.scaler))
+        return d
+
+    def linearize(self, params, unknowns, resids):
+        """
+        the basis matrix is the exact partial derivative of the
+        spline w.r.t. the control points, splines without a basis
+        provide their own Jacobian
+        """
+        J = {}
+        if self._basis is not None:
+            dP = self._basis * self.scaler
+        else:
+            dP = self.spline.jacobian(self.s, self.Cx, params[self._name + '_C']) * self.scaler
+        J[self._name, self._name + '_C'] = dP
+        if self._dPinit is not None:
+            (dP1, dP1dC), (dP2, dP2dC) = self._derivatives(params[self._name + '_C'])
+            k1, k2 = graph_curvature(dP1, dP2)[1]
+            J[self._name + '_curv', self._name + '_C'] = k1[:, np.newaxis] * dP1dC + \
+                                                         k2[:, np.newaxis] * dP2dC
+        else:
+            dcurv = curvature_jacobian(np.array([self.s, unknowns[self._name]]).T)[:, :, 1]
+            J[self._name + '_curv', self._name + '_C'] = np.dot(dcurv, dP)
+        return J
+
+
+class MultiFFDSpline(Component):
+    """
+    Batched FFD of any number of variables sharing the same
+    spanwise distribution and control point locations,
+    evaluated as one stacked array operation.
+
+    Each variable is controlled by a vector of spline CPs,
+    which can be shared between variables to group them.
+
+    The splines can also be evaluated on additional output grids,
+    with the same CPs, adding the outputs `<name><suffix>`.
+    The base shapes are resampled onto these grids with pchip splines.
+    """
+
+    def __init__(self, s, Cx, spline_type='bezier', grids=None):
+        """
+        parameters
+        ----------
+        s: array
+            spanwise distribution of the variables
+        Cx: array
+            spanwise distribution of the control points
+        spline_type: str
+            spline type used in FFD
+        grids: dict
+            additional output grids of the form {suffix: s}
+        """
+        super(MultiFFDSpline, self).__init__()
+
+        opt = self.spline_options = OptionsDictionary()
+        opt.add_option('spline_type', spline_type, values=['pchip', 'bezier'],\
+                       desc='spline type used in FFD')
+        opt.add_option('linear_basis', True, desc='evaluate splines that are linear in C '
+                       'as a precomputed (len(s), nC) basis matrix')
+        opt.add_option('curvature', 'fd', values=['fd', 'exact'],
+                       desc='finite difference curvature of the points or exact curvature '
+                       'from the first and second derivatives of the splines')
+        self.nC = Cx.shape[0]
+        self.Cx = Cx
+        self.s = s
+        self._size = s.shape[0]
+
+        self._names = []
+        self._cnames = []
+        self._icp = []
+        self._Pinit = []
+        self._scalers = []
+        self.grids = [] if grids is None else sorted(grids.items())
+        self._grid_base = [[] for grid in self.grids]
+
+        self._init_called = False
+        self.spline = None
+        self._basis = None
+        self._weights = None
+        self._dbasis = None
+        self._dweights = None
+        self._dPinit = None
+        self._grid_Pinit = None
+        self._grid_basis = None
+        self._grid_weights = None
+
+    def add_spline(self, name, P, cname=None, scaler=1.):
+        """
+        adds a variable to the batch
+
+        parameters
+        ----------
+        name: str
+            name of the variable
+        P: array
+            base shape of the variable
+        cname: str
+            name of the spline CPs array controlling the variable,
+            defaults to `<name>_C`
+        scaler: float
+            scaling of the spline perturbation
+        """
+        if cname is None:
+            cname = name + '_C'
+        if cname not in self._cnames:
+            self._cnames.append(cname)
+            self.add_param(cname, np.zeros(self.nC), desc='spline control points')
+
+        self._names.append(name)
+        self._icp.append(self._cnames.index(cname))
+        self._Pinit.append(P)
+        self._scalers.append(scaler)
+        self.add_output(name, np.zeros(self._size))
+        self.add_output(name + '_curv', np.zeros(self._size))
+        for i, (suffix, s) in enumerate(self.grids):
+            self._grid_base[i].append(pchip_interpolate(self.s, P, s))
+            self.add_output(name + suffix, np.zeros(s.shape[0]))
+
+    def _initialize(self, C):
+
+        self.Pinit = np.array(self._Pinit)
+        self.scalers = np.array(self._scalers)[:, np.newaxis]
+        self.spline = spline_dict[self.spline_options['spline_type']]()
+        self._basis = None
+        self._weights = None
+        if self.spline_options['linear_basis'] and self.spline.linear:
+            self._basis = self.spline.basis(self.s, self.Cx)
+        elif self.spline_options['spline_type'] == 'pchip':
+            self._weights = HermiteWeights(self.Cx, self.s)
+        else:
+            self.spline.initialize(self.s, self.Cx, C[0])
+
+        self._grid_Pinit = [np.array(P) for P in self._grid_base]
+        self._grid_basis = None
+        self._grid_weights = None
+        if self._basis is not None:
+            self._grid_basis = [self.spline.basis(s, self.Cx) for suffix, s in self.grids]
+        elif self._weights is not None:
+            self._grid_weights = [HermiteWeights(self.Cx, s) for suffix, s in self.grids]
+
+        self._dbasis = None
+        self._dweights = None
+        self._dPinit = None
+        if self.spline_options['curvature'] == 'exact':
+            self._dPinit = _base_derivatives(self.s, self.Pinit)
+            if self.spline.linear:
+                self._dbasis = [self.spline.basis(self.s, self.Cx, deriv) for deriv in [1, 2]]
+            elif self.spline_options['spline_type'] == 'pchip':
+                self._dweights = [HermiteWeights(self.Cx, self.s, deriv) for deriv in [1, 2]]
+        self._init_called = True
+
+    def _derivatives(self, C):
+        """
+        first and second derivatives w.r.t. s of all deformed shapes
+        """
+
+        if self._dbasis is not None:
+            dS = [np.dot(C, B.T) for B in self._dbasis]
+        elif self._dweights is not None:
+            dp = pchip_slopes(self.Cx, C.T)
+            dS = [w(C.T, dp).T for w in self._dweights]
+        else:
+            dS = [np.array([self.spline.derivative(self.s, self.Cx, c, deriv)[0] for c in C])
+                  for deriv in [1, 2]]
+        return [d + S[self._icp] * self.scalers for d, S in zip(self._dPinit, dS)]
+
+    def solve_nonlinear(self, params, unknowns, resids):
+        """
+        update all splines
+        """
+        C = np.array([params[cname] for cname in self._cnames])
+
+        if not self._init_called:
+            self._initialize(C)
+        dp = None
+        if self._weights is not None:
+            dp = pchip_slopes(self.Cx, C.T)
+        self._P = self._evaluate(C, dp, self.s, self._basis, self._weights)
+        P = self.Pinit + self._P[self._icp] * self.scalers
+
+        # the other grids reuse the CPs and slopes
+        for ig, (suffix, s) in enumerate(self.grids):
+            basis = None if self._grid_basis is None else self._grid_basis[ig]
+            weights = None if self._grid_weights is None else self._grid_weights[ig]
+            Pg = self._evaluate(C, dp, s, basis, weights)
+            Pg = self._grid_Pinit[ig] + Pg[self._icp] * self.scalers
+            for i, name in enumerate(self._names):
+                unknowns[name + suffix] = Pg[i]
+
+        # curvatures of all variables in one batch
+        if self._dPinit is not None:
+            curv = graph_curvature(*self._derivatives(C))[0]
+        else:
+            curv = batch_curvature(self._points(P))
+
+        for i, name in enumerate(self._names):
+            unknowns[name] = P[i]
+            unknowns[name + '_curv'] = curv[i]
+
+    def _evaluate(self, C, dp, s, basis, weights):
+        """
+        spline perturbations at s for all CP vectors C
+        """
+
+        if basis is not None:
+            return np.dot(C, basis.T)
+        elif weights is not None:
+            return weights(C.T, dp).T
+        return np.array([self.spline(s, self.Cx, c) for c in C])
+
+    def _points(self, P):
+        """
+        stack of (s, P) curves, (k, len(s), 2)
+        """
+
+        points = np.empty(P.shape + (2,), dtype=P.dtype)
+        points[:, :, 0] = self.s
+        points[:, :, 1] = P
+        return points
+
+    def linearize(self, params, unknowns, resids):
+        """
+        partials of all variables w.r.t. the spline CPs
+        controlling them
+        """
+        J = {}
+        if self._basis is not None:
+            dP = [self._basis] * len(self._cnames)
+        else:
+            dP = [self.spline.jacobian(self.s, self.Cx, params[cname]) for cname in self._cnames]
+
+        if self._dPinit is not None:
+            C = np.array([params[cname] for cname in self._cnames])
+            k1, k2 = graph_curvature(*self._derivatives(C))[1]
+            if self._dbasis is not None:
+                dD = [[B] * len(self._cnames) for B in self._dbasis]
+            else:
+                dD = [[self.spline.derivative(self.s, self.Cx, params[cname], deriv)[1]
+                       for cname in self._cnames] for deriv in [1, 2]]
+        else:
+            P = np.array([unknowns[name] for name in self._names])
+            dcurv = curvature_jacobian(self._points(P))[:, :, :, 1]
+
+        for i, name in enumerate(self._names):
+            icp = self._icp[i]
+            cname = self._cnames[icp]
+            dPi = dP[icp] * self._scalers[i]
+            J[name, cname] = dPi
+            if self._dPinit is not None:
+                J[name + '_curv', cname] = (k1[i][:, np.newaxis] * dD[0][icp] +
+                                            k2[i][:, np.newaxis] * dD[1][icp]) * self._scalers[i]
+            else:
+                J[name + '_curv', cname] = np.dot(dcurv[i], dPi)
+
+        for ig, (suffix, s) in enumerate(self.grids):
+            if self._grid_basis is not None:
+                dPg = [self._grid_basis[ig]] * len(self._cnames)
+            else:
+                dPg = [self.spline.jacobian(s, self.Cx, params[cname]) for cname in self._cnames]
+            for i, name in enumerate(self._names):
+                J[name + suffix, self._cnames[self._icp[i]]] = dPg[self._icp[i]] * self._scalers[i]
+        return J
 
 
 class ScaleChord(Component):
@@ -484,6 +1259,14 @@ class ScaleChord(Component):
 
         unknowns['chord' + self._suffix] = params['chord_in'] / params['blade_scale']
 
+    def linearize(self, params, unknowns, resids):
+
+        J = {}
+        bs = params['blade_scale']
+        J['chord' + self._suffix, 'chord_in'] = diags(np.ones(params['chord_in'].shape[0]) / bs)
+        J['chord' + self._suffix, 'blade_scale'] = -params['chord_in'][:, np.newaxis] / bs**2
+        return J
+
 
 class ComputeAthick(Component):
     """
@@ -491,16 +1274,24 @@ class ComputeAthick(Component):
     connect('chord.P*rthick.P', 'pfOut.athick')
     """
 
-    def __init__(self, size):
+    def __init__(self, size, suffix=''):
         super(ComputeAthick, self).__init__()
 
         self.add_param('chord', np.zeros(size))
         self.add_param('rthick', np.zeros(size))
-        self.add_output('athick', np.zeros(size))
+        self.add_output('athick' + suffix, np.zeros(size))
+        self._suffix = suffix
 
     def solve_nonlinear(self, params, unknowns, resids):
 
-        unknowns['athick'] = params['chord'] * params['rthick']
+        unknowns['athick' + self._suffix] = params['chord'] * params['rthick']
+
+    def linearize(self, params, unknowns, resids):
+
+        J = {}
+        J['athick' + self._suffix, 'chord'] = diags(params['rthick'])
+        J['athick' + self._suffix, 'rthick'] = diags(params['chord'])
+        return J
 
 
 class ComputeSmax(Component):
@@ -520,6 +1311,42 @@ class ComputeSmax(Component):
                                        params['z']]).T)
         unknowns['blade_curve_length'] = s[-1]
 
+    def linearize(self, params, unknowns, resids):
+        """
+        the curve length is the sum of the segment lengths, so the
+        derivative w.r.t. each point is the difference of the unit
+        vectors of the adjacent segments
+        """
+
+        points = np.array([params['x'], params['y'], params['z']]).T
+        d = np.diff(points, axis=0)
+        e = d / np.sqrt((d**2).sum(axis=1))[:, np.newaxis]
+        dL = np.zeros(points.shape, dtype=e.dtype)
+        dL[1:] += e
+        dL[:-1] -= e
+
+        J = {}
+        for i, name in enumerate(['x', 'y', 'z']):
+            J['blade_curve_length', name] = dL[:, i][np.newaxis, :]
+        return J
+
+
+def group_splines(splines):
+    """
+    group spline definitions of the form (name, Cx, spline_type, ...)
+    by their control point locations and spline type
+    """
+
+    batches = []
+    keys = []
+    for spl in splines:
+        key = (tuple(spl[1]), spl[2])
+        if key not in keys:
+            keys.append(key)
+            batches.append([])
+        batches[keys.index(key)].append(spl)
+    return batches
+
 
 class SplinedBladePlanform(Group):
     """
@@ -528,7 +1355,7 @@ class SplinedBladePlanform(Group):
     or according to the initial planform data
     """
 
-    def __init__(self, pf):
+    def __init__(self, pf, batch_splines=False, grids=None):
         """
         parameters
         ----------
@@ -545,13 +1372,24 @@ class SplinedBladePlanform(Group):
             |  chord: chord distribution
             |  rthick: relative thickness distribution
             |  p_le: pitch axis aft leading edge distribution
-
+        batch_splines: bool
+            evaluate all splines sharing the same control point locations
+            and spline type in a single MultiFFDSpline component
+            added in configure
+        grids: dict
+            additional output grids of the form {suffix: s}, e.g.
+            {'_st': s_st}, on which the planform is output as
+            `<name><suffix>`. The FFD splines are evaluated
+            directly on these grids, which implies batch_splines.
         """
         super(SplinedBladePlanform, self).__init__()
 
         self._size = pf['s'].shape[0]
         self.pfinit = pf
         self._vars = []
+        self._grids = {} if grids is None else grids
+        self._batch_splines = batch_splines or grids is not None
+        self._splines = []
 
     def add_spline(self, name, Cx, spline_type='bezier', scaler=1.):
         """
@@ -582,8 +1420,11 @@ class SplinedBladePlanform(Group):
 
 
         self._vars.append(name)
+        if self._batch_splines:
+            self.add(name + '_c', IndepVarComp(name + '_C', np.zeros(len(Cx))), promotes=['*'])
+            self._splines.append((name, Cx, spline_type, scaler))
         # chord needs to be scaled according to blade scale parameter
-        if name == 'chord':
+        elif name == 'chord':
             cname = name + '_c'
             self.add(cname, IndepVarComp(name + '_C', np.zeros(len(Cx))), promotes=['*'])
             c = self.add(name + '_s', FFDSpline('chord',
@@ -612,6 +1453,30 @@ class SplinedBladePlanform(Group):
 
         for name in indeps:
             self.add(name+'_c', IndepVarComp(name, self.pfinit[name]), promotes=[name])
+        for suffix, s in self._grids.iteritems():
+            for name in indeps:
+                val = pchip_interpolate(self.pfinit['s'], self.pfinit[name], s)
+                self.add(name + suffix + '_c', IndepVarComp(name + suffix, val),
+                         promotes=[name + suffix])
+
+        suffixes = [''] + self._grids.keys()
+        for i, spls in enumerate(group_splines(self._splines)):
+            names = [spl[0] for spl in spls]
+            promotes = [name + suffix for name in names if name != 'chord' for suffix in suffixes]
+            promotes.extend([name + '_C' for name in names])
+            cname = 'ffd%02d_s' % i
+            c = self.add(cname, MultiFFDSpline(self.pfinit['s'], spls[0][1], spls[0][2],
+                                               grids=self._grids),
+                         promotes=promotes)
+            for name, Cx, spline_type, scaler in spls:
+                c.add_spline(name, self.pfinit[name], scaler=scaler)
+            if 'chord' in names:
+                self.add('chord_scaler', ScaleChord(self._size), promotes=['blade_scale', 'chord'])
+                self.connect(cname + '.chord', 'chord_scaler.chord_in')
+                for suffix, s in self._grids.iteritems():
+                    self.add('chord_scaler' + suffix, ScaleChord(s.shape[0], suffix),
+                             promotes=['blade_scale', 'chord' + suffix])
+                    self.connect(cname + '.chord' + suffix, 'chord_scaler' + suffix + '.chord_in')
 
 
         c = self.add('smax_c', ComputeSmax(self.pfinit), promotes=['blade_curve_length'])
@@ -621,6 +1486,51 @@ class SplinedBladePlanform(Group):
         self.add('athick_c', ComputeAthick(self._size), promotes=['athick'])
         self.connect('rthick', 'athick_c.rthick')
         self.connect('chord', 'athick_c.chord')
+        for suffix, s in self._grids.iteritems():
+            self.add('athick_c' + suffix, ComputeAthick(s.shape[0], suffix),
+                     promotes=['athick' + suffix])
+            self.connect('rthick' + suffix, 'athick_c' + suffix + '.rthick')
+            self.connect('chord' + suffix, 'athick_c' + suffix + '.chord')
+
+
+# blended airfoil interpolators shared by all lofted surfaces in the process
+_interpolator_cache = OrderedDict()
+interpolator_cache_size = 8
+
+
+def interpolator_key(config):
+    """
+    content hash of the configuration variables defining
+    the blended airfoil family of a lofted surface
+
+    parameters
+    ----------
+    config: dict
+        PGLLoftedBladeSurface configuration with the keys
+        base_airfoils, blend_var, ni_chord and surface_spline
+
+    returns
+    -------
+    key: str
+        SHA1 hex digest
+    """
+
+    h = hashlib.sha1()
+    for af in config['base_airfoils']:
+        af = np.ascontiguousarray(af, dtype=np.float64)
+        h.update(str(af.shape))
+        h.update(af)
+    h.update(np.ascontiguousarray(config['blend_var'], dtype=np.float64))
+    h.update('%d %s' % (config['ni_chord'], config['surface_spline']))
+    return h.hexdigest()
+
+
+def clear_interpolator_cache():
+    """
+    empty the process-wide cache of blended airfoil interpolators
+    """
+
+    _interpolator_cache.clear()
 
 
 class PGLLoftedBladeSurface(Component):
@@ -629,15 +1539,53 @@ class PGLLoftedBladeSurface(Component):
     based on a series of base airfoils
     and a planform definition using
     PGL.components.loftedblade.LoftedBladeSurface
+    or the native vectorized fusedwind.turbine.loftedblade.LoftedBladeSurface
+
+    With loft_options['incremental'] set, the planform is compared to that
+    of the previous call and only the cross sections whose planform
+    inputs changed are lofted and patched into the outputs.
+    Incremental and parallel lofting loft parts of the planform separately,
+    which is only supported by the native engine; with the pgl engine,
+    which is not verified to loft each cross section independently,
+    the whole blade is lofted in one call.
     """
 
+    # planform variables that are lofted
+    _pf_names = ['s', 'x', 'y', 'z',
+                 'rot_x', 'rot_y', 'rot_z',
+                 'chord', 'rthick', 'p_le']
 
-    def __init__(self, config, size_in=200, size_out=(200, 20, 3), suffix=''):
+    def __init__(self, config, size_in=200, size_out=(200, 20, 3), suffix='', engine=None,
+                 dtype=np.float64, norm_surface=True):
+        """
+        config: dict
+            configuration variables for the LoftedBladeSurface class
+        size_in: int
+            number of planform cross sections
+        size_out: tuple
+            size of the lofted surface (ni_chord, size_in, 3)
+        suffix: str
+            suffix of the parameter and output names
+        engine: str
+            lofting engine:
+            | pgl: PGL's LoftedBladeSurface
+            | native: fusedwind's vectorized LoftedBladeSurface,
+            which supports lofting of base airfoils without
+            redistribution of the cross sections.
+            Defaults to pgl if installed, otherwise native.
+        dtype: numpy dtype
+            precision of the surface outputs. Outputs of other types than
+            float64 are passed by object and cannot be differentiated.
+        norm_surface: bool
+            output the un-rotated surface blade_surface_norm
+        """
         super(PGLLoftedBladeSurface, self).__init__()
 
-        self._dry_run = False
-        if not _PGL_installed:
-            self._dry_run = True
+        if engine is None:
+            engine = 'pgl' if _PGL_installed else 'native'
+        if engine not in ['pgl', 'native']:
+            raise ValueError('engine must be pgl or native, got %s' % engine)
+        self.engine = engine
 
         self.add_param('blade_length', 1.)
 
@@ -648,8 +1596,16 @@ class PGLLoftedBladeSurface(Component):
             self.add_param(name+suffix, np.zeros(size_in))
 
         self._suffix = suffix
-        self.add_output('blade_surface' + suffix, np.zeros(size_out))
-        self.add_output('blade_surface_norm' + suffix, np.zeros(size_out))
+        self._outputs = ['blade_surface' + suffix]
+        if norm_surface:
+            self._outputs.append('blade_surface_norm' + suffix)
+        self._dtype = np.dtype(dtype)
+        for name in self._outputs:
+            if self._dtype == np.float64:
+                self.add_output(name, np.zeros(size_out))
+            else:
+                # the unknowns vector only holds float64
+                self.add_output(name, np.zeros(size_out, dtype=self._dtype), pass_by_obj=True)
 
         # for i in range(size_in[1]):
         #     self.add_param('base_af%02d' % i, np.zeros(size_in[0], 2))
@@ -679,13 +1635,31 @@ class PGLLoftedBladeSurface(Component):
 
         self.rot_order = np.array([2,1,0])
 
-        if not self._dry_run:
+        opt = self.loft_options = OptionsDictionary()
+        opt.add_option('incremental', False, desc='only re-loft the cross sections '
+                       'whose planform inputs changed since the previous call, '
+                       'native engine only')
+        opt.add_option('max_fraction', 0.5, lower=0., upper=1.,
+                       desc='fraction of changed cross sections above which '
+                       'the whole blade is lofted in one call')
+        opt.add_option('nworkers', 1, lower=1, desc='number of workers lofting '
+                       'the cross sections in parallel, native engine only')
+        opt.add_option('pool', 'thread', values=['thread', 'process'],
+                       desc='pool of threads or of processes writing into shared memory, '
+                       'started on the first parallel call and kept until close()')
+        self._pf_prev = None
+        self._lofting_pool = None
+        self.lofted_sections = np.array([], dtype=int)
+
+        if engine == 'pgl':
             self.pgl_surf = LoftedBladeSurface(**self.config)
+        else:
+            self.pgl_surf = NativeLoftedBladeSurface(**self.config)
         self._pgl_config_called = False
 
     def _configure_interpolator(self):
 
-        if self.config['base_airfoils'] == 0:
+        if len(self.config['base_airfoils']) == 0:
             raise RuntimeError('base_airfoils list is empty')
         if self.config['blend_var'].shape[0] == 0:
             raise RuntimeError('blend_var array is empty')
@@ -693,39 +1667,113 @@ class PGLLoftedBladeSurface(Component):
         self.pgl_surf.surface_spline = self.config['surface_spline']
         self.pgl_surf.blend_var = self.config['blend_var']
         self.pgl_surf.base_airfoils = self.config['base_airfoils']
-        self.pgl_surf.initialize_interpolator()
+
+        # the blended airfoil family is built once per process
+        # and shared between all surfaces using it
+        key = (self.engine, interpolator_key(self.config))
+        try:
+            self.pgl_surf.interpolator = _interpolator_cache.pop(key)
+        except KeyError:
+            self.pgl_surf.initialize_interpolator()
+        _interpolator_cache[key] = self.pgl_surf.interpolator
+        while len(_interpolator_cache) > interpolator_cache_size:
+            _interpolator_cache.popitem(last=False)
         self._pgl_config_called = True
 
     def solve_nonlinear(self, params, unknowns, resids):
 
-        if self._dry_run:
-            ni = params['s'  + self._suffix].shape[0]
-            surf = np.zeros([self.config['ni_chord'], ni, 3])
-            surf[:, :, 2] = params['s'  + self._suffix]
-            self.unknowns['blade_surface' + self._suffix] = surf
-            self.unknowns['blade_surface_norm' + self._suffix] = surf
-            return
-
         if not self._pgl_config_called:
             self._configure_interpolator()
         # we need to dig into the _ByObjWrapper val to get the array
         # values out
         pf = {}
-        pf['s'] = params['s' + self._suffix]
-        pf['x'] = params['x' + self._suffix]
-        pf['y'] = params['y' + self._suffix]
-        pf['z'] = params['z' + self._suffix]
-        pf['rot_x'] = params['rot_x' + self._suffix]
-        pf['rot_y'] = params['rot_y' + self._suffix]
-        pf['rot_z'] = params['rot_z' + self._suffix]
-        pf['chord'] = params['chord' + self._suffix]
-        pf['rthick'] = params['rthick' + self._suffix]
-        pf['p_le'] = params['p_le' + self._suffix]
-        self.pgl_surf.pf = pf
-        self.pgl_surf.build_blade()
-
-        surf = self.pgl_surf.surface
-        surfnorot = self.pgl_surf.surfnorot
-
-        self.unknowns['blade_surface' + self._suffix] = surf
-        self.unknowns['blade_surface_norm' + self._suffix] = surfnorot
+        for name in self._pf_names:
+            pf[name] = params[name + self._suffix]
+
+        # the sections are written in place into the output arrays
+        out = [unknowns[name] for name in self._outputs]
+        idx = self._changed_sections(pf)
+        if idx is None:
+            self._loft_sections(pf, out)
+            self.lofted_sections = np.arange(pf['s'].shape[0])
+        else:
+            if idx.shape[0] > 0:
+                self._loft_sections(pf, out, idx)
+            self.lofted_sections = idx
+        self._pf_prev = dict((name, pf[name].copy()) for name in self._pf_names)
+
+    def _section_local(self):
+        """
+        True if the cross sections can be lofted independently of each other,
+        False for the pgl engine, user surfaces and spanwise indexed
+        distributions, which are lofted as a whole
+        """
+
+        return self.engine == 'native' and \
+               self.config['user_surface'].shape[0] == 0 and \
+               self.config['user_surface_file'] == '' and \
+               self.config['dist_LE'].shape[0] == 0 and \
+               self.config['gf_heights'].shape[0] == 0
+
+    def _changed_sections(self, pf):
+        """
+        indices of the cross sections whose planform inputs differ from
+        the previous call, or None if the whole blade needs to be lofted
+        """
+
+        if not self.loft_options['incremental'] or self._pf_prev is None:
+            return None
+        if not self._section_local():
+            return None
+        if pf['s'].shape != self._pf_prev['s'].shape:
+            return None
+
+        changed = np.zeros(pf['s'].shape[0], dtype=bool)
+        for name in self._pf_names:
+            changed |= pf[name] != self._pf_prev[name]
+        idx = np.where(changed)[0]
+        if idx.shape[0] > self.loft_options['max_fraction'] * changed.shape[0]:
+            return None
+        return idx
+
+    def _loft_sections(self, pf, out, idx=None):
+        """
+        loft the cross sections idx of the planform, all if idx is None
+
+        parameters
+        ----------
+        out: list
+            output arrays of the whole surface and, if present, the
+            un-rotated surface, into which the sections are written
+        """
+
+        nworkers = self.loft_options['nworkers']
+        if nworkers > 1 and self._section_local():
+            pool = self._lofting_pool
+            if pool is None or pool.nworkers != nworkers or \
+               pool.pool != self.loft_options['pool']:
+                self.close()
+                self._lofting_pool = LoftingPool(self.pgl_surf, nworkers, self.loft_options['pool'])
+            self._lofting_pool(pf, idx, out)
+        elif self.engine == 'native' and idx is None and self._dtype == np.float64:
+            # the native engine lofts directly into the outputs
+            self.pgl_surf.pf = pf
+            self.pgl_surf.build_blade(out=out)
+        else:
+            if idx is not None:
+                pf = dict((name, pf[name][idx]) for name in self._pf_names)
+            self.pgl_surf.pf = pf
+            self.pgl_surf.build_blade()
+            if idx is None:
+                idx = slice(None)
+            for o, surf in zip(out, [self.pgl_surf.surface, self.pgl_surf.surfnorot]):
+                o[:, idx, :] = surf
+
+    def close(self):
+        """
+        stop the workers of the parallel lofting pool, if started
+        """
+
+        if self._lofting_pool is not None:
+            self._lofting_pool.close()
+            self._lofting_pool = None
@@ -0,0 +1,332 @@
+
+import copy
+import numpy as np
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from multiprocessing.sharedctypes import RawArray
+
+from fusedwind.lib.geom_tools import normalized_arc_length, RotXYZ, dotXC
+from fusedwind.lib.pchipspline import HermiteWeights, pchip_slopes, pchip_interpolate
+
+
+def redistribute_airfoil(points, ni):
+    """
+    redistribute an airfoil onto ni points clustered towards
+    the leading and trailing edges
+
+    The points are interpolated with a pchip spline in the normalized
+    arc length, with half of the points on each side of the leading edge,
+    so that redistributed airfoils can be blended point by point.
+
+    parameters
+    ----------
+    points: array
+        (n, 2) airfoil coordinates starting at the trailing edge going
+        along the lower side to the leading edge and back along
+        the upper side, normalized to unit chord
+    ni: int
+        number of points of the redistributed airfoil
+
+    returns
+    -------
+    points: array
+        (ni, 2) redistributed airfoil
+    """
+
+    s = normalized_arc_length(points)[0]
+    iLE = np.argmin(points[:, 0])
+    sLE = s[iLE]
+    nl = ni // 2 + 1
+    u = 0.5 * (1. - np.cos(np.pi * np.linspace(0., 1., nl)))
+    v = 0.5 * (1. - np.cos(np.pi * np.linspace(0., 1., ni - nl + 1)))
+    s_new = np.append(sLE * u, sLE + (1. - sLE) * v[1:])
+    return pchip_interpolate(s, points, s_new)
+
+
+class BlendAirfoilShapes(object):
+    """
+    native blended airfoil family interpolating redistributed
+    base airfoils with pchip splines in the blend variable,
+    typically the relative thickness
+
+    parameters
+    ----------
+    airfoil_list: list
+        list of (n, 2) base airfoil coordinates
+    blend_var: array
+        blend variable of each base airfoil in ascending order
+    ni: int
+        number of points of the blended airfoils
+    """
+
+    def __init__(self, airfoil_list, blend_var, ni=200):
+
+        self.airfoil_list = airfoil_list
+        self.blend_var = np.asarray(blend_var, dtype=float)
+        self.ni = ni
+
+    def initialize(self):
+
+        if len(self.airfoil_list) != self.blend_var.shape[0]:
+            raise ValueError('got %i base airfoils for %i blend_var values' %
+                             (len(self.airfoil_list), self.blend_var.shape[0]))
+        afs = np.array([redistribute_airfoil(np.asarray(af), self.ni)
+                        for af in self.airfoil_list])
+        self._yp = afs.reshape(afs.shape[0], -1)
+        self._dp = pchip_slopes(self.blend_var, self._yp)
+
+    def __call__(self, blend):
+        """
+        parameters
+        ----------
+        blend: float or array
+            blend variable, clipped to the range of blend_var
+
+        returns
+        -------
+        points: array
+            (ni, 2) blended airfoil or (len(blend), ni, 2) for array input
+        """
+
+        b = np.clip(np.atleast_1d(blend), self.blend_var[0], self.blend_var[-1])
+        points = HermiteWeights(self.blend_var, b)(self._yp, self._dp)
+        points = points.reshape(b.shape[0], self.ni, 2)
+        if np.ndim(blend) == 0:
+            return points[0]
+        return points
+
+
+class LoftedBladeSurface(object):
+    """
+    native vectorized equivalent of PGL.components.loftedblade.LoftedBladeSurface
+
+    All cross sections are blended, scaled, translated and rotated
+    as stacked array operations:
+
+    | the blended airfoils are scaled by the chord and translated
+    | by p_le such that the blade axis is at the origin,
+    | the x-coordinate is inverted for clockwise rotating blades,
+    | the sections are translated to the blade axis (x, y, z),
+    | and rotated about the blade axis by RotXYZ(rot_x, rot_y, rot_z),
+    | i.e. twist first followed by the y- and x-rotations.
+
+    The surfaces are not identical to PGL's,
+    which redistributes the base airfoils differently.
+    """
+
+    def __init__(self, **kwargs):
+
+        self.base_airfoils = []
+        self.blend_var = np.array([])
+        self.user_surface = np.array([])
+        self.user_surface_file = ''
+        self.user_surface_shape = ()
+        self.ni_chord = 200
+        self.chord_nte = 0
+        self.redistribute_flag = False
+        self.x_chordwise = np.array([])
+        self.minTE = 0.
+        self.interp_type = 'rthick'
+        self.surface_spline = 'pchip'
+        self.dist_LE = np.array([])
+        self.gf_heights = np.array([])
+
+        for k, v in kwargs.iteritems():
+            if not hasattr(self, k):
+                raise TypeError('unknown argument %s' % k)
+            setattr(self, k, v)
+
+        unsupported = [self.user_surface.shape[0] > 0,
+                       self.user_surface_file != '',
+                       self.redistribute_flag,
+                       self.chord_nte > 0,
+                       self.minTE > 0.,
+                       self.x_chordwise.shape[0] > 0,
+                       self.dist_LE.shape[0] > 0,
+                       self.gf_heights.shape[0] > 0]
+        if any(unsupported):
+            raise NotImplementedError('user surfaces, redistribution of the cross sections '
+                                      'and trailing edge modifications are only '
+                                      'supported by PGL')
+
+        self.interpolator = None
+        self.pf = {}
+
+    def initialize_interpolator(self):
+
+        if self.surface_spline != 'pchip':
+            raise NotImplementedError('surface_spline %s is not supported '
+                                      'by the native engine' % self.surface_spline)
+        self.interpolator = BlendAirfoilShapes(self.base_airfoils, self.blend_var, self.ni_chord)
+        self.interpolator.initialize()
+
+    def build_blade(self, out=None):
+        """
+        parameters
+        ----------
+        out: list
+            optional float64 arrays for the surface and optionally
+            the un-rotated surface into which the blade is lofted
+        """
+
+        pf = self.pf
+        nsec = pf['s'].shape[0]
+        if self.interp_type == 'rthick':
+            points = self.interpolator(pf['rthick'])
+        else:
+            points = self.interpolator(pf['s'])
+
+        chord = pf['chord'][:, np.newaxis]
+        center = np.array([pf['x'], pf['y'], pf['z']]).T
+
+        if out is not None and len(out) > 1:
+            self.surfnorot = out[1]
+        else:
+            self.surfnorot = np.empty((self.ni_chord, nsec, 3))
+        self.surfnorot[:, :, 0] = (-(points[:, :, 0] - pf['p_le'][:, np.newaxis]) * chord).T
+        self.surfnorot[:, :, 1] = (points[:, :, 1] * chord).T
+        self.surfnorot[:, :, 2] = 0.
+        self.surfnorot += center
+
+        rot = RotXYZ(pf['rot_x'], pf['rot_y'], pf['rot_z'])
+        self.surface = dotXC(rot, self.surfnorot, center,
+                             out=None if out is None else out[0])
+
+
+def _loft_chunk(surf, pf, idx, surface, surfnorot):
+    """
+    loft the sections of the planform chunk pf with a shallow copy of surf,
+    sharing its interpolator, and write them into the columns idx
+    of the output buffers
+    """
+
+    surf = copy.copy(surf)
+    surf.pf = pf
+    surf.build_blade()
+    surface[:, idx] = surf.surface
+    if surfnorot is not None:
+        surfnorot[:, idx] = surf.surfnorot
+
+
+# surface and shared output buffers of a lofting worker process,
+# set by _init_worker when the process is started
+_worker = {}
+
+
+def _init_worker(surf, surface, surfnorot, shape):
+
+    _worker['surf'] = surf
+    _worker['surface'] = np.frombuffer(surface).reshape(shape)
+    _worker['surfnorot'] = np.frombuffer(surfnorot).reshape(shape)
+
+
+def _process_chunk(args):
+
+    pf, idx = args
+    _loft_chunk(_worker['surf'], pf, idx, _worker['surface'], _worker['surfnorot'])
+
+
+class LoftingPool(object):
+    """
+    persistent pool of workers lofting the sections of a planform
+    split in contiguous chunks
+
+    The workers are started on the first call and kept until close()
+    is called, so that repeated lofting of the same blade does not
+    pay for starting the pool.
+
+    The sections of each chunk are lofted as a separate planform,
+    so the surface must loft each section independently of the others.
+
+    parameters
+    ----------
+    surf: object
+        LoftedBladeSurface of PGL or fusedwind with an initialized interpolator
+    nworkers: int
+        number of workers
+    pool: str
+        | thread: pool of threads writing the sections directly into
+        the output arrays
+        | process: pool of worker processes writing into shared memory
+        buffers, which are handed to the workers when they are started.
+        surf is copied into the workers once, when the pool is started
+        by the first call, so later changes to surf are only seen
+        by the workers after close().
+    """
+
+    def __init__(self, surf, nworkers=2, pool='thread'):
+
+        if pool not in ['thread', 'process']:
+            raise ValueError('pool must be thread or process, got %s' % pool)
+        self.surf = surf
+        self.nworkers = nworkers
+        self.pool = pool
+        self._workers = None
+        self._buffers = None
+        self._shape = None
+
+    def _start(self, shape):
+
+        if self._workers is not None and (self.pool == 'thread' or shape == self._shape):
+            return
+        self.close()
+        if self.pool == 'thread':
+            self._workers = ThreadPool(self.nworkers)
+        else:
+            size = shape[0] * shape[1] * shape[2]
+            buffers = [RawArray('d', size) for i in range(2)]
+            self._buffers = [np.frombuffer(b).reshape(shape) for b in buffers]
+            self._workers = Pool(self.nworkers, initializer=_init_worker,
+                                 initargs=(self.surf, buffers[0], buffers[1], shape))
+        self._shape = shape
+
+    def close(self):
+        """
+        stop the workers
+        """
+
+        if self._workers is not None:
+            self._workers.close()
+            self._workers.join()
+        self._workers = None
+        self._buffers = None
+        self._shape = None
+
+    def __call__(self, pf, idx=None, out=None):
+        """
+        parameters
+        ----------
+        pf: dict
+            planform arrays
+        idx: array
+            indices of the sections to loft, defaults to all sections
+        out: list
+            output arrays of the whole surface and optionally the
+            un-rotated surface, into whose columns idx the sections
+            are written
+
+        returns
+        -------
+        out: list
+            the output arrays, allocated if not given
+        """
+
+        nsec = pf['s'].shape[0]
+        if idx is None:
+            idx = np.arange(nsec)
+        shape = (self.surf.ni_chord, nsec, 3)
+        if out is None:
+            out = [np.zeros(shape), np.zeros(shape)]
+        self._start(shape)
+
+        chunks = [c for c in np.array_split(idx, self.nworkers) if c.shape[0] > 0]
+        args = [(dict((name, val[c]) for name, val in pf.iteritems()), c) for c in chunks]
+        if self.pool == 'thread':
+            surface = out[0]
+            surfnorot = out[1] if len(out) > 1 else None
+            self._workers.map(lambda arg: _loft_chunk(self.surf, arg[0], arg[1], surface, surfnorot), args)
+        else:
+            self._workers.map(_process_chunk, args)
+            for o, b in zip(out, self._buffers):
+                o[:, idx] = b[:, idx]
+        return out
@@ -1,32 +1,201 @@
 
+import os
 import time
 import re
+import json
+import struct
+import hashlib
 import numpy as np
-from scipy.interpolate import pchip
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from scipy.sparse import diags, coo_matrix, csr_matrix
 
 from openmdao.api import Component, Group, ParallelGroup
 from openmdao.core.problem import Problem
 from openmdao.api import IndepVarComp
 
-from fusedwind.turbine.geometry import FFDSpline
+from fusedwind.turbine.geometry import MultiFFDSpline, group_splines
+from fusedwind.lib.pchipspline import pchip_interpolate
 
 try:
     from PGL.components.airfoil import AirfoilShape
-    from PGL.main.geom_tools import curvature
     _PGL_installed = True
 except:
     print('Warning: PGL not installed, some components will not function correctly')
     _PGL_installed = False
 
+from fusedwind.lib.geom_tools import batch_curvature, curvature_jacobian, \
+                                     normalized_arc_length, interp_arc_length
 
-def read_bladestructure(filebase):
+
+def _check_file_version(st3d, headerline):
+    ''' Checks the version string of the first line in file
+
+    :param st3d: The dictionary beeing filled
+    :param headerline: First line if the file.
+    :return: version int, i.e. 1 for a header with '# version 1'
+    '''
+
+    if 'version' in [char for char in headerline]:
+        # we have a file that is in version numbering
+        version = int(headerline[1])
+        # check for files consistency
+        if version != st3d['version'] and st3d['version'] is not None:
+            print('Warning: Files not all consistent in version %s!' % version)
+
+        st3d['version'] = version
+    else:
+        version = 0
+        # check for files consistency
+        if version != st3d['version'] and st3d['version'] is not None:
+            print('Warning: Files not all consistent in version %s!' % version)
+
+        st3d['version'] = version # version 0 for files before file version tagging
+    return version
+
+
+def _read_layup_file(st3d, layup_file):
+    """
+    reads a region or web st3d file with material thicknesses and angles
+
+    parameters
+    ----------
+    st3d: dict
+        dictionary being filled, used for checking the file version
+    layup_file: str
+        name of the st3d file
+
+    returns
+    -------
+    r: dict
+        dictionary with the layer names, thicknesses and angles
+    """
+
+    r = {}
+    with open(layup_file, 'r') as fid:
+        first_line = fid.readline().split()[1:]
+        version = _check_file_version(st3d, first_line)
+        if version == 0:
+            rrname = first_line
+        if version == 1:
+            rrname = fid.readline().split()[1]
+        lheader = fid.readline().split()[1:]
+
+        cldata = np.loadtxt(fid)
+    layers = lheader[1:]
+    nl = len(layers)
+
+    if version==0:
+        # check that layer names are of the type <%s><%02d>
+        lnames = []
+        basenames = []
+        for name in layers:
+            try:
+                # numbers in names should be allowed
+                split = re.match(r"([a-z]+)([0-9]+)", name, re.I).groups()
+                idx = basenames.count(split[0])
+                basenames.append(split[0])
+                lnames.append(split[0] + '%02d' % idx)
+            except:
+                split = re.match(r"([a-z]+)", name, re.I).groups()
+                idx = basenames.count(split[0])
+                basenames.append(split[0])
+                lnames.append(split[0] + '%02d' % idx)
+        r['layers'] = lnames
+
+    if version == 1:
+        r['layers'] = layers
+
+    r['thicknesses'] = cldata[:, 1:nl + 1]
+    if cldata.shape[1] == nl*2 + 1:
+        r['angles'] = cldata[:, nl + 1:2*nl+1 + 2]
+    else:
+        r['angles'] = np.zeros((cldata.shape[0], nl))
+    return r
+
+
+class LazyLayupList(list):
+    """
+    list of region or web definitions that are read from
+    their st3d files when first accessed and then cached
+    """
+
+    def __init__(self, st3d, layup_files):
+        """
+        parameters
+        ----------
+        st3d: dict
+            dictionary being filled, used for checking the file version
+        layup_files: list
+            names of the st3d files
+        """
+        super(LazyLayupList, self).__init__([None] * len(layup_files))
+        self._st3d = st3d
+        self._layup_files = layup_files
+
+    def _load(self, i):
+
+        r = list.__getitem__(self, i)
+        if r is None:
+            r = _read_layup_file(self._st3d, self._layup_files[i])
+            list.__setitem__(self, i, r)
+        return r
+
+    def is_loaded(self, i):
+        """
+        returns True if entry `i` has been read
+        """
+        return list.__getitem__(self, i) is not None
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._load(j) for j in range(*i.indices(len(self)))]
+        return self._load(i)
+
+    def __getslice__(self, i, j):
+        return self.__getitem__(slice(i, j))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._load(i)
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+
+def _map(func, args, nworkers):
+    """
+    returns [func(*arg) for arg in args], evaluated by a pool
+    of nworkers threads if nworkers > 1
+    """
+
+    if nworkers > 1 and len(args) > 1:
+        pool = ThreadPool(min(nworkers, len(args)))
+        try:
+            return pool.map(lambda arg: func(*arg), args)
+        finally:
+            pool.close()
+            pool.join()
+    return [func(*arg) for arg in args]
+
+
+def read_bladestructure(filebase, lazy=False, nworkers=1):
     """
     input file reader of BladeStructureVT3D data
 
     parameters
     ----------
     filebase: str
-        data files' basename
+        data files' basename, or the name of a single binary
+        file with the extension `.st3b`
+    lazy: bool
+        read the region and web st3d files only when they are first
+        accessed in `st3d['regions']` and `st3d['webs']`
+    nworkers: int
+        number of threads reading the region and web st3d files
 
     returns
     -------
@@ -35,77 +204,55 @@ def read_bladestructure(filebase):
         definition of the blade structure
     """
 
-    def _check_file_version(st3d, headerline):
-        ''' Checks the version string of the first line in file
-
-        :param st3d: The dictionary beeing filled
-        :param headerline: First line if the file.
-        :return: version int, i.e. 1 for a header with '# version 1'
-        '''
-
-        if 'version' in [char for char in headerline]:
-            # we have a file that is in version numbering
-            version = int(headerline[1])
-            # check for files consistency
-            if version != st3d['version'] and st3d['version'] is not None:
-                print('Warning: Files not all consistent in version %s!' % version)
-
-            st3d['version'] = version
-        else:
-            version = 0
-            # check for files consistency
-            if version != st3d['version'] and st3d['version'] is not None:
-                print('Warning: Files not all consistent in version %s!' % version)
-
-            st3d['version'] = version # version 0 for files before file version tagging
-        return version
+    if filebase.endswith(ST3D_BIN_EXT):
+        return read_bladestructure_bin(filebase)
 
     st3d = {}
     st3d['version'] = None
     # read mat file
-    fid = open(filebase + '.mat', 'r')
-    first_line = fid.readline().split()[1:]
-    version = _check_file_version(st3d, first_line)
-    if version == 0:
-        materials = first_line
-    if version == 1:
-        materials = fid.readline().split()[1:]
-    st3d['materials'] = {name:i for i, name in enumerate(materials)}
-    data = np.loadtxt(fid)
+    with open(filebase + '.mat', 'r') as fid:
+        first_line = fid.readline().split()[1:]
+        version = _check_file_version(st3d, first_line)
+        if version == 0:
+            materials = first_line
+        if version == 1:
+            materials = fid.readline().split()[1:]
+        st3d['materials'] = {name:i for i, name in enumerate(materials)}
+        data = np.loadtxt(fid)
     st3d['matprops'] = data
 
     # read failmat file
     failcrit = {1:'maximum_strain', 2:'maximum_stress', 3:'tsai_wu'}
-    fid = open(filebase + '.failmat', 'r')
-    first_line = fid.readline().split()[1:]
-    version = _check_file_version(st3d, first_line)
-    if version == 0:
-        materials = first_line
-    if version == 1:
-        materials = fid.readline().split()[1:]
-    data = np.loadtxt(fid)
+    with open(filebase + '.failmat', 'r') as fid:
+        first_line = fid.readline().split()[1:]
+        version = _check_file_version(st3d, first_line)
+        if version == 0:
+            materials = first_line
+        if version == 1:
+            materials = fid.readline().split()[1:]
+        data = np.loadtxt(fid)
     st3d['failmat'] = data[:, 1:]
     st3d['failcrit'] = [failcrit[mat] for mat in data[:, 0]]
 
     # read the dp3d file containing region division points
     dpfile = filebase + '.dp3d'
 
-    dpfid = open(dpfile, 'r')
-    first_line = dpfid.readline().split()[1:]
-    version = _check_file_version(st3d, first_line)
-    # read webs
-    if version == 0:
-        wnames = first_line
-    if version == 1:
-        wnames = dpfid.readline().split()[1:]
-    iwebs = []
-    for w, wname in enumerate(wnames):
-        line = dpfid.readline().split()[1:]
-        line = [int(entry) for entry in line]
-        iwebs.append(line)
+    with open(dpfile, 'r') as dpfid:
+        first_line = dpfid.readline().split()[1:]
+        version = _check_file_version(st3d, first_line)
+        # read webs
+        if version == 0:
+            wnames = first_line
+        if version == 1:
+            wnames = dpfid.readline().split()[1:]
+        iwebs = []
+        for w, wname in enumerate(wnames):
+            line = dpfid.readline().split()[1:]
+            line = [int(entry) for entry in line]
+            iwebs.append(line)
+        header = dpfid.readline()
     st3d['web_def'] = iwebs
     nwebs = len(iwebs)
-    header = dpfid.readline()
     dpdata = np.loadtxt(dpfile)
     nreg = dpdata.shape[1] - 2
     try:
@@ -117,100 +264,79 @@ def read_bladestructure(filebase):
     st3d['DPs'] = dpdata[:, 1:]
 
     # read the st3d files containing thicknesses and orientations
-    st3d['regions'] = []
-    for i, rname in enumerate(regions):
-        r = {}
-        layup_file = '_'.join([filebase, rname]) + '.st3d'
-        fid = open(layup_file, 'r')
-        first_line = fid.readline().split()[1:]
-        version = _check_file_version(st3d, first_line)
-        if version == 0:
-            rrname = first_line
-        if version == 1:
-            rrname = fid.readline().split()[1]
-        lheader = fid.readline().split()[1:]
+    rfiles = ['_'.join([filebase, rname]) + '.st3d' for rname in regions]
+    wfiles = ['_'.join([filebase, rname]) + '.st3d' for rname in wnames]
+    if lazy:
+        st3d['regions'] = LazyLayupList(st3d, rfiles)
+        st3d['webs'] = LazyLayupList(st3d, wfiles)
+    else:
+        layups = _map(_read_layup_file, [(st3d, f) for f in rfiles + wfiles], nworkers)
+        st3d['regions'] = layups[:len(rfiles)]
+        st3d['webs'] = layups[len(rfiles):]
 
-        cldata = np.loadtxt(fid)
-        layers = lheader[1:]
-        nl = len(layers)
-
-        if version==0:
-            # check that layer names are of the type <%s><%02d>
-            lnames = []
-            basenames = []
-            for name in layers:
-                try:
-                    # numbers in names should be allowed
-                    split = re.match(r"([a-z]+)([0-9]+)", name, re.I).groups()
-                    idx = basenames.count(split[0])
-                    basenames.append(split[0])
-                    lnames.append(split[0] + '%02d' % idx)
-                except:
-                    split = re.match(r"([a-z]+)", name, re.I).groups()
-                    idx = basenames.count(split[0])
-                    basenames.append(split[0])
-                    lnames.append(split[0] + '%02d' % idx)
-            r['layers'] = lnames
+    return st3d
 
-        if version == 1:
-            r['layers'] = layers
 
-        r['thicknesses'] = cldata[:, 1:nl + 1]
-        if cldata.shape[1] == nl*2 + 1:
-            r['angles'] = cldata[:, nl + 1:2*nl+1 + 2]
-        else:
-            r['angles'] = np.zeros((cldata.shape[0], nl))
-        st3d['regions'].append(r)
-
-    st3d['webs'] = []
-    for i, rname in enumerate(wnames):
-        r = {}
-        layup_file = '_'.join([filebase, rname]) + '.st3d'
-        fid = open(layup_file, 'r')
-        first_line = fid.readline().split()[1:]
-        version = _check_file_version(st3d, first_line)
-        if version == 0:
-            rrname = first_line
-        if version == 1:
-            rrname = fid.readline().split()[1]
-        lheader = fid.readline().split()[1:]
+def _write_layup_file(st3d, rname, reg, filebase):
+    """
+    writes the st3d file with material thicknesses and angles
+    of region or web `rname`
+    """
 
-        cldata = np.loadtxt(fid)
-        layers = lheader[1:]
-        nl = len(layers)
-
-        if version==0:
-            # check that layer names are of the type <%s><%02d>
-            lnames = []
-            basenames = []
-            for name in layers:
-                try:
-                    # numbers in names should be allowed
-                    split = re.match(r"([a-z]+)([0-9]+)", name, re.I).groups()
-                    idx = basenames.count(split[0])
-                    basenames.append(split[0])
-                    lnames.append(split[0] + '%02d' % idx)
-                except:
-                    split = re.match(r"([a-z]+)", name, re.I).groups()
-                    idx = basenames.count(split[0])
-                    basenames.append(split[0])
-                    lnames.append(split[0] + '%02d' % idx)
-            r['layers'] = lnames
+    fname = '_'.join([filebase, rname]) + '.st3d'
+    data = np.array([st3d['s']]).T
+    data = np.append(data, reg['thicknesses'], axis=1)
+    data = np.append(data, reg['angles'], axis=1)
+    with open(fname, 'w') as fid:
+        fid.write('# version %s\n' % st3d['version'])
+        lnames = '    '.join(reg['layers'])
+        fid.write('# %s\n' % rname)
+        fid.write('# s    %s\n' % lnames)
+        np.savetxt(fid, data)
 
-        if version == 1:
-            r['layers'] = layers
-        
-        r['thicknesses'] = cldata[:, 1:nl + 1]
-        if cldata.shape[1] == nl*2 + 1:
-            r['angles'] = cldata[:, nl + 1:2*nl+1 + 2]
-        else:
-            r['angles'] = np.zeros((cldata.shape[0], nl))
-        st3d['webs'].append(r)
 
-    return st3d
+def _write_mat_file(st3d, filebase):
+
+    with open(filebase + '.mat', 'w') as fid:
+        fid.write('# version %s\n' % st3d['version'])
+        fid.write('# %s\n' % (' '.join(st3d['materials'].keys())))
+        fid.write('# E1 E2 E3 nu12 nu13 nu23 G12 G13 G23 rho\n')
+        fmt = ' '.join(10*['%.20e'])
+        np.savetxt(fid, st3d['matprops'], fmt=fmt)
+
+
+def _write_failmat_file(st3d, filebase):
+
+    failcrit = dict(maximum_strain=1, maximum_stress=2, tsai_wu=3)
+    data = np.zeros((st3d['failmat'].shape[0], st3d['failmat'].shape[1]+1))
+    data[:, 0] = [failcrit[mat] for mat in st3d['failcrit']]
+    data[:, 1:] = st3d['failmat']
+    with open(filebase + '.failmat', 'w') as fid:
+        fid.write('# version %s\n' % st3d['version'])
+        fid.write('# %s\n' % (' '.join(st3d['materials'])))
+        fid.write('# failcrit s11_t s22_t s33_t s11_c s22_c s33_c'
+                  't12 t13 t23 e11_t e22_t e33_t e11_c e22_c e33_c g12 g13 g23'
+                  'gM0 C1a C2a C3a C4a\n')
+        fmt = '%i ' + ' '.join(23*['%.20e'])
+        np.savetxt(fid, np.asarray(data), fmt=fmt)
+
+
+def _write_dp3d_file(st3d, filebase):
+
+    data = np.array([st3d['s']]).T
+    data = np.append(data, st3d['DPs'], axis=1)
+    with open(filebase + '.dp3d', 'w') as fid:
+        fid.write('# version %s\n' % st3d['version'])
+        webs = ['web%02d' % i for i in range(len(st3d['webs']))]
+        fid.write('# %s\n' % ('  '.join(webs)))
+        for web in st3d['web_def']:
+            fid.write('# %i %i\n' % (web[0], web[1]))
+        DPs = ['DP%02d' % i for i in range(st3d['DPs'].shape[1])]
+        fid.write('# s %s\n' % (' '.join(DPs)))
+        np.savetxt(fid, data)
 
 
-def write_bladestructure(st3d, filebase):
+def write_bladestructure(st3d, filebase, nworkers=1):
     """
     input file writer for a blade structure definition
 
@@ -221,70 +347,195 @@ def write_bladestructure(st3d, filebase):
         definition of the blade structure
     filebase: str
         data files' basename
+    nworkers: int
+        number of threads formatting and writing the files
     """
 
-    # write material properties
-    fid = open(filebase + '.mat', 'w')
-    fid.write('# version %s\n' % st3d['version'])
-    fid.write('# %s\n' % (' '.join(st3d['materials'].keys())))
-    fid.write('# E1 E2 E3 nu12 nu13 nu23 G12 G13 G23 rho\n')
-    fmt = ' '.join(10*['%.20e'])
-    np.savetxt(fid, st3d['matprops'], fmt=fmt)
+    # material properties, failure criteria and region division points
+    jobs = [(_write_mat_file, st3d, filebase),
+            (_write_failmat_file, st3d, filebase),
+            (_write_dp3d_file, st3d, filebase)]
 
-    failcrit = dict(maximum_strain=1, maximum_stress=2, tsai_wu=3)
-    fid = open(filebase + '.failmat', 'w')
-    fid.write('# version %s\n' % st3d['version'])
-    fid.write('# %s\n' % (' '.join(st3d['materials'])))
-    fid.write('# failcrit s11_t s22_t s33_t s11_c s22_c s33_c'
-              't12 t13 t23 e11_t e22_t e33_t e11_c e22_c e33_c g12 g13 g23'
-              'gM0 C1a C2a C3a C4a\n')
-    data = np.zeros((st3d['failmat'].shape[0], st3d['failmat'].shape[1]+1))
-    data[:, 0] = [failcrit[mat] for mat in st3d['failcrit']]
-    data[:, 1:] = st3d['failmat']
-    fmt = '%i ' + ' '.join(23*['%.20e'])
-    np.savetxt(fid, np.asarray(data), fmt=fmt)
-
-    # write dp3d file with region division points
-    fid = open(filebase + '.dp3d', 'w')
-    fid.write('# version %s\n' % st3d['version'])
-    webs = ['web%02d' % i for i in range(len(st3d['webs']))]
-    fid.write('# %s\n' % ('  '.join(webs)))
-    for web in st3d['web_def']:
-        fid.write('# %i %i\n' % (web[0], web[1]))
-    DPs = ['DP%02d' % i for i in range(st3d['DPs'].shape[1])]
-    fid.write('# s %s\n' % (' '.join(DPs)))
-    data = np.array([st3d['s']]).T
-    data = np.append(data, st3d['DPs'], axis=1)
-    np.savetxt(fid, data)
-    fid.close()
-
-    # write st3d files with material thicknesses and angles
+    # st3d files with material thicknesses and angles
     for i, reg in enumerate(st3d['regions']):
-        rname = 'region%02d' % i
-        fname = '_'.join([filebase, rname]) + '.st3d'
-        fid = open(fname, 'w')
-        fid.write('# version %s\n' % st3d['version'])
-        lnames = '    '.join(reg['layers'])
-        fid.write('# %s\n' % rname)
-        fid.write('# s    %s\n' % lnames)
-        data = np.array([st3d['s']]).T
-        data = np.append(data, reg['thicknesses'], axis=1)
-        data = np.append(data, reg['angles'], axis=1)
-        np.savetxt(fid, data)
-        fid.close()
+        jobs.append((_write_layup_file, st3d, 'region%02d' % i, reg, filebase))
     for i, reg in enumerate(st3d['webs']):
-        rname = 'web%02d' % i
-        fname = '_'.join([filebase, rname]) + '.st3d'
-        fid = open(fname, 'w')
-        fid.write('# version %s\n' % st3d['version'])
-        lnames = '    '.join(reg['layers'])
-        fid.write('# %s\n' % rname)
-        fid.write('# s    %s\n' % lnames)
-        data = np.array([st3d['s']]).T
-        data = np.append(data, reg['thicknesses'], axis=1)
-        data = np.append(data, reg['angles'], axis=1)
-        np.savetxt(fid, data)
-        fid.close()
+        jobs.append((_write_layup_file, st3d, 'web%02d' % i, reg, filebase))
+
+    _map(lambda func, *args: func(*args), jobs, nworkers)
+
+# binary single-file format:
+# magic, header length as uint64, JSON header, arrays aligned to
+# ST3D_BIN_ALIGN bytes and stored contiguously as little-endian float64
+ST3D_BIN_MAGIC = b'FWST3D01'
+ST3D_BIN_EXT = '.st3b'
+ST3D_BIN_ALIGN = 64
+
+
+def _st3d_bin_align(offset):
+    """
+    returns offset rounded up to the next multiple of ST3D_BIN_ALIGN
+    """
+
+    return -(-offset // ST3D_BIN_ALIGN) * ST3D_BIN_ALIGN
+
+
+def _st3d_arrays(st3d):
+    """
+    returns a list of (name, array) of all arrays in st3d
+    """
+
+    arrays = [('s', st3d['s']),
+              ('DPs', st3d['DPs']),
+              ('matprops', st3d['matprops']),
+              ('failmat', st3d['failmat'])]
+    for rtype in ['regions', 'webs']:
+        for i, r in enumerate(st3d[rtype]):
+            arrays.append(('%s%02d_thicknesses' % (rtype, i), r['thicknesses']))
+            arrays.append(('%s%02d_angles' % (rtype, i), r['angles']))
+    return arrays
+
+
+def write_bladestructure_bin(st3d, filename):
+    """
+    writer for the binary single-file blade structure format
+
+    parameters
+    ----------
+    st3d: dict
+        dictionary containing geometric and material properties
+        definition of the blade structure
+    filename: str
+        name of the file, the extension `.st3b` is added if missing
+    """
+
+    if not filename.endswith(ST3D_BIN_EXT):
+        filename += ST3D_BIN_EXT
+
+    materials = sorted(st3d['materials'].keys(), key=lambda m: st3d['materials'][m])
+    header = {'version': st3d['version'],
+              'materials': materials,
+              'failcrit': list(st3d['failcrit']),
+              'web_def': [[int(i) for i in web] for web in st3d['web_def']],
+              'regions': [list(r['layers']) for r in st3d['regions']],
+              'webs': [list(r['layers']) for r in st3d['webs']],
+              'arrays': []}
+
+    arrays = [(name, np.ascontiguousarray(val, dtype='<f8')) for name, val in _st3d_arrays(st3d)]
+    offset = 0
+    for name, val in arrays:
+        header['arrays'].append([name, list(val.shape), offset])
+        offset = _st3d_bin_align(offset + val.nbytes)
+    hdata = json.dumps(header).encode('utf-8')
+    start = _st3d_bin_align(len(ST3D_BIN_MAGIC) + 8 + len(hdata))
+
+    with open(filename, 'wb') as fid:
+        fid.write(ST3D_BIN_MAGIC)
+        fid.write(struct.pack('<Q', len(hdata)))
+        fid.write(hdata)
+        for (name, val), (_, shape, offset) in zip(arrays, header['arrays']):
+            fid.write(b'\0' * (start + offset - fid.tell()))
+            fid.write(val.tostring())
+
+
+def read_bladestructure_bin(filename, mmap_mode='r', fallback=True):
+    """
+    reader for the binary single-file blade structure format
+
+    parameters
+    ----------
+    filename: str
+        name of the binary file
+    mmap_mode: str
+        mode of the memory-mapped arrays, see numpy.memmap.
+        If None the arrays are read into memory.
+    fallback: bool
+        read the text files with basename `filename` stripped
+        of its extension if the binary file does not exist
+
+    returns
+    -------
+    st3d: dict
+        dictionary containing geometric and material properties
+        definition of the blade structure
+    """
+
+    if not os.path.exists(filename):
+        filebase = filename[:-len(ST3D_BIN_EXT)] if filename.endswith(ST3D_BIN_EXT) else filename
+        if os.path.exists(filebase + ST3D_BIN_EXT):
+            filename = filebase + ST3D_BIN_EXT
+        elif fallback:
+            return read_bladestructure(filebase)
+
+    with open(filename, 'rb') as fid:
+        magic = fid.read(len(ST3D_BIN_MAGIC))
+        if magic != ST3D_BIN_MAGIC:
+            raise RuntimeError('%s is not a binary blade structure file' % filename)
+        nh = struct.unpack('<Q', fid.read(8))[0]
+        header = json.loads(fid.read(nh).decode('utf-8'))
+        start = _st3d_bin_align(len(ST3D_BIN_MAGIC) + 8 + nh)
+
+        # map or read the contiguous data block in one go
+        # and return views of the individual arrays
+        size = (os.fstat(fid.fileno()).st_size - start) // 8
+        if size == 0:
+            data = np.zeros(0)
+        elif mmap_mode is None:
+            fid.seek(start)
+            data = np.fromfile(fid, dtype='<f8', count=size)
+        else:
+            data = np.memmap(filename, dtype='<f8', mode=mmap_mode, offset=start, shape=(size,))
+
+    arrays = {}
+    for name, shape, offset in header['arrays']:
+        n = int(np.prod(shape))
+        arrays[name] = data[offset // 8:offset // 8 + n].reshape(shape)
+
+    st3d = {}
+    st3d['version'] = header['version']
+    st3d['materials'] = {str(name): i for i, name in enumerate(header['materials'])}
+    st3d['matprops'] = arrays['matprops']
+    st3d['failmat'] = arrays['failmat']
+    st3d['failcrit'] = [str(crit) for crit in header['failcrit']]
+    st3d['web_def'] = header['web_def']
+    st3d['s'] = arrays['s']
+    st3d['DPs'] = arrays['DPs']
+    for rtype in ['regions', 'webs']:
+        st3d[rtype] = []
+        for i, layers in enumerate(header[rtype]):
+            r = {}
+            r['layers'] = [str(l) for l in layers]
+            r['thicknesses'] = arrays['%s%02d_thicknesses' % (rtype, i)]
+            r['angles'] = arrays['%s%02d_angles' % (rtype, i)]
+            st3d[rtype].append(r)
+
+    return st3d
+
+
+def convert_bladestructure(filebase, filename=None):
+    """
+    convert a blade structure in the text format to
+    the binary single-file format
+
+    parameters
+    ----------
+    filebase: str
+        text data files' basename
+    filename: str
+        name of the binary file, defaults to `<filebase>.st3b`
+
+    returns
+    -------
+    filename: str
+        name of the binary file
+    """
+
+    if filename is None:
+        filename = filebase
+    if not filename.endswith(ST3D_BIN_EXT):
+        filename += ST3D_BIN_EXT
+    write_bladestructure_bin(read_bladestructure(filebase), filename)
+    return filename
 
 
 def interpolate_bladestructure(st3d, s_new):
@@ -317,46 +568,103 @@ def interpolate_bladestructure(st3d, s_new):
     st3dn['regions'] = []
     st3dn['webs'] = []
 
-    DPs = np.zeros((s_new.shape[0], st3d['DPs'].shape[1]))
-    for i in range(st3d['DPs'].shape[1]):
-        tck = pchip(sorg, st3d['DPs'][:, i])
-        DPs[:, i] = tck(s_new)
-    st3dn['DPs'] = DPs
-
-    for r in st3d['regions']:
-        rnew = {}
-        rnew['layers'] = r['layers']
-        Ts = r['thicknesses']
-        As = r['angles']
-        tnew = np.zeros((s_new.shape[0], Ts.shape[1]))
-        anew = np.zeros((s_new.shape[0], As.shape[1]))
-        for i in range(Ts.shape[1]):
-            tck = pchip(sorg, Ts[:, i])
-            tnew[:, i] = tck(s_new)
-            tck = pchip(sorg, As[:, i])
-            anew[:, i] = tck(s_new)
-        rnew['thicknesses'] = tnew.copy()
-        rnew['angles'] = anew.copy()
-        st3dn['regions'].append(rnew)
-    for r in st3d['webs']:
+    # stack all DPs and layer arrays into one array and
+    # interpolate all columns in a single batch
+    regs = st3d['regions'] + st3d['webs']
+    data = [st3d['DPs']]
+    for r in regs:
+        data.extend([r['thicknesses'], r['angles']])
+    ncols = np.cumsum([0] + [d.shape[1] for d in data])
+    datan = pchip_interpolate(sorg, np.concatenate(data, axis=1), s_new)
+
+    st3dn['DPs'] = datan[:, ncols[0]:ncols[1]].copy()
+    for i, r in enumerate(regs):
         rnew = {}
         rnew['layers'] = r['layers']
-        Ts = r['thicknesses']
-        As = r['angles']
-        tnew = np.zeros((s_new.shape[0], Ts.shape[1]))
-        anew = np.zeros((s_new.shape[0], As.shape[1]))
-        for i in range(Ts.shape[1]):
-            tck = pchip(sorg, Ts[:, i])
-            tnew[:, i] = tck(s_new)
-            tck = pchip(sorg, As[:, i])
-            anew[:, i] = tck(s_new)
-        rnew['thicknesses'] = tnew.copy()
-        rnew['angles'] = anew.copy()
-        st3dn['webs'].append(rnew)
+        rnew['thicknesses'] = datan[:, ncols[2*i+1]:ncols[2*i+2]].copy()
+        rnew['angles'] = datan[:, ncols[2*i+2]:ncols[2*i+3]].copy()
+        if i < len(st3d['regions']):
+            st3dn['regions'].append(rnew)
+        else:
+            st3dn['webs'].append(rnew)
 
     return st3dn
 
 
+class PackedBladeStructure(Component):
+    """
+    Assembles the packed DP, thickness and angle arrays from their
+    base arrays, replacing the columns of splined variables.
+
+    parameters
+    ----------
+    DPs_base: array
+        (nsec, nDP) base DP curves
+    thicknesses_base: array
+        (nsec, nlayers_total) base layer thicknesses of all regions and webs
+    angles_base: array
+        (nsec, nlayers_total) base layer angles of all regions and webs
+    <name>: array
+        splined variables replacing their column in the packed arrays
+
+    returns
+    -------
+    DPs: array
+        (nsec, nDP) DP curves
+    thicknesses: array
+        (nsec, nlayers_total) layer thicknesses
+    angles: array
+        (nsec, nlayers_total) layer angles
+    """
+
+    def __init__(self, base, packed_slices, splined):
+        """
+        parameters
+        ----------
+        base: dict
+            base arrays with keys `DPs`, `thicknesses` and `angles`
+        packed_slices: dict
+            (array name, column) of each named variable
+        splined: list
+            names of the splined variables
+        """
+        super(PackedBladeStructure, self).__init__()
+
+        self._splined = [(name,) + packed_slices[name] for name in splined]
+
+        for name, val in base.iteritems():
+            self.add_param(name + '_base', val)
+            self.add_output(name, val)
+
+        for name, array, col in self._splined:
+            self.add_param(name, base[array][:, col])
+
+        # partials are constant, so compute them once
+        self._J = {}
+        for name, val in base.iteritems():
+            mask = np.ones(val.shape)
+            for vname, array, col in self._splined:
+                if array == name:
+                    mask[:, col] = 0.
+            self._J[name, name + '_base'] = diags(mask.flatten())
+        for name, array, col in self._splined:
+            nsec, ncol = base[array].shape
+            self._J[array, name] = coo_matrix((np.ones(nsec),
+                                               (np.arange(nsec) * ncol + col, np.arange(nsec))),
+                                              shape=(nsec * ncol, nsec)).tocsr()
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        for name in ['DPs', 'thicknesses', 'angles']:
+            unknowns[name] = params[name + '_base']
+        for name, array, col in self._splined:
+            unknowns[array][:, col] = params[name]
+
+    def linearize(self, params, unknowns, resids):
+
+        return self._J
+
+
 class SplinedBladeStructure(Group):
     """
     class that adds structural geometry variables to the analysis
@@ -364,18 +672,31 @@ class SplinedBladeStructure(Group):
     or arrays according to the initial structural data
     """
 
-    def __init__(self, st3d):
+    def __init__(self, st3d, batch_splines=False, packed=False):
         """
         parameters
         ----------
         st3d: dict
             dictionary with blade structural definition
+        batch_splines: bool
+            evaluate all splines sharing the same control point locations
+            and spline type in a single MultiFFDSpline component
+            added in configure
+        packed: bool
+            add the DPs and layer thicknesses and angles as three packed
+            arrays `DPs` (nsec, nDP), `thicknesses` and `angles`
+            (nsec, nlayers_total) instead of one variable per column.
+            The column of a named variable is given by `packed_slices`.
         """
         super(SplinedBladeStructure, self).__init__()
 
         self._vars = []
         self._allvars = []
         self.st3dinit = st3d
+        self._batch_splines = batch_splines
+        self._splines = []
+        self._packed = packed
+        self.packed_slices = {}
 
         # add materials properties array ((10, nmat))
         self.add('matprops_c', IndepVarComp('matprops', st3d['matprops']), promotes=['*'])
@@ -383,9 +704,45 @@ class SplinedBladeStructure(Group):
         # add materials strength properties array ((18, nmat))
         self.add('failmat_c', IndepVarComp('failmat', st3d['failmat']), promotes=['*'])
 
+    def _decode_name(self, name):
+        """
+        returns the initial distribution of the structural
+        variable `name`
+        """
+
+        st3d = self.st3dinit
+        if 'DP' in name:
+            try:
+                iDP = int(re.match(r"([a-z]+)([0-9]+)", name, re.I).groups()[-1])
+            except:
+                raise RuntimeError('Variable name %s not understood' % name)
+            return st3d['DPs'][:, iDP]
+
+        if name.startswith('r') or name.startswith('w'):
+            ireg = int(name[1:3])
+            try:
+                split = re.match(r"([a-z]+)([0-9]+)([a-z]+)", name[3:], re.I).groups()
+            except:
+                split = re.match(r"([a-z]+)([a-z]+)", name[3:], re.I).groups()
+            layername = split[0]+split[1]
+            stype = split[-1]
+        else:
+            raise RuntimeError('Variable name %s not understood' % name)
+
+        if name.startswith('r'):
+            r = st3d['regions'][ireg]
+        elif name.startswith('w'):
+            r = st3d['webs'][ireg]
+
+        ilayer = r['layers'].index(layername)
+        if stype == 'T':
+            return r['thicknesses'][:, ilayer]
+        elif stype == 'A':
+            return r['angles'][:, ilayer]
+
     def add_spline(self, name, Cx, spline_type='bezier', scaler=1.):
         """
-        adds a 1D FFDSpline for the given variable
+        adds a MultiFFDSpline for the given variable(s)
         with user defined spline type and control point locations.
 
         parameters
@@ -410,78 +767,35 @@ class SplinedBladeStructure(Group):
         which controls both thicknesses as a group.
         """
 
-        st3d = self.st3dinit
         if isinstance(name, str):
             names = [name]
         else:
-            names = name
-        # decode the name
-        if 'DP' in names[0]:
-            tvars = []
-            for name in names:
-                try:
-                    iDP = int(re.match(r"([a-z]+)([0-9]+)", name, re.I).groups()[-1])
-                except:
-                    raise RuntimeError('Variable name %s not understood' % name)
-
-                var = st3d['DPs'][:, iDP]
-                c = self.add(name + '_s', FFDSpline(name, st3d['s'],
-                                                          var,
-                                                          Cx, scaler=scaler),
-                                                          promotes=[name])
-                c.spline_options['spline_type'] = spline_type
-                tvars.append(name)
-            self._vars.extend(tvars)
-
-            # add the IndepVarComp
-            self.add(names[0] + '_c', IndepVarComp(names[0] + '_C', np.zeros(len(Cx))), promotes=['*'])
-            for varname in tvars:
-                self.connect(names[0] + '_C', varname + '_s.' + varname + '_C')
+            names = list(name)
+        cname = names[0] + '_C'
+        spls = [(varname, Cx, spline_type, scaler, cname) for varname in names]
+        self._vars.extend(names)
+
+        # add the IndepVarComp
+        self.add(names[0] + '_c', IndepVarComp(cname, np.zeros(len(Cx))), promotes=['*'])
+
+        if self._batch_splines:
+            self._splines.extend(spls)
         else:
-            tvars = []
-
-            for name in names:
-                if name.startswith('r') or name.startswith('w'):
-                    l_index = None
-                    # try:
-                    ireg = int(name[1:3])
-                    try:
-                        split = re.match(r"([a-z]+)([0-9]+)([a-z]+)", name[3:], re.I).groups()
-                        l_index = split[1]
-                    except:
-                        split = re.match(r"([a-z]+)([a-z]+)", name[3:], re.I).groups()
-                    layername = split[0]+split[1]
-                    stype = split[-1]
-                    # except:
-                    #     raise RuntimeError('Variable name %s not understood' % name)
-                else:
-                    raise RuntimeError('Variable name %s not understood' % name)
-
-                if name.startswith('r'):
-                    r = st3d['regions'][ireg]
-                    rname = 'r%02d' % ireg
-                elif name.startswith('w'):
-                    r = st3d['webs'][ireg]
-                    rname = 'w%02d' % ireg
-
-                varname = '%s%s%s' % (rname, layername, stype)
-                ilayer = r['layers'].index(layername)
-                if stype == 'T':
-                    var = r['thicknesses'][:, ilayer]
-                elif stype == 'A':
-                    var = r['angles'][:, ilayer]
-                c = self.add(name + '_s', FFDSpline(name, st3d['s'],
-                                                       var,
-                                                       Cx, scaler=scaler),
-                                                       promotes=[name])
-                c.spline_options['spline_type'] = spline_type
-                tvars.append(name)
-
-            self._vars.extend(tvars)
-            # finally add the IndepVarComp and make the connections
-            self.add(names[0] + '_c', IndepVarComp(names[0] + '_C', np.zeros(len(Cx))), promotes=['*'])
-            for varname in tvars:
-                self.connect(names[0] + '_C', varname + '_s.' + varname + '_C')
+            self._add_ffd(names[0] + '_s', spls)
+
+    def _add_ffd(self, name, spls):
+        """
+        add a MultiFFDSpline evaluating the spline definitions `spls`
+        which share the same control point locations and spline type
+        """
+
+        st3d = self.st3dinit
+        promotes = [spl[0] for spl in spls]
+        promotes.extend(set([spl[4] for spl in spls]))
+        c = self.add(name, MultiFFDSpline(st3d['s'], spls[0][1], spls[0][2]),
+                     promotes=promotes)
+        for varname, Cx, spline_type, scaler, C in spls:
+            c.add_spline(varname, self._decode_name(varname), cname=C, scaler=scaler)
 
     def configure(self):
         """
@@ -489,6 +803,13 @@ class SplinedBladeStructure(Group):
         """
         st3d = self.st3dinit
 
+        for i, spls in enumerate(group_splines(self._splines)):
+            self._add_ffd('ffd%02d_s' % i, spls)
+
+        if self._packed:
+            self._configure_packed()
+            return
+
         for i in range(st3d['DPs'].shape[1]):
             varname = 'DP%02d' % i
             var = st3d['DPs'][:, i]
@@ -510,6 +831,62 @@ class SplinedBladeStructure(Group):
                 if varname+'A' not in self._vars:
                     self.add(varname + 'A_c', IndepVarComp(varname + 'A', reg['angles'][:, i]), promotes=['*'])
 
+    def _configure_packed(self):
+        """
+        add the packed base arrays and the component assembling
+        them with the splined variables
+        """
+        st3d = self.st3dinit
+
+        for i in range(st3d['DPs'].shape[1]):
+            self.packed_slices['DP%02d' % i] = ('DPs', i)
+        k = 0
+        layers = []
+        for prefix, regs in [('r', st3d['regions']), ('w', st3d['webs'])]:
+            for ireg, reg in enumerate(regs):
+                for lname in reg['layers']:
+                    varname = '%s%02d%s' % (prefix, ireg, lname)
+                    self.packed_slices[varname + 'T'] = ('thicknesses', k)
+                    self.packed_slices[varname + 'A'] = ('angles', k)
+                    k += 1
+                layers.append(reg)
+
+        base = {}
+        base['DPs'] = st3d['DPs']
+        base['thicknesses'] = np.concatenate([r['thicknesses'] for r in layers], axis=1)
+        base['angles'] = np.concatenate([r['angles'] for r in layers], axis=1)
+        self._packed_shapes = {}
+        for name, val in base.iteritems():
+            self._packed_shapes[name] = val.shape
+            self.add(name + '_base_c', IndepVarComp(name + '_base', val.copy()), promotes=['*'])
+
+        self.add('packed_st', PackedBladeStructure(base, self.packed_slices, self._vars),
+                 promotes=['*'])
+
+    def src_indices(self, name):
+        """
+        returns the flat indices of the variable `name` in its packed array,
+        to be used as `src_indices` when connecting it to a component
+        that expects a single (nsec,) array
+
+        examples
+        --------
+        | root.connect('DPs', 'st_props.DP04', src_indices=st.src_indices('DP04'))
+        """
+
+        array, col = self.packed_slices[name]
+        nsec, ncol = self._packed_shapes[array]
+        return np.arange(nsec) * ncol + col
+
+    def view(self, name):
+        """
+        returns a view of the variable `name` in its packed array,
+        only available after setup
+        """
+
+        array, col = self.packed_slices[name]
+        return self.unknowns[array][:, col]
+
 
 class BladeStructureProperties(Component):
     """
@@ -549,7 +926,7 @@ class BladeStructureProperties(Component):
         global coordinate system
     """
 
-    def __init__(self, sdim, st3d, capDPs):
+    def __init__(self, sdim, st3d, capDPs, engine=None, cache_size=8):
         """
         sdim: tuple
             size of array containing lofted blade surface:
@@ -558,9 +935,27 @@ class BladeStructureProperties(Component):
             dictionary containing parametric blade structure.
         capDPs: list
             list of indices of DPs with webs attached to them.
+        engine: str
+            engine used for computing the DP positions on the cross sections:
+            | pgl: spline based PGL AirfoilShape per cross section
+            | native: all cross sections in one batch with linear
+            interpolation along the discrete cross sections.
+            Defaults to pgl if installed, otherwise native.
+        cache_size: int
+            number of cross section parameterisations kept in the cache,
+            keyed on a hash of blade_surface_st.
         """
         super(BladeStructureProperties, self).__init__()
 
+        if engine is None:
+            engine = 'pgl' if _PGL_installed else 'native'
+        if engine not in ['pgl', 'native']:
+            raise ValueError('engine must be pgl or native, got %s' % engine)
+        self.engine = engine
+        # analytic partials are only available for the native engine
+        if engine == 'pgl':
+            self.deriv_options['type'] = 'fd'
+
         s = st3d['s']
         self.nsec = s.shape[0]
         self.ni_chord = sdim[0]
@@ -610,19 +1005,256 @@ class BladeStructureProperties(Component):
         self.dp_xyz = np.zeros([self.nsec, self.nDP, 3])
         self.dp_s01 = np.zeros([self.nsec, self.nDP])
 
-    def solve_nonlinear(self, params, unknowns, resids):
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def clear_cache(self):
+        """
+        empty the cache of cross section parameterisations
+        """
+
+        self._cache.clear()
+
+    def _parameterize(self, surf):
+        """
+        returns the parameterisation of the cross sections of `surf`,
+        reusing the cached one if the surface is unchanged
+        """
+
+        key = (surf.dtype.str, hashlib.sha1(np.ascontiguousarray(surf)).hexdigest())
+        try:
+            param = self._cache.pop(key)
+        except KeyError:
+            if self.engine == 'pgl':
+                param = self._parameterize_pgl(surf)
+            else:
+                param = self._parameterize_native(surf)
+        self._cache[key] = param
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return param
+
+    def _parameterize_pgl(self, surf):
+        """
+        returns a PGL AirfoilShape per cross section
+        """
+
+        return [AirfoilShape(points=surf[:, i, :]) for i in range(self.nsec)]
+
+    def _compute_dps_pgl(self, afs, DPs):
+        """
+        computes the DP positions using a PGL AirfoilShape per cross section
+        """
 
         smax = np.zeros(self.nsec)
         for i in range(self.nsec):
-            x = params['blade_surface_st'][:, i, :]
-            af = AirfoilShape(points=x)
+            af = afs[i]
             smax[i] = af.smax
             for j in range(self.nDP):
-                DP = params['DP%02d' % j][i]
-                DPs01 = af.s_to_01(DP)
+                DPs01 = af.s_to_01(DPs[i, j])
                 self.dp_s01[i, j] = DPs01
                 DPxyz = af.interp_s(DPs01)
                 self.dp_xyz[i, j, :] = DPxyz
+        return smax
+
+    def _parameterize_native(self, surf):
+        """
+        returns the cross sections, their normalised running length, total
+        length and leading edge positions
+        """
+
+        # (nsec, ni_chord, 3) cross sections, copied since surf
+        # is a view of the parameter vector
+        x = surf.swapaxes(0, 1).copy()
+        s, smax = normalized_arc_length(x)
+
+        # leading edge is the point furthest from the trailing edge
+        te = (x[:, 0] + x[:, -1]) / 2.
+        iLE = np.argmax(((x - te[:, np.newaxis])**2).real.sum(axis=2), axis=1)
+        sLE = s[np.arange(self.nsec), iLE][:, np.newaxis]
+        return x, s, smax, sLE, iLE
+
+    def _compute_dps_native(self, param, DPs):
+        """
+        computes the DP positions for all cross sections in one batch
+        """
+
+        x, s, smax, sLE, iLE = param
+
+        # DPs in [-1, 1] with the leading edge at 0 to s in [0, 1]
+        s01 = np.where(DPs.real < 0., (DPs + 1.) * sLE, DPs * (1. - sLE) + sLE)
+        self.dp_s01 = s01
+
+        # interpolate all DPs linearly along the segments
+        self.dp_xyz, j, t = interp_arc_length(x, s, s01, segments=True)
+        self._dp_segments = (DPs, j, t)
+        return smax
+
+    def _dps_jacobian_native(self, param):
+        """
+        derivatives of the DP positions computed by `_compute_dps_native`
+
+        returns
+        -------
+        ds01_dDP: array
+            (nsec, nDP) derivatives of dp_s01 w.r.t. the DPs
+        dxyz_dDP: array
+            (nsec, nDP, 3) derivatives of dp_xyz w.r.t. the DPs
+        ds01_dx: array
+            (nsec, nDP, ni_chord, 3) derivatives of dp_s01 w.r.t. the
+            points of each cross section
+        dsmax_dx: array
+            (nsec, ni_chord, 3) derivatives of the cross section lengths
+        dxyz_dx: array
+            (nsec, nDP, 3, ni_chord, 3) derivatives of dp_xyz w.r.t.
+            the points of each cross section
+        """
+
+        x, s, smax, sLE, iLE = param
+        DPs, j, t = self._dp_segments
+        ni = self.ni_chord
+        isec = np.arange(self.nsec)[:, np.newaxis]
+        iDP = np.arange(self.nDP)
+
+        # each segment length depends on the unit vector along the segment
+        d = x[:, 1:] - x[:, :-1]
+        e = d / np.sqrt((d**2).sum(axis=2))[:, :, np.newaxis]
+        eplus = np.zeros(x.shape, dtype=x.dtype)
+        eplus[:, 1:] = e
+        eminus = np.zeros(x.shape, dtype=x.dtype)
+        eminus[:, :-1] = e
+        dsmax_dx = eplus - eminus
+
+        def ds_dx(m):
+            # derivatives of the normalised running length at points m
+            ip = np.arange(ni)
+            plus = (ip >= 1) & (ip <= m[:, :, np.newaxis])
+            minus = ip <= m[:, :, np.newaxis] - 1
+            dS = plus[:, :, :, np.newaxis] * eplus[:, np.newaxis] - \
+                 minus[:, :, :, np.newaxis] * eminus[:, np.newaxis]
+            dS -= s[isec, m][:, :, np.newaxis, np.newaxis] * dsmax_dx[:, np.newaxis]
+            return dS / smax[:, np.newaxis, np.newaxis, np.newaxis]
+
+        dsLE = ds_dx(iLE[:, np.newaxis])
+        neg = DPs.real < 0.
+        ds01_dx = np.where(neg, DPs + 1., 1. - DPs)[:, :, np.newaxis, np.newaxis] * dsLE
+        ds01_dDP = np.where(neg, sLE, 1. - sLE)
+
+        h = s[isec, j + 1] - s[isec, j]
+        dsj = ds_dx(j)
+        dt_dx = (ds01_dx - dsj - t[:, :, np.newaxis, np.newaxis] * (ds_dx(j + 1) - dsj)) / \
+                h[:, :, np.newaxis, np.newaxis]
+        dx_seg = x[isec, j + 1] - x[isec, j]
+        dxyz_dx = dx_seg[:, :, :, np.newaxis, np.newaxis] * dt_dx[:, :, np.newaxis]
+        for c in range(3):
+            dxyz_dx[isec, iDP, c, j, c] += 1. - t
+            dxyz_dx[isec, iDP, c, j + 1, c] += t
+        dxyz_dDP = dx_seg * (ds01_dDP / h)[:, :, np.newaxis]
+
+        return ds01_dDP, dxyz_dDP, ds01_dx, dsmax_dx, dxyz_dx
+
+    def _surf_jacobian(self, dQ):
+        """
+        converts the (nsec, ncomp, ni_chord, 3) derivatives of a (nsec, ncomp)
+        output w.r.t. the points of each cross section into a sparse
+        Jacobian w.r.t. blade_surface_st
+        """
+
+        nsec, ncomp, ni = dQ.shape[:3]
+        i, k, ip, c = np.indices(dQ.shape)
+        rows = i * ncomp + k
+        cols = (ip * nsec + i) * 3 + c
+        return coo_matrix((dQ.flatten(), (rows.flatten(), cols.flatten())),
+                          shape=(nsec * ncomp, ni * nsec * 3)).tocsr()
+
+    def _dp_jacobian(self, dQ):
+        """
+        converts the (nsec, ncomp) derivatives of a (nsec, ncomp) output
+        w.r.t. a DP curve into a sparse Jacobian
+        """
+
+        nsec, ncomp = dQ.shape
+        i, k = np.indices(dQ.shape)
+        return coo_matrix((dQ.flatten(), ((i * ncomp + k).flatten(), i.flatten())),
+                          shape=(nsec * ncomp, nsec)).tocsr()
+
+    def linearize(self, params, unknowns, resids):
+        """
+        partials of the native engine, block diagonal per cross section
+        except for the curvatures. Only used if engine == 'native',
+        the pgl engine is finite differenced.
+        """
+
+        J = {}
+
+        def add(key, val):
+            if key in J:
+                J[key] = J[key] + val
+            else:
+                J[key] = val
+
+        param = self._parameterize(params['blade_surface_st'])
+        ds01_dDP, dxyz_dDP, ds01_dx, dsmax_dx, dxyz_dx = self._dps_jacobian_native(param)
+        smax = param[2]
+        capDPs = [i % self.nDP for i in self.capDPs]
+
+        # pitch axis aft cap centers and their curvatures
+        for side, (c0, c1) in [('l', capDPs[:2]), ('u', capDPs[2:])]:
+            name = 'pacc_' + side
+            Jx = self._surf_jacobian(0.5 * (dxyz_dx[:, c0, :2] + dxyz_dx[:, c1, :2]))
+            J[name, 'blade_surface_st'] = Jx
+            dcurv = curvature_jacobian(unknowns[name])
+            J[name + '_curv', 'blade_surface_st'] = csr_matrix(dcurv[:, :, 0]).dot(Jx[0::2]) + \
+                                                    csr_matrix(dcurv[:, :, 1]).dot(Jx[1::2])
+            for iDP in [c0, c1]:
+                dp = 'DP%02d' % iDP
+                add((name, dp), self._dp_jacobian(0.5 * dxyz_dDP[:, iDP, :2]))
+                add((name + '_curv', dp), dcurv[:, :, 0] * 0.5 * dxyz_dDP[:, iDP, 0] +
+                                          dcurv[:, :, 1] * 0.5 * dxyz_dDP[:, iDP, 1])
+
+        # web angles and offsets
+        for i, iw in enumerate(self.web_def):
+            i0, i1 = iw[0] % self.nDP, iw[1] % self.nDP
+            name = 'web_offset%02d' % i
+            Jx = self._surf_jacobian(dxyz_dx[:, i0, :2] - dxyz_dx[:, i1, :2])
+            J[name, 'blade_surface_st'] = Jx
+            offset = unknowns[name]
+            r2 = offset[:, 0]**2 + offset[:, 1]**2
+            da0 = -offset[:, 1] / r2 * 180. / np.pi
+            da1 = offset[:, 0] / r2 * 180. / np.pi
+            J['web_angle%02d' % i, 'blade_surface_st'] = diags(da0).dot(Jx[0::2]) + \
+                                                        diags(da1).dot(Jx[1::2])
+            for iDP, sign in [(i0, 1.), (i1, -1.)]:
+                dp = 'DP%02d' % iDP
+                add((name, dp), self._dp_jacobian(sign * dxyz_dDP[:, iDP, :2]))
+                add(('web_angle%02d' % i, dp), diags(sign * (da0 * dxyz_dDP[:, iDP, 0] +
+                                                             da1 * dxyz_dDP[:, iDP, 1])))
+
+        # region widths
+        for i in range(self.nDP-1):
+            name = 'r%02d_width' % i
+            dw = (ds01_dx[:, i+1] - ds01_dx[:, i]) * smax[:, np.newaxis, np.newaxis] + \
+                 (self.dp_s01[:, i+1] - self.dp_s01[:, i])[:, np.newaxis, np.newaxis] * dsmax_dx
+            J[name, 'blade_surface_st'] = self._surf_jacobian(dw[:, np.newaxis])
+            J[name, 'DP%02d' % i] = diags(-ds01_dDP[:, i] * smax)
+            J[name, 'DP%02d' % (i+1)] = diags(ds01_dDP[:, i+1] * smax)
+
+        # region thicknesses, web layer thicknesses w%02d<layer>T have no outputs
+        for i, reg in enumerate(self._regions):
+            for lname in reg:
+                J['r%02d_thickness' % i, lname + 'T'] = diags((params[lname + 'T'] > 0.) * 1.)
+
+        return J
+
+    def solve_nonlinear(self, params, unknowns, resids):
+
+        surf = params['blade_surface_st']
+        DPs = np.array([params['DP%02d' % j] for j in range(self.nDP)]).T
+        param = self._parameterize(surf)
+        if self.engine == 'pgl':
+            smax = self._compute_dps_pgl(param, DPs)
+        else:
+            smax = self._compute_dps_native(param, DPs)
 
         # upper and lower side pitch axis aft cap center
         unknowns['pacc_l'][:, :] = (self.dp_xyz[:, self.capDPs[0], [0,1]] + \
@@ -631,14 +1263,15 @@ class BladeStructureProperties(Component):
                                     self.dp_xyz[:, self.capDPs[3], [0,1]]) / 2.
 
         # curvatures of region boundary curves
-        unknowns['pacc_l_curv'] = curvature(unknowns['pacc_l'])
-        unknowns['pacc_u_curv'] = curvature(unknowns['pacc_u'])
+        curv = batch_curvature(np.array([unknowns['pacc_l'], unknowns['pacc_u']]))
+        unknowns['pacc_l_curv'] = curv[0]
+        unknowns['pacc_u_curv'] = curv[1]
 
         # web angles and offsets relative to rotor plane
         for i, iw in enumerate(self.web_def):
             offset = self.dp_xyz[:, iw[0], [0,1]] -\
                      self.dp_xyz[:, iw[1], [0,1]]
-            angle = -np.array([np.arctan(a) for a in offset[:, 0]/offset[:, 1]]) * 180. / np.pi
+            angle = -np.arctan(offset[:, 0] / offset[:, 1]) * 180. / np.pi
             unknowns['web_offset%02d' % i] = offset
             unknowns['web_angle%02d' % i] = angle
 
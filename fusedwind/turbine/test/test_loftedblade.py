@@ -0,0 +1,196 @@
+import numpy as np
+import unittest
+import os
+import pkg_resources
+from scipy.interpolate import pchip
+
+from openmdao.api import Problem, Group
+
+from fusedwind.lib.geom_tools import RotXYZ
+from fusedwind.turbine.geometry import read_blade_planform, PGLLoftedBladeSurface
+from fusedwind.turbine.loftedblade import redistribute_airfoil, BlendAirfoilShapes
+
+PATH = pkg_resources.resource_filename('fusedwind', 'turbine/test')
+
+blend_var = np.array([0.241, 0.301, 0.36, 1.0])
+
+
+def base_airfoils():
+
+    return [np.loadtxt(os.path.join(PATH, 'data', f)) for f in
+            ['ffaw3241.dat', 'ffaw3301.dat', 'ffaw3360.dat', 'cylinder.dat']]
+
+
+def configure(nsec=8, **kwargs):
+
+    pf = read_blade_planform(os.path.join(PATH, 'data/DTU_10MW_RWT_blade_axis_prebend.dat'))
+    s_new = np.linspace(0, 1, nsec)
+
+    cfg = {}
+    cfg['blend_var'] = blend_var
+    cfg['base_airfoils'] = base_airfoils()
+    d = PGLLoftedBladeSurface(cfg, size_in=nsec, size_out=(200, nsec, 3), suffix='_st',
+                              engine='native', **kwargs)
+    p = Problem(root=Group())
+    p.root.add('blade_surf', d, promotes=['*'])
+    p.setup(check=False)
+    for k in d._pf_names:
+        p[k + '_st'] = pchip(pf['s'], pf[k])(s_new)
+
+    return p
+
+
+class NativeLoftedBladeSurfaceTestCase(unittest.TestCase):
+
+    def test_redistribute_airfoil(self):
+
+        af = base_airfoils()[0]
+        points = redistribute_airfoil(af, 101)
+
+        self.assertEqual(points.shape, (101, 2))
+        self.assertEqual(np.testing.assert_array_almost_equal(points[[0, -1]], af[[0, -1]], decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(points[50], af[np.argmin(af[:, 0])], decimal=12), None)
+
+    def test_blend(self):
+
+        afs = base_airfoils()
+        b = BlendAirfoilShapes(afs, blend_var, 200)
+        b.initialize()
+        points = b(blend_var)
+
+        self.assertEqual(points.shape, (4, 200, 2))
+        for i, af in enumerate(afs):
+            self.assertEqual(np.testing.assert_array_almost_equal(points[i], redistribute_airfoil(af, 200), decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(b(blend_var[i]), points[i], decimal=12), None)
+        # the blend variable is clipped to the range of the base airfoils
+        self.assertEqual(np.testing.assert_array_almost_equal(b(0.2), points[0], decimal=12), None)
+
+    def test_surf(self):
+
+        p = configure()
+        p.run()
+        surf = p['blade_surface_st']
+        surfnorot = p['blade_surface_norm_st']
+        chord = p['chord_st']
+        center = np.array([p['x_st'], p['y_st'], p['z_st']]).T
+
+        self.assertAlmostEqual(np.sum(surf), 774.8911972933286, places=6)
+        self.assertEqual(np.testing.assert_array_almost_equal(surf[:, :, 2].mean(axis=0), p['z_st'], decimal=2), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(surfnorot[:, :, 2], np.tile(p['z_st'], (200, 1)), decimal=14), None)
+        self.assertEqual(np.testing.assert_array_almost_equal((surfnorot[:, :, 0].max(axis=0) - surfnorot[:, :, 0].min(axis=0)) / chord,
+                                                              np.ones(8), decimal=2), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(surfnorot[100, :, 0],
+                                                              p['x_st'] + p['p_le_st'] * chord, decimal=4), None)
+
+        rot = RotXYZ(p['rot_x_st'], p['rot_y_st'], p['rot_z_st'])
+        for i in range(8):
+            self.assertEqual(np.testing.assert_array_almost_equal(surf[:, i] - center[i],
+                                                                  np.dot(surfnorot[:, i] - center[i], rot[i].T), decimal=14), None)
+
+    def test_incremental(self):
+
+        p = configure()
+        p.root.blade_surf.loft_options['incremental'] = True
+        p.run()
+        self.assertEqual(p.root.blade_surf.lofted_sections.shape[0], 8)
+
+        rthick = p['rthick_st'].copy()
+        rthick[[2, 3]] *= 1.05
+        p['rthick_st'] = rthick
+        p.run()
+        self.assertEqual(np.testing.assert_array_equal(p.root.blade_surf.lofted_sections, [2, 3]), None)
+
+        pf = configure()
+        pf['rthick_st'] = rthick
+        pf.run()
+        self.assertEqual(np.testing.assert_array_almost_equal(p['blade_surface_st'], pf['blade_surface_st'], decimal=14), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['blade_surface_norm_st'], pf['blade_surface_norm_st'], decimal=14), None)
+
+        p.run()
+        self.assertEqual(p.root.blade_surf.lofted_sections.shape[0], 0)
+
+    def test_interpolator_cache(self):
+
+        p1 = configure()
+        p2 = configure(nsec=5)
+        p1.run()
+        p2.run()
+        self.assertTrue(p1.root.blade_surf.pgl_surf.interpolator is
+                        p2.root.blade_surf.pgl_surf.interpolator)
+
+    def test_parallel(self):
+
+        p = configure(nsec=20)
+        rthick0 = p['rthick_st'].copy()
+        for pool in ['thread', 'process']:
+            p['rthick_st'] = rthick0
+            p.run()
+            pp = configure(nsec=20)
+            pp.root.blade_surf.loft_options['nworkers'] = 3
+            pp.root.blade_surf.loft_options['pool'] = pool
+            pp.root.blade_surf.loft_options['incremental'] = True
+            pp.run()
+            workers = pp.root.blade_surf._lofting_pool._workers
+            self.assertEqual(np.testing.assert_array_equal(pp['blade_surface_st'], p['blade_surface_st']), None)
+            self.assertEqual(np.testing.assert_array_equal(pp['blade_surface_norm_st'], p['blade_surface_norm_st']), None)
+
+            rthick = pp['rthick_st'].copy()
+            rthick[[4, 11, 12]] *= 1.05
+            pp['rthick_st'] = rthick
+            pp.run()
+            self.assertEqual(np.testing.assert_array_equal(pp.root.blade_surf.lofted_sections, [4, 11, 12]), None)
+            p['rthick_st'] = rthick
+            p.run()
+            self.assertEqual(np.testing.assert_array_equal(pp['blade_surface_st'], p['blade_surface_st']), None)
+            self.assertEqual(np.testing.assert_array_equal(pp['blade_surface_norm_st'], p['blade_surface_norm_st']), None)
+            # the pool is kept between calls
+            self.assertTrue(pp.root.blade_surf._lofting_pool._workers is workers)
+            pp.root.blade_surf.close()
+            self.assertTrue(pp.root.blade_surf._lofting_pool is None)
+
+    def test_parallel_whole_blade(self):
+
+        p = configure()
+        p.run()
+        # spanwise indexed distributions are lofted as a whole in one call,
+        # here only the dispatch is tested since the native engine does not support them
+        pp = configure()
+        pp.root.blade_surf.config['gf_heights'] = np.zeros((8, 3))
+        pp.root.blade_surf.loft_options['nworkers'] = 3
+        pp.root.blade_surf.loft_options['incremental'] = True
+        pp.run()
+        self.assertTrue(pp.root.blade_surf._lofting_pool is None)
+        self.assertEqual(np.testing.assert_array_equal(pp['blade_surface_st'], p['blade_surface_st']), None)
+
+        rthick = pp['rthick_st'].copy()
+        rthick[2] *= 1.05
+        pp['rthick_st'] = rthick
+        pp.run()
+        self.assertTrue(pp.root.blade_surf._lofting_pool is None)
+        self.assertEqual(pp.root.blade_surf.lofted_sections.shape[0], 8)
+
+    def test_output_modes(self):
+
+        p = configure()
+        p.run()
+        # the native engine lofts directly into the outputs
+        self.assertTrue(np.may_share_memory(p.root.blade_surf.pgl_surf.surface, p['blade_surface_st']))
+
+        for nworkers in [1, 2]:
+            p32 = configure(dtype=np.float32, norm_surface=False)
+            p32.root.blade_surf.loft_options['nworkers'] = nworkers
+            p32.run()
+            p32.root.blade_surf.close()
+            self.assertFalse('blade_surface_norm_st' in p32.root.unknowns)
+            self.assertEqual(p32['blade_surface_st'].dtype, np.float32)
+            self.assertEqual(np.testing.assert_array_almost_equal(p32['blade_surface_st'], p['blade_surface_st'], decimal=6), None)
+
+    def test_unsupported(self):
+
+        cfg = {'redistribute_flag': True}
+        self.assertRaises(NotImplementedError, PGLLoftedBladeSurface, cfg, engine='native')
+
+
+if __name__ == '__main__':
+
+    unittest.main()
@@ -9,7 +9,8 @@ from openmdao.api import Problem, Group
 from fusedwind.turbine.geometry import read_blade_planform,\
                                        redistribute_planform,\
                                        PGLLoftedBladeSurface,\
-                                       PGLRedistributedPlanform
+                                       PGLRedistributedPlanform, \
+                                       interpolator_key
 
 PATH = pkg_resources.resource_filename('fusedwind', 'turbine/test')
 
@@ -50,6 +51,55 @@ class PGLLoftedBladeSurfaceTestCase(unittest.TestCase):
         p.run()
         self.assertAlmostEqual(np.sum(p['blade_surface_st']), 775.21809362184081, places=6)
 
+    def test_incremental(self):
+
+        p = configure({})
+        p.root.blade_surf.loft_options['incremental'] = True
+        p.run()
+        self.assertEqual(p.root.blade_surf.lofted_sections.shape[0], 8)
+
+        rthick = p['rthick_st'].copy()
+        rthick[[2, 3]] *= 1.05
+        p['rthick_st'] = rthick
+        p.run()
+        if p.root.blade_surf.engine == 'pgl':
+            # PGL always lofts the whole blade
+            self.assertEqual(p.root.blade_surf.lofted_sections.shape[0], 8)
+            return
+        self.assertEqual(np.testing.assert_array_equal(p.root.blade_surf.lofted_sections, [2, 3]), None)
+
+        pf = configure({})
+        pf['rthick_st'] = rthick
+        pf.run()
+        self.assertEqual(np.testing.assert_array_almost_equal(p['blade_surface_st'], pf['blade_surface_st'], decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['blade_surface_norm_st'], pf['blade_surface_norm_st'], decimal=12), None)
+
+        # unchanged planforms are not lofted again
+        p.run()
+        self.assertEqual(p.root.blade_surf.lofted_sections.shape[0], 0)
+
+    def test_interpolator_cache(self):
+
+        p1 = configure({})
+        p2 = configure({})
+        p1.run()
+        p2.run()
+        self.assertTrue(p1.root.blade_surf.pgl_surf.interpolator is
+                        p2.root.blade_surf.pgl_surf.interpolator)
+
+    def test_interpolator_key(self):
+
+        cfg = configure({}).root.blade_surf.config
+        cfg2 = dict(cfg)
+        cfg2['base_airfoils'] = [af.copy() for af in cfg['base_airfoils']]
+        self.assertEqual(interpolator_key(cfg), interpolator_key(cfg2))
+
+        cfg2['ni_chord'] = 100
+        self.assertNotEqual(interpolator_key(cfg), interpolator_key(cfg2))
+        cfg2['ni_chord'] = cfg['ni_chord']
+        cfg2['base_airfoils'][1] = cfg2['base_airfoils'][1] * 1.01
+        self.assertNotEqual(interpolator_key(cfg), interpolator_key(cfg2))
+
 if __name__ == '__main__':
 
     unittest.main()
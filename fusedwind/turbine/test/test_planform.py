@@ -1,10 +1,14 @@
 
+import os
+import shutil
 import numpy as np
 import unittest
+from scipy.interpolate import CubicSpline
 
-from openmdao.api import Problem, Group
+from openmdao.api import Problem, Group, IndepVarComp
 
-from fusedwind.turbine.geometry import PGLRedistributedPlanform
+from fusedwind.turbine.geometry import PGLRedistributedPlanform, PlanformHistory, \
+                                       BladePlanformWriter, PF_HIST_NAMES
 
 
 def configure(size_in=10, size_out=20):
@@ -21,6 +25,22 @@ def configure(size_in=10, size_out=20):
 
     return p
 
+def configure_operator(spline_type, size_in=10, size_out=20):
+
+    s = np.linspace(0, 1, size_in)**1.2
+    s_new = np.linspace(-0.1, 1, size_out)
+
+    p = Problem(root=Group())
+    for i, name in enumerate(PGLRedistributedPlanform._pf_names):
+        val = s if name == 's' else np.sin(s * (i + 1)) + i
+        p.root.add(name + '_c', IndepVarComp(name, val), promotes=['*'])
+    r = p.root.add('redist', PGLRedistributedPlanform('_st', size_in, s_new), promotes=['*'])
+    r.spline_type = spline_type
+    r.deriv_options['check_form'] = 'central'
+    p.setup(check=False)
+
+    return p, s, s_new
+
 class PlanformTestCase(unittest.TestCase):
 
     def test_redist(self):
@@ -30,6 +50,82 @@ class PlanformTestCase(unittest.TestCase):
         p.run()
         self.assertEqual(np.testing.assert_array_almost_equal(p['x_st'], np.linspace(0, 1, size_out), decimal=4), None)
 
+    def test_operator(self):
+
+        for spline_type in ['linear', 'ncubic']:
+            p, s, s_new = configure_operator(spline_type)
+            p.run()
+            for name in ['x', 'chord', 'p_le']:
+                if spline_type == 'linear':
+                    expected = np.interp(s_new, s, p[name])
+                else:
+                    expected = CubicSpline(s, p[name], bc_type='natural')(s_new)
+                self.assertEqual(np.testing.assert_array_almost_equal(p[name + '_st'], expected, decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(p['athick_st'], p['chord_st'] * p['rthick_st'], decimal=12), None)
+
+            # the operator is reused until s changes
+            W = p.root.redist._W
+            p.run()
+            self.assertTrue(p.root.redist._W is W)
+            p['s'] = s * 0.9
+            p.run()
+            self.assertFalse(p.root.redist._W is W)
+
+            data = p.check_partial_derivatives(out_stream=None)
+            for key, val in data['redist'].iteritems():
+                self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=4), None)
+
+    def test_default_partials(self):
+
+        p, s, s_new = configure_operator('akima')
+        p.run()
+        self.assertEqual(p.root.redist.deriv_options['type'], 'fd')
+        data = p.check_partial_derivatives(out_stream=None)
+        for key, val in data['redist'].iteritems():
+            # the partials w.r.t. s are large, compare relative to their magnitude
+            scale = max(1., np.abs(val['J_fd']).max())
+            self.assertEqual(np.testing.assert_array_almost_equal(val['J_fd2'] / scale, val['J_fd'] / scale, decimal=4), None)
+        J = data['redist']['x_st', 'x']['J_fd']
+        self.assertTrue(np.abs(J).max() > 0.5)
+        grad = p.calc_gradient(['x'], ['x_st'], mode='fwd', return_format='array')
+        self.assertEqual(np.testing.assert_array_almost_equal(grad, J, decimal=4), None)
+
+    def test_history(self):
+
+        test_dir = 'test_dir'
+        if not os.path.exists(test_dir):
+            os.makedirs(test_dir)
+
+        p = Problem(root=Group())
+        for i, name in enumerate(PF_HIST_NAMES):
+            p.root.add(name + '_c', IndepVarComp(name, np.zeros(10)), promotes=['*'])
+        w = p.root.add('writer', BladePlanformWriter(10, os.path.join(test_dir, 'blade'),
+                                                     history=True, chunk_size=4), promotes=['*'])
+        p.setup(check=False)
+        for it in range(10):
+            for i, name in enumerate(PF_HIST_NAMES):
+                p[name] = np.linspace(0, 1, 10) * i + it
+            p.run()
+
+        # a second writer opening the file appends to it
+        h = PlanformHistory(w.filebase)
+        self.assertEqual(len(h), 10)
+        h.append(20, dict((name, -np.ones(10)) for name in PF_HIST_NAMES))
+        self.assertEqual(os.listdir(test_dir), [os.path.basename(h.filename)])
+
+        h = PlanformHistory(w.filebase)
+        self.assertEqual(np.testing.assert_array_equal(h.iterations, range(1, 11) + [20]), None)
+        chord = h.column('chord')
+        self.assertEqual(chord.shape, (11, 10))
+        self.assertEqual(np.testing.assert_array_equal(chord[:10], np.linspace(0, 1, 10) * 6 + np.arange(10)[:, np.newaxis]), None)
+        self.assertEqual(np.testing.assert_array_equal(chord[10], -np.ones(10)), None)
+        pf = h.read(7)
+        for i, name in enumerate(PF_HIST_NAMES):
+            self.assertEqual(np.testing.assert_array_equal(pf[name], np.linspace(0, 1, 10) * i + 6), None)
+        self.assertRaises(KeyError, h.read, 11)
+        self.assertRaises(ValueError, h.append, 21, dict((name, np.ones(5)) for name in PF_HIST_NAMES))
+        shutil.rmtree(test_dir)
+
 if __name__ == '__main__':
 
     unittest.main()
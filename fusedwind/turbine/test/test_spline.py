@@ -1,8 +1,10 @@
 
 import unittest
 import numpy as np
-from openmdao.api import Problem, Group
-from fusedwind.turbine.geometry import FFDSpline
+from scipy.interpolate import pchip
+from openmdao.api import Problem, Group, IndepVarComp
+from fusedwind.lib.naturalcubicspline import NaturalCubicSpline
+from fusedwind.turbine.geometry import FFDSpline, MultiFFDSpline, BezierSpline, _PGL_installed
 
 expected = np.array([ 0.        ,  0.16474038,  0.32586582,  0.47988383,  0.62354352,
         0.75394814,  0.86865795,  0.96578062,  1.04404672,  1.10286821,
@@ -10,13 +12,46 @@ expected = np.array([ 0.        ,  0.16474038,  0.32586582,  0.47988383,  0.6235
         1.10626695,  1.07311899,  1.04098464,  1.01486427,  1.        ])
 
 
-def configure():
+def bezier_curve(CPs, ni):
+    """
+    de Casteljau evaluation of a Bezier curve at ni uniformly spaced
+    parameter values, as PGL's BezierCurve
+    """
+
+    t = np.linspace(0, 1, ni)[:, np.newaxis, np.newaxis]
+    P = np.tile(CPs, (ni, 1, 1))
+    while P.shape[1] > 1:
+        P = (1. - t) * P[:, :-1] + t * P[:, 1:]
+    return P[:, 0]
+
+def configure(spline_type='bezier', Cx=np.linspace(0, 1, 4), curvature='fd', linear_basis=True):
+
+    p = Problem(root=Group())
+    s = np.linspace(0, 1, 20)
+    P = np.sin(np.linspace(0, 1, 20)*np.pi)
+    p.root.add('a_c', IndepVarComp('a_C', np.zeros(Cx.shape[0])), promotes=['*'])
+    a = p.root.add('spla', FFDSpline('a', s, P, Cx), promotes=['*'])
+    a.spline_options['spline_type'] = spline_type
+    a.spline_options['curvature'] = curvature
+    a.spline_options['linear_basis'] = linear_basis
+    a.deriv_options['check_form'] = 'central'
+    p.setup(check=False)
+    return p
+
+def configure_multi(spline_type='bezier', Cx=np.linspace(0, 1, 4), curvature='fd', grids=None):
 
     p = Problem(root=Group())
     s = np.linspace(0, 1, 20)
     P = np.sin(np.linspace(0, 1, 20)*np.pi)
-    a = p.root.add('spla', FFDSpline('a', s, P, np.linspace(0, 1, 4)), promotes=['*'])
-    p.setup()
+    p.root.add('a_c', IndepVarComp('a_C', np.zeros(Cx.shape[0])), promotes=['*'])
+    p.root.add('b_c', IndepVarComp('b_C', np.zeros(Cx.shape[0])), promotes=['*'])
+    m = p.root.add('spls', MultiFFDSpline(s, Cx, spline_type, grids=grids), promotes=['*'])
+    m.spline_options['curvature'] = curvature
+    m.add_spline('a', P)
+    m.add_spline('a2', 2 * P, cname='a_C', scaler=0.5)
+    m.add_spline('b', P)
+    m.deriv_options['check_form'] = 'central'
+    p.setup(check=False)
     return p
 
 class TestFFDSpline(unittest.TestCase):
@@ -29,6 +64,106 @@ class TestFFDSpline(unittest.TestCase):
 
         self.assertEqual(np.testing.assert_array_almost_equal(p['a'], expected, decimal=6), None)
 
+    def test_basis(self):
+        s = np.linspace(0, 1, 20)
+        Cx = np.array([0, 0.25, 0.75, 1.])
+        C = np.array([0, 0.1, -0.05, 0.2])
+        p = configure(Cx=Cx)
+        p['a_C'] = C
+        p.run()
+
+        self.assertEqual(p.root.spla._basis.shape, (20, 4))
+        points = bezier_curve(np.array([Cx, C]).T, BezierSpline.ni)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['a'] - p.root.spla.Pinit,
+                                                              NaturalCubicSpline(points[:, 0], points[:, 1])(s), decimal=12), None)
+
+        # the curve evaluated by PGL
+        if _PGL_installed:
+            pb = configure(Cx=Cx, linear_basis=False)
+            pb['a_C'] = C
+            pb.run()
+            self.assertTrue(pb.root.spla._basis is None)
+            self.assertEqual(np.testing.assert_array_almost_equal(p['a'], pb['a'], decimal=12), None)
+
+    def test_partials(self):
+        for spline_type in ['bezier', 'pchip']:
+            p = configure(spline_type)
+            p['a_C'] = np.array([0, 0.1, -0.05, 0.2])
+            p.run()
+            data = p.check_partial_derivatives(out_stream=None)
+
+            self.assertEqual(len(data['spla']), 2)
+            for key, val in data['spla'].iteritems():
+                self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=4), None)
+
+    def test_multi(self):
+        for spline_type in ['bezier', 'pchip']:
+            p = configure(spline_type)
+            p['a_C'] = np.array([0, 0.1, -0.05, 0.2])
+            p.run()
+            pm = configure_multi(spline_type)
+            pm['a_C'] = np.array([0, 0.1, -0.05, 0.2])
+            pm['b_C'] = np.array([0.1, 0.0, 0.05, -0.2])
+            pm.run()
+
+            self.assertEqual(np.testing.assert_array_almost_equal(pm['a'], p['a'], decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(pm['a_curv'], p['a_curv'], decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(pm['a2'] - 2 * p.root.spla.Pinit,
+                                                                  0.5 * (p['a'] - p.root.spla.Pinit), decimal=12), None)
+
+            data = pm.check_partial_derivatives(out_stream=None)
+            self.assertEqual(len(data['spls']), 12)
+            for key, val in data['spls'].iteritems():
+                self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=4), None)
+
+    def test_exact_curvature(self):
+        s = np.linspace(0, 1, 20)
+        p = configure(curvature='exact')
+        p.run()
+        curv = -np.pi**2 * np.sin(np.pi * s) / (1. + (np.pi * np.cos(np.pi * s))**2)**1.5
+
+        self.assertEqual(np.testing.assert_array_almost_equal(p['a_curv'] / np.pi**2, curv / np.pi**2, decimal=2), None)
+
+        for spline_type in ['bezier', 'pchip']:
+            p = configure(spline_type, curvature='exact')
+            p['a_C'] = np.array([0, 0.1, -0.05, 0.2])
+            p.run()
+            pm = configure_multi(spline_type, curvature='exact')
+            pm['a_C'] = np.array([0, 0.1, -0.05, 0.2])
+            pm['b_C'] = np.array([0.1, 0.0, 0.05, -0.2])
+            pm.run()
+
+            self.assertEqual(np.testing.assert_array_almost_equal(pm['a_curv'], p['a_curv'], decimal=12), None)
+
+            for prob, comp in [(p, 'spla'), (pm, 'spls')]:
+                data = prob.check_partial_derivatives(out_stream=None)
+                for key, val in data[comp].iteritems():
+                    self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=4), None)
+
+    def test_grids(self):
+
+        s = np.linspace(0, 1, 20)
+        s_cfd = np.linspace(0, 1, 37)
+        P = np.sin(s * np.pi)
+        for spline_type in ['bezier', 'pchip']:
+            p = configure_multi(spline_type, grids={'_st': s, '_cfd': s_cfd})
+            p['a_C'] = np.array([0, 0.1, -0.05, 0.2])
+            p['b_C'] = np.array([0.1, 0.0, 0.05, -0.2])
+            p.run()
+
+            for name in ['a', 'a2', 'b']:
+                self.assertEqual(np.testing.assert_array_almost_equal(p[name + '_st'], p[name], decimal=12), None)
+            if spline_type == 'pchip':
+                dP = pchip(np.linspace(0, 1, 4), p['a_C'])(s_cfd)
+            else:
+                dP = np.dot(p.root.spls.spline.basis(s_cfd, np.linspace(0, 1, 4)), p['a_C'])
+            self.assertEqual(np.testing.assert_array_almost_equal(p['a_cfd'] - pchip(s, P)(s_cfd), dP, decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(p['a2_cfd'] - pchip(s, 2 * P)(s_cfd), 0.5 * dP, decimal=12), None)
+
+            data = p.check_partial_derivatives(out_stream=None)
+            for key, val in data['spls'].iteritems():
+                self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=4), None)
+
 
 if __name__ == '__main__':
 
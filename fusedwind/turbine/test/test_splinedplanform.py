@@ -9,6 +9,7 @@ from openmdao.api import Problem, Group
 from fusedwind.turbine.geometry import SplinedBladePlanform, \
                                        read_blade_planform, \
                                        redistribute_planform
+from fusedwind.lib.pchipspline import pchip_interpolate
 
 chord_bez = np.array([ 0.06229255,  0.06265925,  0.06494163,  0.069981  ,  0.07472148,
         0.07708992,  0.0774626 ,  0.07638454,  0.07427456,  0.07151453,
@@ -25,19 +26,33 @@ athick_pchip = np.array([ 0.06229255,  0.06055473,  0.05242633,  0.04247846,  0.
 
 PATH = pkg_resources.resource_filename('fusedwind', 'turbine/test')
 
-def configure(spline_type):
+def configure(spline_type, batch_splines=False):
 
     pf = read_blade_planform(os.path.join(PATH, 'data/DTU_10MW_RWT_blade_axis_prebend.dat'))
     pf = redistribute_planform(pf, s=np.linspace(0, 1, 20))
 
     p = Problem(root=Group())
-    spl = p.root.add('pf_splines', SplinedBladePlanform(pf), promotes=['*'])
+    spl = p.root.add('pf_splines', SplinedBladePlanform(pf, batch_splines=batch_splines), promotes=['*'])
     for name in ['x', 'chord', 'rot_z', 'rthick']:
         spl.add_spline(name, np.array([0, 0.25, 0.75, 1.]), spline_type=spline_type)
     spl.configure()
     p.setup()
     return p
 
+def configure_grids(spline_type, grids):
+
+    pf = read_blade_planform(os.path.join(PATH, 'data/DTU_10MW_RWT_blade_axis_prebend.dat'))
+    s = np.linspace(0, 1, 20)
+    pf = dict((k, pchip_interpolate(pf['s'], v, s)) for k, v in pf.iteritems() if np.ndim(v) == 1)
+
+    p = Problem(root=Group())
+    spl = p.root.add('pf_splines', SplinedBladePlanform(pf, grids=grids), promotes=['*'])
+    for name in ['x', 'chord', 'rot_z', 'rthick']:
+        spl.add_spline(name, np.array([0, 0.25, 0.75, 1.]), spline_type=spline_type)
+    spl.configure()
+    p.setup(check=False)
+    return p
+
 class TestSplinedPlanform(unittest.TestCase):
 
 
@@ -79,6 +94,51 @@ class TestSplinedPlanform(unittest.TestCase):
 
         self.assertEqual(np.testing.assert_array_almost_equal(p['chord'], chord, decimal=6), None)
 
+    def test_batch_splines(self):
+        for spline_type in ['bezier', 'pchip']:
+            p = configure(spline_type)
+            pb = configure(spline_type, batch_splines=True)
+            for c in [p, pb]:
+                for name in ['x', 'chord', 'rot_z', 'rthick']:
+                    c[name + '_C'] = np.array([0.01, -0.02, 0.03, 0.015])
+                c['blade_scale'] = 1.1
+                c.run()
+
+            for name in ['x', 'chord', 'rot_z', 'rthick', 'athick']:
+                self.assertEqual(np.testing.assert_array_almost_equal(pb[name], p[name], decimal=12), None)
+
+    def test_partials(self):
+        for spline_type in ['bezier', 'pchip']:
+            p = configure(spline_type)
+            for name in ['x', 'chord', 'rot_z', 'rthick']:
+                p[name + '_C'] = np.array([0.01, -0.02, 0.03, 0.015])
+            p.run()
+            data = p.check_partial_derivatives(out_stream=None)
+
+            for cname, comp in data.iteritems():
+                for key, val in comp.iteritems():
+                    self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=4), None)
+                    self.assertEqual(np.testing.assert_array_almost_equal(val['J_rev'], val['J_fd'], decimal=4), None)
+
+    def test_grids(self):
+        grids = {'_st': np.linspace(0, 1, 20), '_cfd': np.linspace(0, 1, 37)}
+        for spline_type in ['bezier', 'pchip']:
+            p = configure_grids(spline_type, grids)
+            for name in ['x', 'chord', 'rot_z', 'rthick']:
+                p[name + '_C'] = np.array([0.01, -0.02, 0.03, 0.015])
+            p['blade_scale'] = 1.1
+            p.run()
+
+            for name in ['s', 'x', 'y', 'z', 'chord', 'rot_z', 'rthick', 'athick', 'p_le']:
+                self.assertEqual(np.testing.assert_array_almost_equal(p[name + '_st'], p[name], decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(p['athick_cfd'], p['chord_cfd'] * p['rthick_cfd'], decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(p['chord_cfd'], pchip_interpolate(grids['_st'], p['chord'], grids['_cfd']), decimal=3), None)
+
+            data = p.check_partial_derivatives(out_stream=None)
+            for cname, comp in data.iteritems():
+                for key, val in comp.iteritems():
+                    self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=4), None)
+
 if __name__ == '__main__':
 
     unittest.main()
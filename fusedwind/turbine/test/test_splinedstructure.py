@@ -4,7 +4,7 @@ import numpy as np
 import os
 import pkg_resources
 
-from openmdao.api import Group, Problem
+from openmdao.api import Group, Problem, ExecComp, IndepVarComp
 
 from fusedwind.turbine.structure import read_bladestructure, \
                                         interpolate_bladestructure, \
@@ -17,19 +17,23 @@ from fusedwind.turbine.geometry import read_blade_planform,\
 
 PATH = pkg_resources.resource_filename('fusedwind', 'turbine/test')
 
-def configure():
+def configure(batch_splines=False, packed=False):
 
     st3d = read_bladestructure(os.path.join(PATH, 'data/DTU10MW'))
     st3dn = interpolate_bladestructure(st3d, np.linspace(0, 1, 8))
 
     p = Problem(root=Group())
-    spl = p.root.add('st_splines', SplinedBladeStructure(st3dn), promotes=['*'])
+    spl = p.root.add('st_splines', SplinedBladeStructure(st3dn, batch_splines=batch_splines,
+                                                                packed=packed), promotes=['*'])
     spl.add_spline('DP08', np.linspace(0, 1, 4), spline_type='bezier')
     spl.add_spline('DP09', np.linspace(0, 1, 4), spline_type='bezier')
     spl.add_spline(('DP04', 'DP05'), np.linspace(0, 1, 4), spline_type='bezier')
     spl.add_spline(('r04uniax00T', 'r04uniax01T'), np.linspace(0, 1, 4), spline_type='bezier')
     spl.add_spline('w02biax00T', np.linspace(0, 1, 4), spline_type='bezier')
     spl.configure()
+    if packed:
+        p.root.add('dp02', ExecComp('y = 2 * x', x=np.zeros(8), y=np.zeros(8)))
+        p.root.connect('DPs', 'dp02.x', src_indices=spl.src_indices('DP02'))
     p.setup()
     return p
 
@@ -73,6 +77,37 @@ def configure_with_surface():
 
     return p
 
+def configure_circle(engine='native', ni=401):
+    """
+    circular cross sections with chord c starting at the trailing edge
+    going along the lower side to the leading edge at x=0
+    """
+
+    nsec = 4
+    c = np.array([1., 0.8, 0.6, 0.4])
+    theta = np.linspace(0, 2 * np.pi, ni)
+    surf = np.zeros((ni, nsec, 3))
+    surf[:, :, 0] = 0.5 * np.outer(1 + np.cos(theta), c)
+    surf[:, :, 1] = -0.5 * np.outer(np.sin(theta), c)
+    surf[:, :, 2] = np.linspace(0, 1, nsec)
+
+    st3d = {}
+    st3d['s'] = np.linspace(0, 1, nsec)
+    st3d['DPs'] = np.tile([-1., -0.5, -0.25, 0., 0.25, 0.5, 1.], (nsec, 1))
+    st3d['web_def'] = [[2, -3]]
+    st3d['regions'] = [{'layers': ['uniax00']} for i in range(6)]
+    st3d['webs'] = [{'layers': ['biax00']}]
+
+    p = Problem(root=Group())
+    p.root.add('surf_c', IndepVarComp('blade_surface_st', surf), promotes=['*'])
+    for i in range(st3d['DPs'].shape[1]):
+        p.root.add('DP%02d_c' % i, IndepVarComp('DP%02d' % i, st3d['DPs'][:, i]), promotes=['*'])
+    p.root.add('r03_c', IndepVarComp('r03uniax00T', np.linspace(0.01, 0.02, nsec)), promotes=['*'])
+    p.root.add('st_props', BladeStructureProperties((ni, nsec, 3), st3d, [1, 2, 4, 5],
+                                                    engine=engine), promotes=['*'])
+    p.setup(check=False)
+    return p, c
+
 
 class TestSplinedBladeStructure(unittest.TestCase):
 
@@ -97,6 +132,44 @@ class TestSplinedBladeStructure(unittest.TestCase):
         self.assertEqual(np.testing.assert_array_almost_equal(p['w02biax00T'], w02biax, decimal=6), None)
         self.assertEqual(np.testing.assert_array_almost_equal(p['DP04'], DP04, decimal=6), None)
 
+    def test_batch_splines(self):
+
+        p = configure()
+        pb = configure(batch_splines=True)
+        for c in [p, pb]:
+            c['r04uniax00T_C'][2] = 0.01
+            c['w02biax00T_C'][2] = 0.01
+            c['DP04_C'][1] = 0.1
+            c.run()
+
+        self.assertEqual(len([c for c in pb.root.st_splines.subsystems() if c.name.startswith('ffd')]), 1)
+        for name in ['DP04', 'DP05', 'DP08', 'r04uniax00T', 'r04uniax01T', 'w02biax00T']:
+            self.assertEqual(np.testing.assert_array_almost_equal(pb[name], p[name], decimal=12), None)
+
+    def test_packed(self):
+
+        p = configure()
+        pp = configure(packed=True)
+        for c in [p, pp]:
+            c['r04uniax00T_C'][2] = 0.01
+            c['w02biax00T_C'][2] = 0.01
+            c['DP04_C'][1] = 0.1
+            c.run()
+
+        spl = pp.root.st_splines
+        self.assertEqual(pp['DPs'].shape, (8, len(p.root.st_splines.st3dinit['DPs'][0])))
+        self.assertEqual(pp['thicknesses'].shape, pp['angles'].shape)
+        for name in ['DP02', 'DP04', 'DP05', 'r04uniax00T', 'r04uniax01T', 'w02biax00T', 'r01triax00A']:
+            array, col = spl.packed_slices[name]
+            self.assertEqual(np.testing.assert_array_almost_equal(pp[array][:, col], p[name], decimal=12), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(spl.view(name), p[name], decimal=12), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(pp['dp02.y'], 2 * p['DP02'], decimal=12), None)
+
+        data = pp.check_partial_derivatives(out_stream=None, comps=['st_splines.packed_st'])
+        for key, val in data['st_splines.packed_st'].iteritems():
+            self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=6), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(val['J_rev'], val['J_fd'], decimal=6), None)
+
     def test_props(self):
 
         r04_thickness = np.array([ 0.032     ,  0.06272709,  0.07806093,  0.083     ,  0.07821129,
@@ -121,6 +194,66 @@ class TestSplinedBladeStructure(unittest.TestCase):
         self.assertEqual(np.testing.assert_array_almost_equal(p['pacc_u'], pacc_u, decimal=6), None)
         self.assertEqual(np.testing.assert_array_almost_equal(p['web_angle02'], web_angle02, decimal=6), None)
 
+    def test_props_native(self):
+
+        p, c = configure_circle()
+        p.run()
+
+        a = np.sqrt(2.) / 4.
+        pacc = np.array([(1. - a) * c, (-0.5 - a) * c]).T / 2.
+        self.assertEqual(np.testing.assert_array_almost_equal(p['r00_width'], np.pi * c / 4., decimal=5), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['r02_width'], np.pi * c / 8., decimal=5), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['pacc_l'], pacc, decimal=5), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['pacc_u'], pacc * [1, -1], decimal=5), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['web_offset00'],
+                                                              np.array([0 * c, -2 * a * c]).T, decimal=5), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['web_angle00'], np.zeros(4), decimal=5), None)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['r03_thickness'], np.linspace(0.01, 0.02, 4), decimal=12), None)
+
+    def test_props_cache(self):
+
+        p, c = configure_circle()
+        p.run()
+        bsp = p.root.st_props
+        width = p['r01_width'].copy()
+        param = bsp._cache.values()[0]
+
+        p['DP03'] = 0.1 * np.ones(4)
+        p.run()
+        self.assertEqual(len(bsp._cache), 1)
+        self.assertTrue(bsp._cache.values()[0] is param)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['r01_width'], width, decimal=12), None)
+
+        p['blade_surface_st'][:, :, :2] *= 2.
+        p.run()
+        self.assertEqual(len(bsp._cache), 2)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['r01_width'], 2 * width, decimal=12), None)
+
+        bsp.cache_size = 1
+        p['blade_surface_st'][:, :, :2] /= 2.
+        p.run()
+        self.assertEqual(len(bsp._cache), 1)
+        self.assertEqual(np.testing.assert_array_almost_equal(p['r01_width'], width, decimal=12), None)
+        bsp.clear_cache()
+        self.assertEqual(len(bsp._cache), 0)
+
+    def test_props_partials(self):
+
+        p, c = configure_circle(ni=41)
+        # perturb the circles and place the DPs away from the points
+        p['blade_surface_st'][:, :, 1] *= np.linspace(0.8, 1.2, 41)[:, np.newaxis]
+        for i, DP in enumerate([-1., -0.47, -0.23, 0.02, 0.27, 0.52, 1.]):
+            p['DP%02d' % i] = DP + np.linspace(0, 0.01, 4)
+        p['r03uniax00T'][1] = -0.01
+        p.root.st_props.deriv_options['check_form'] = 'central'
+        p.run()
+        data = p.check_partial_derivatives(out_stream=None)
+
+        self.assertEqual(len(data['st_props']), 18 * 9)
+        for key, val in data['st_props'].iteritems():
+            self.assertEqual(np.testing.assert_array_almost_equal(val['J_fwd'], val['J_fd'], decimal=4), None)
+            self.assertEqual(np.testing.assert_array_almost_equal(val['J_rev'], val['J_fd'], decimal=4), None)
+
 if __name__ == '__main__':
 
     unittest.main()
@@ -3,7 +3,8 @@ import numpy as np
 import unittest
 
 from fusedwind.turbine.structure import write_bladestructure,\
-    read_bladestructure
+    read_bladestructure, write_bladestructure_bin, read_bladestructure_bin,\
+    convert_bladestructure
 import os
 import shutil
 
@@ -59,6 +60,70 @@ class StructureTests(unittest.TestCase):
                          st3dn['web_def'],
                          st3d_desired['web_def']), None)
         shutil.rmtree(self.test_dir)
-        
+
+    def assert_st3d_equal(self, st3d, st3dn):
+        for name in ['version', 'materials', 'failcrit']:
+            self.assertEqual(st3dn[name], st3d[name])
+        for name in ['s', 'DPs', 'matprops', 'failmat', 'web_def']:
+            self.assertEqual(np.testing.assert_array_equal(st3dn[name], st3d[name]), None)
+        for rtype in ['regions', 'webs']:
+            self.assertEqual(len(st3dn[rtype]), len(st3d[rtype]))
+            for r, rn in zip(st3d[rtype], st3dn[rtype]):
+                self.assertEqual(rn['layers'], r['layers'])
+                self.assertEqual(np.testing.assert_array_equal(rn['thicknesses'], r['thicknesses']), None)
+                self.assertEqual(np.testing.assert_array_equal(rn['angles'], r['angles']), None)
+
+    def test_read_write_read_bladestructure_bin(self):
+        if not os.path.exists(self.test_dir):
+            os.makedirs(self.test_dir)
+        st3d = read_bladestructure(os.path.join(self.data_version_1, self.blade))
+        write_bladestructure_bin(st3d, os.path.join(self.test_dir, 'test'))
+        st3dn = read_bladestructure_bin(os.path.join(self.test_dir, 'test.st3b'))
+        self.assertTrue(isinstance(st3dn['DPs'].base, np.memmap))
+        self.assert_st3d_equal(st3d, st3dn)
+        st3dn = read_bladestructure(os.path.join(self.test_dir, 'test.st3b'))
+        self.assert_st3d_equal(st3d, st3dn)
+        st3dn = read_bladestructure_bin(os.path.join(self.test_dir, 'test.st3b'), mmap_mode=None)
+        self.assertFalse(isinstance(st3dn['DPs'].base, np.memmap))
+        self.assert_st3d_equal(st3d, st3dn)
+        del st3dn
+        shutil.rmtree(self.test_dir)
+
+    def test_read_bladestructure_lazy(self):
+        filebase = os.path.join(self.data_version_0, self.blade)
+        st3d = read_bladestructure(filebase)
+        st3dl = read_bladestructure(filebase, lazy=True)
+        self.assertEqual(len(st3dl['regions']), len(st3d['regions']))
+        self.assertFalse(st3dl['regions'].is_loaded(4))
+        r = st3dl['regions'][4]
+        self.assertTrue(st3dl['regions'].is_loaded(4))
+        self.assertFalse(st3dl['regions'].is_loaded(5))
+        self.assertTrue(st3dl['regions'][4] is r)
+        self.assertFalse(st3dl['webs'].is_loaded(0))
+        self.assert_st3d_equal(st3d, st3dl)
+
+    def test_read_write_read_bladestructure_threaded(self):
+        if not os.path.exists(self.test_dir):
+            os.makedirs(self.test_dir)
+        st3d = read_bladestructure(os.path.join(self.data_version_1, self.blade))
+        st3dt = read_bladestructure(os.path.join(self.data_version_1, self.blade), nworkers=4)
+        self.assert_st3d_equal(st3d, st3dt)
+        write_bladestructure(st3d, os.path.join(self.test_dir, 'test'), nworkers=4)
+        st3dn = read_bladestructure(os.path.join(self.test_dir, 'test'), nworkers=4)
+        self.assert_st3d_equal(st3d, st3dn)
+        shutil.rmtree(self.test_dir)
+
+    def test_convert_bladestructure(self):
+        if not os.path.exists(self.test_dir):
+            os.makedirs(self.test_dir)
+        filebase = os.path.join(self.data_version_0, self.blade)
+        st3d = read_bladestructure(filebase)
+        filename = convert_bladestructure(filebase, os.path.join(self.test_dir, 'test'))
+        self.assertEqual(filename, os.path.join(self.test_dir, 'test.st3b'))
+        self.assert_st3d_equal(st3d, read_bladestructure_bin(filename))
+        # falls back to the text files if there is no binary file
+        self.assert_st3d_equal(st3d, read_bladestructure_bin(filebase + '.st3b'))
+        shutil.rmtree(self.test_dir)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file